@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -5,20 +6,39 @@ import uvicorn
 from loguru import logger
 
 from .config import get_cfg
+from .sessions.broker import run_broker
 
-logger.enable("app")
-logger.remove()
-level = "INFO"
-if get_cfg().debug:
-    level = "DEBUG"
-logger.add(sys.stderr, level=level, serialize=True, diagnose=False, enqueue=True)
-
-uvicorn.run(
-    "api.app:app",
-    host=os.environ.get("HOST", "0.0.0.0"),
-    port=int(os.environ.get("PORT", "1339")),
-    workers=1,
-    access_log=False,
-    server_header=False,
-    reload=get_cfg().debug,
-)
+
+def main():
+    # guarded, uvicorn's spawned workers re-import this module
+    logger.enable("app")
+    logger.remove()
+    level = "INFO"
+    if get_cfg().debug:
+        level = "DEBUG"
+    logger.add(sys.stderr, level=level, serialize=True, diagnose=False, enqueue=True)
+
+    workers = get_cfg().workers
+    if workers > 1 and get_cfg().session_backend != "broker":
+        logger.warning("Multiple workers need SESSION_BACKEND=broker, running a single worker.")
+        workers = 1
+    if workers > 1:
+        # the broker outlives worker restarts and dies with this process
+        broker = multiprocessing.Process(
+            target=run_broker, args=(get_cfg().session_broker_path,), daemon=True
+        )
+        broker.start()
+
+    uvicorn.run(
+        "api.app:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "1339")),
+        workers=workers,
+        access_log=False,
+        server_header=False,
+        reload=get_cfg().debug,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from ..ai.ollama import OllamaClient
+from ..ai.prompts import get_summary_prompt
+from ..ai.scheduler import Priority
+from ..config import get_cfg
+from ..models.chat import ChatMessage
+from ..models.communication import LiveCommunication
+from ..utils.types import MessageType
+
+
+class HistoryWindow:
+    """
+    Sliding window over the chat history that keeps the prompt within a fixed
+    budget, so prompt evaluation time stays flat however long a session runs.
+
+    The budget is counted in characters or in estimated tokens (characters
+    divided by `chars_per_token`). Pinned messages and the new message are
+    always kept; the most recent history turns fill the remaining budget.
+
+    When the caller passes the previous window start to `build`, the window
+    only moves once it overflows, and then drops down to `low_water` of the
+    budget. Between those jumps the prompt prefix stays byte-identical, so
+    the LLM server can reuse its cached prefix.
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        unit: str = "tokens",
+        chars_per_token: float = 4.0,
+        low_water: float = 0.6,
+    ):
+        if unit not in ("tokens", "chars"):
+            raise ValueError(f"Unknown history budget unit: {unit}")
+        self.budget = budget
+        self.unit = unit
+        self.chars_per_token = chars_per_token
+        self.low_water = low_water
+
+    def cost(self, text: str) -> int:
+        if self.unit == "chars":
+            return len(text)
+        return int(len(text) / self.chars_per_token) + 1
+
+    def select(
+        self,
+        history: Sequence[ChatMessage],
+        reserved: int = 0,
+    ) -> int:
+        """
+        Return the index of the oldest history message that fits in the budget
+        left after `reserved`. Everything before that index is evicted.
+        """
+        remaining = self.budget - reserved
+        start = len(history)
+        for index in range(len(history) - 1, -1, -1):
+            remaining -= self.cost(history[index].message)
+            if remaining < 0:
+                break
+            start = index
+
+        # never open the window with an assistant reply to an evicted question
+        while start < len(history) and history[start].role == MessageType.ASSISTANT:
+            start += 1
+        return start
+
+    def build(
+        self,
+        pinned: List[Dict[str, Any]],
+        history: Sequence[ChatMessage],
+        new_message: Dict[str, Any],
+        keep_from: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return the message payload and the number of evicted history messages.
+        With `keep_from` the window keeps starting there while it fits.
+        """
+        reserved = sum(self.cost(m["content"]) for m in pinned)
+        reserved += self.cost(new_message["content"])
+        if keep_from is None:
+            start = self.select(history, reserved)
+        else:
+            keep_from = min(keep_from, len(history))
+            used = reserved + sum(self.cost(m.message) for m in history[keep_from:])
+            start = keep_from
+            if used > self.budget:
+                slack = int(self.budget * (1 - self.low_water))
+                start = max(keep_from, self.select(history, reserved + slack))
+        payload = [
+            *pinned,
+            *({"role": m.role.value, "content": m.message} for m in history[start:]),
+            new_message,
+        ]
+        return payload, start
+
+
+def get_history_window(llm_model: str) -> HistoryWindow:
+    cfg = get_cfg()
+    model = getattr(llm_model, "value", llm_model)
+    budget = cfg.llm_history_budgets.get(model, cfg.llm_history_default_budget)
+    return HistoryWindow(
+        budget,
+        unit=cfg.llm_history_budget_unit,
+        chars_per_token=cfg.llm_history_chars_per_token,
+        low_water=cfg.llm_history_low_water,
+    )
+
+
+def summary_message(communication: LiveCommunication) -> List[Dict[str, Any]]:
+    if not communication.history_summary:
+        return []
+    return [
+        {
+            "role": "system",
+            "content": f"Summary of the earlier conversation: {communication.history_summary}",
+        }
+    ]
+
+
+def schedule_summary(
+    communication: LiveCommunication,
+    llm_client: OllamaClient,
+    evicted: int,
+    llm_model: str,
+):
+    """
+    Fold the first `evicted` messages of the unsummarized history into the
+    rolling summary in the background. Only one summary runs per session.
+    """
+    if communication.summary_task is not None and not communication.summary_task.done():
+        return
+
+    communication.summary_task = asyncio.create_task(
+        _summarize(communication, llm_client, evicted, llm_model)
+    )
+
+
+async def _summarize(
+    communication: LiveCommunication,
+    llm_client: OllamaClient,
+    evicted: int,
+    llm_model: str,
+):
+    history = communication.chat_history
+    start = communication.summary_upto
+    transcript = "\n".join(
+        f"{m.role.value}: {m.message}" for m in history[start : start + evicted]
+    )
+    prompt = get_summary_prompt(communication.history_summary or "", transcript)
+    try:
+        summary = await llm_client.chat(
+            [{"role": "user", "content": prompt}],
+            llm_model,
+            session=str(communication.config.id),
+            priority=Priority.background,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to summarize evicted history: {e}")
+        return
+
+    # history may have been cleared while the summary was generated
+    if communication.chat_history is not history:
+        return
+    communication.history_summary = summary.strip()
+    communication.summary_upto = start + evicted
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from loguru import logger
+from starlette.requests import HTTPConnection
+
+from ..config import Config
+from ..utils import metrics
+from .response_cache import ResponseCache
+from .scheduler import LLMScheduler, Priority
+
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+
+class OllamaClient:
+    """
+    Asyncio client for the Ollama HTTP API.
+
+    A single instance is created in the app lifespan and shared by every
+    session, so turns reuse pooled keep-alive connections instead of paying
+    TCP setup on each request. Sessions that opt in reuse complete replies
+    from `response_cache`. With a `scheduler`, every chat request first
+    waits for admission and may be shed with `LLMBusyError`; the slot is
+    held by the stream and released as soon as the stream is closed.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 120,
+        connect_timeout: float = 10,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        keep_alive: Optional[str] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        self.scheduler = scheduler
+        self.response_cache = response_cache
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    @classmethod
+    def from_config(
+        cls, cfg: Config, response_cache: Optional[ResponseCache] = None
+    ) -> "OllamaClient":
+        return cls(
+            cfg.llm_url,
+            timeout=cfg.llm_timeout,
+            connect_timeout=cfg.llm_connect_timeout,
+            max_connections=cfg.llm_max_connections,
+            max_keepalive_connections=cfg.llm_max_keepalive_connections,
+            keepalive_expiry=cfg.llm_keepalive_expiry,
+            max_retries=cfg.llm_max_retries,
+            retry_backoff=cfg.llm_retry_backoff,
+            keep_alive=cfg.llm_keep_alive,
+            scheduler=LLMScheduler.from_config(cfg),
+            response_cache=response_cache,
+        )
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        options: Optional[Dict[str, Any]] = None,
+        session: str = "",
+        priority: Priority = Priority.interactive,
+        cache: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Yield content deltas from `/api/chat` as they arrive. With `cache`
+        and a `response_cache`, an identical earlier request is replayed and
+        a completed reply is stored in it. Replays never reach Ollama, so
+        they skip the scheduler's admission and are never shed.
+
+        Iterate the stream inside `contextlib.aclosing`: a consumer that is
+        cancelled then closes the request and frees its scheduler slot right
+        away instead of when the generator is garbage collected.
+        """
+        response_cache = self.response_cache if cache else None
+        key = None
+        if response_cache is not None:
+            key = response_cache.make_key(model, options, messages)
+            cached = response_cache.get(key)
+            metrics.LLM_RESPONSE_CACHE.inc(model=model, result="miss" if cached is None else "hit")
+            if cached is not None:
+                for delta in cached:
+                    yield delta
+                return
+
+        deltas = []
+        async with aclosing(
+            self._admitted_stream(messages, model, options, session, priority)
+        ) as stream:
+            async for delta in stream:
+                deltas.append(delta)
+                yield delta
+        # only complete replies are stored, never cancelled or failed ones
+        if key is not None:
+            response_cache.put(key, deltas)
+
+    async def _admitted_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        options: Optional[Dict[str, Any]],
+        session: str,
+        priority: Priority,
+    ) -> AsyncIterator[str]:
+        if self.scheduler is None:
+            async with aclosing(self._stream_chat(messages, model, options)) as stream:
+                async for delta in stream:
+                    yield delta
+            return
+        async with self.scheduler.slot(model, session, priority):
+            async with aclosing(self._stream_chat(messages, model, options)) as stream:
+                async for delta in stream:
+                    yield delta
+
+    async def _stream_chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        payload: Dict[str, Any] = {"model": model, "messages": messages}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if options:
+            payload.update(options)
+
+        start = time.perf_counter()
+        first_delta = True
+        metrics.INFLIGHT_LLM_REQUESTS.inc()
+        try:
+            async with self._open_stream("/api/chat", payload) as response:
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data: Dict[str, Any] = json.loads(line)
+
+                    if data.get("message"):
+                        delta = data.get("message").get("content")
+                        if delta:
+                            if first_delta:
+                                first_delta = False
+                                metrics.LLM_TTFT_SECONDS.observe(
+                                    time.perf_counter() - start, model=model
+                                )
+                            yield delta
+                    if data.get("done", False):
+                        _observe_generation_rate(data, model)
+                        break
+            metrics.LLM_SECONDS.observe(time.perf_counter() - start, model=model)
+
+        except httpx.ConnectError as e:
+            metrics.LLM_ERRORS.inc(model=model)
+            logger.error(f"Failed to connect to LLM service at {self.base_url}. Error: {str(e)}")
+            raise Exception(f"LLM service is not available. Please check if it's running at {self.base_url}")
+
+        except httpx.TimeoutException:
+            metrics.LLM_ERRORS.inc(model=model)
+            logger.error(f"Request to LLM service timed out. URL: {self.base_url}")
+            raise Exception("LLM service request timed out. Please try again.")
+
+        except httpx.HTTPError as e:
+            metrics.LLM_ERRORS.inc(model=model)
+            logger.error(f"Error making request to LLM service: {str(e)}")
+            raise Exception("Error communicating with LLM service. Please try again.")
+
+        finally:
+            metrics.INFLIGHT_LLM_REQUESTS.dec()
+
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        options: Optional[Dict[str, Any]] = None,
+        session: str = "",
+        priority: Priority = Priority.interactive,
+        cache: bool = False,
+    ) -> str:
+        async with aclosing(
+            self.stream_chat(messages, model, options, session, priority, cache)
+        ) as stream:
+            return "".join([delta async for delta in stream])
+
+    async def load_model(self, model: str, keep_alive: Optional[str] = None):
+        """Load `model` into memory without generating anything"""
+        payload: Dict[str, Any] = {"model": model}
+        keep_alive = keep_alive if keep_alive is not None else self.keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        response = await self._client.post("/api/generate", json=payload)
+        response.raise_for_status()
+
+    async def unload_model(self, model: str):
+        response = await self._client.post("/api/generate", json={"model": model, "keep_alive": 0})
+        response.raise_for_status()
+
+    async def running_models(self) -> List[str]:
+        """Names of the models Ollama currently holds in memory"""
+        response = await self._client.get("/api/ps")
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _open_stream(self, path: str, payload: Dict[str, Any]):
+        return _RetryingStream(self, path, payload)
+
+
+def _observe_generation_rate(data: Dict[str, Any], model: str):
+    # the final chunk carries Ollama's own token count and timing, in ns
+    eval_count = data.get("eval_count")
+    eval_duration = data.get("eval_duration")
+    if eval_count and eval_duration:
+        metrics.LLM_TOKENS_PER_SECOND.observe(eval_count / (eval_duration / 1e9), model=model)
+
+
+class _RetryingStream:
+    """
+    Opens a streaming POST, retrying connection failures and 5xx responses
+    with exponential backoff. Retries only happen before any content has
+    been read, so a partially consumed reply is never replayed.
+    """
+
+    def __init__(self, client: OllamaClient, path: str, payload: Dict[str, Any]):
+        self._client = client
+        self._path = path
+        self._payload = payload
+        self._response: Optional[httpx.Response] = None
+
+    async def __aenter__(self) -> httpx.Response:
+        http = self._client._client
+        attempt = 0
+        while True:
+            try:
+                request = http.build_request("POST", self._path, json=self._payload)
+                response = await http.send(request, stream=True)
+                if (
+                    response.status_code in RETRY_STATUS_CODES
+                    and attempt < self._client.max_retries
+                ):
+                    await response.aclose()
+                else:
+                    response.raise_for_status()
+                    self._response = response
+                    return response
+            except httpx.HTTPStatusError:
+                await response.aclose()
+                raise
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= self._client.max_retries:
+                    raise
+
+            await asyncio.sleep(self._client.retry_backoff * (2**attempt))
+            attempt += 1
+
+    async def __aexit__(self, *exc_info):
+        if self._response is not None:
+            await self._response.aclose()
+
+
+def get_llm_client(connection: HTTPConnection) -> OllamaClient:
+    return connection.app.state.clients.llm
@@ -1,23 +1,35 @@
 import asyncio
 import base64
-import json
-import random
-import requests
-from typing import Any, Callable, Dict, List
+import itertools
+import time
+from contextlib import aclosing
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
+from bson import ObjectId
 from google.cloud import speech_v1, texttospeech
 from loguru import logger
-from pymongo import database
 
-from ..ai.prompts import (
-    get_prompt,
-    processing_query_fillers,
-)
-from ..crud.chat_crud import add_many_messages
+from ..ai.history import get_history_window, schedule_summary, summary_message
+from ..ai.ollama import OllamaClient
+from ..ai.prompts import get_prompt, get_system_prompt
+from ..ai.scheduler import LLMBusyError
+from ..ai.sentences import SentenceChunker, split_for_tts
+from ..config import get_cfg
+from ..crud.chat_writer import ChatWriter
 from ..models.chat import ChatMessage
 from ..models.communication import LiveCommunication
+from ..utils import metrics
 from ..utils.audio import transcribe_audio, text_to_speech
-from ..utils.types import MessageType, SendBotMessage
+from ..utils.codecs import (
+    LEGACY_INPUT_FORMAT,
+    AudioFormat,
+    join_audio,
+    negotiate_input,
+    negotiate_output,
+)
+from ..utils.speech_engines import STT_ENGINE_CLASSES, TTS_ENGINE_CLASSES
+from ..utils.tts_cache import TTSCache
+from ..utils.types import MessageType, SendBotMessage, STTEngine, TTSEngine
 
 
 def is_question(text: str) -> bool:
@@ -42,281 +54,286 @@ def is_question(text: str) -> bool:
     ) and len(text.split()) > 5
 
 
-def process_user_audio(
-    db: database.Database,
-    communication: LiveCommunication,
-    base64_audio: str,
-    s2t_client: speech_v1.SpeechClient,
-    t2s_client: texttospeech.TextToSpeechClient,
-    llm_url: str,
-    send_message: Callable,
-):
-    # return
-    audio_bytes = base64.b64decode(base64_audio)
-    transcript = transcribe_audio(audio_bytes, s2t_client)
-    if transcript is None or transcript.strip() == "":
-        # Return a prompt asking the user to say something
-        prompt = "I'm listening. What would you like to know?"
-        audio = text_to_speech(
-            prompt,
-            t2s_client,
-            communication.config.voice_language_code,
-            communication.config.voice_gender,
-        )
-        return {"audio": audio, "text": prompt, "user_query": "", "fixed_prompt": ""}
+async def process_request(
+    llm_client: OllamaClient,
+    message_history: List[Dict[str, Any]],
+    llm_model: str,
+    session: str = "",
+    cache: bool = False,
+) -> str:
+    return await llm_client.chat(message_history, llm_model, session=session, cache=cache)
 
-    # Process all text with LLM (no more question filtering)
 
-    user_message = ChatMessage(
-        communication_id=communication.config.id,
-        role=MessageType.USER,
-        message=transcript,
-    )
+async def stream_response(
+    llm_client: OllamaClient,
+    message_history: List[Dict[str, Any]],
+    llm_model: str,
+    turn_id: str,
+    send_message: Callable[..., Awaitable],
+    stream_text: bool = True,
+    synthesize: Optional[Callable[[str], Awaitable[bytes]]] = None,
+    audio_encoding: Optional[str] = None,
+    session: str = "",
+    cache: bool = False,
+) -> Tuple[str, int]:
+    """
+    Consume the LLM stream and return the full reply together with the number
+    of audio chunks sent.
+
+    With `stream_text` every delta is forwarded with `send_message` while the
+    model is still generating. With `synthesize` the reply is cut at sentence
+    boundaries and every sentence is synthesized by a background task as soon
+    as it is complete, so TTS of earlier sentences overlaps generation of later
+    ones. Audio chunks are sent in order with a per-turn sequence number.
+    """
+    llm_response = ""
+    chunker = SentenceChunker()
+    audio_seq = itertools.count()
+    sentences: asyncio.Queue = asyncio.Queue()
+
+    async def tts_worker():
+        # a single consumer keeps the chunks in sentence order
+        while (item := await sentences.get()) is not None:
+            seq, sentence = item
+            await _send_audio_chunk(
+                synthesize, sentence, turn_id, seq, send_message, audio_encoding
+            )
+
+    def speak(sentence: str):
+        sentences.put_nowait((next(audio_seq), sentence))
+
+    worker = asyncio.create_task(tts_worker()) if synthesize else None
     try:
-        message_payload = [
-            {
-                "role": m.role.value,
-                "content": m.message,
-            }
-            for m in communication.chat_history
-        ]
-        message_payload.append(
-            {
-                "role": user_message.role.value,
-                "content": get_prompt(user_message.message, communication.custom_prompt_suffix or ""),
-            }
-        )
-        print(f"➡️ Sending to LLM: '{user_message.message}' with suffix: '{communication.custom_prompt_suffix}'")
-        chat_url = f"{llm_url}/api/chat"
-        llm_response = process_request(
-            message_payload,
-            chat_url,
-            communication.config.llm_model,
-            communication.custom_prompt_suffix or "",
-        )
-        print(f"User query: {user_message.message}")
-        print(f"Fixed prompt: {communication.custom_prompt_suffix}")
-        print(f"LLM response: {llm_response}")
-        bot_message = ChatMessage(
-            communication_id=communication.config.id,
-            role=MessageType.ASSISTANT,
-            message=llm_response,
-            llm_model=communication.config.llm_model,
-        )
-        new_messages = [user_message, bot_message]
-        communication.chat_history.extend(new_messages)
-        add_many_messages(db, new_messages)
-        tts_input = llm_response.encode("utf-8")[:4900].decode("utf-8", errors="ignore")
-        audio = text_to_speech(
-            tts_input,
-            t2s_client,
-            communication.config.voice_language_code,
-            communication.config.voice_gender,
-        )
-        return {
-            "audio": audio,
-            "text": llm_response,
-            "user_query": user_message.message,
-            "fixed_prompt": communication.custom_prompt_suffix or ""
-        }
-    except Exception as e:
-        logger.exception(e)
-        return {"audio": "", "text": "", "user_query": "", "fixed_prompt": ""}
+        seq = 0
+        # closing the stream on cancellation releases the LLM slot before the turn ends
+        async with aclosing(
+            llm_client.stream_chat(message_history, llm_model, session=session, cache=cache)
+        ) as stream:
+            async for delta in stream:
+                llm_response += delta
+                if stream_text:
+                    await send_message(
+                        SendBotMessage.TEXT_DELTA,
+                        {"turn_id": turn_id, "seq": seq, "delta": delta},
+                    )
+                seq += 1
+                if worker:
+                    for sentence in chunker.feed(delta):
+                        speak(sentence)
 
+        if stream_text:
+            await send_message(
+                SendBotMessage.TEXT_DONE,
+                {"turn_id": turn_id, "content": llm_response},
+            )
+        if worker:
+            for sentence in chunker.flush() or []:
+                speak(sentence)
+            sentences.put_nowait(None)
+            await worker
+    finally:
+        if worker and not worker.done():
+            worker.cancel()
 
-def process_user_text(
-    db: database.Database,
-    communication: LiveCommunication,
-    text: str,
-    t2s_client: texttospeech.TextToSpeechClient,
-    llm_url: str,
-    send_message: Callable,
+    return llm_response, next(audio_seq)
+
+
+async def _send_audio_chunk(
+    synthesize: Callable[[str], Awaitable[bytes]],
+    sentence: str,
+    turn_id: str,
+    seq: int,
+    send_message: Callable[..., Awaitable],
+    encoding: Optional[str] = None,
 ):
-    # Process all text with LLM (no more question filtering)
-    user_message = ChatMessage(
-        communication_id=communication.config.id,
-        role=MessageType.USER,
-        message=text,
-    )
     try:
-        message_payload = [
-            {
-                "role": m.role.value,
-                "content": m.message,
-            }
-            for m in communication.chat_history
-        ]
-        message_payload.append(
-            {
-                "role": user_message.role.value,
-                #"content": f"{communication.custom_prompt_suffix or ''}\n{user_message.message}",
-                "content": get_prompt(user_message.message, communication.custom_prompt_suffix or "")
-            }
-        )
-        print("Applying suffix:", communication.custom_prompt_suffix),
-        chat_url = f"{llm_url}/api/chat"
-        llm_response = process_request(
-            message_payload,
-            chat_url,
-            communication.config.llm_model.value,
-            communication.custom_prompt_suffix or "",
-        )
-        # print("LLM response:", llm_response)
-        print(f"User query: {user_message.message}")
-        print(f"Fixed prompt: {communication.custom_prompt_suffix}")
-        print(f"LLM response: {llm_response}")
-        bot_message = ChatMessage(
-            communication_id=communication.config.id,
-            role=MessageType.ASSISTANT,
-            message=llm_response,
-            llm_model=communication.config.llm_model,
-        )
-        new_messages = [user_message, bot_message]
-        communication.chat_history.extend(new_messages)
-        add_many_messages(db, new_messages)
-        if len(llm_response.encode("utf-8")) > 4900:
-            logger.warning("🔇 TTS input exceeded 4900 bytes, truncating for safety.")
-        tts_input = llm_response.encode("utf-8")[:4900].decode("utf-8", errors="ignore")
-        audio = text_to_speech(
-            tts_input,
-            t2s_client,
-            communication.config.voice_language_code,
-            communication.config.voice_gender,
-        )
-        return {
-            "audio": audio,
-            "text": llm_response,
-            "user_query": user_message.message,
-            "fixed_prompt": communication.custom_prompt_suffix or ""
-        }
+        audio = await synthesize(sentence)
     except Exception as e:
         logger.exception(e)
-        return {"audio": "", "text": "", "user_query": "", "fixed_prompt": ""}
-
+        audio = b""
+    await send_message(
+        SendBotMessage.AUDIO_CHUNK,
+        {
+            "turn_id": turn_id,
+            "seq": seq,
+            "content": sentence,
+            "response": audio,
+            "encoding": encoding,
+        },
+    )
 
-def process_request(
-    message_history: List[Dict[str, Any]],
-    chat_url: str,
-    llm_model: str,
-    custom_prompt_suffix: str,
-) -> str:
-    # print("\n========== Prompt Sent to LLM ==========")
-    # print("Model:", llm_model)
-    # print("URL:", chat_url)
-    # print("Full Payload:\n", json.dumps(message_history, indent=2))
-    #print("Custom Prompt Suffix:", custom_prompt_suffix)
-    #print("========================================\n")
 
-    try:
-        # Configure retry strategy
-        retry_strategy = requests.adapters.Retry(
-            total=3,  # number of retries
-            backoff_factor=0.5,  # wait 0.5, 1, 2 seconds between retries
-            status_forcelist=[500, 502, 503, 504]  # retry on these status codes
+async def synthesize_long_text(
+    text: str,
+    t2s_client: texttospeech.TextToSpeechClient,
+    language_code: str,
+    gender: str,
+    engine: TTSEngine = TTSEngine.google,
+    encoding: Optional[str] = None,
+    tts_cache: Optional[TTSCache] = None,
+) -> bytes:
+    """
+    Synthesize text of any length. For engines with a request size limit the
+    text is split into pieces and the resulting audio is joined.
+    """
+    engine_class = TTS_ENGINE_CLASSES[TTSEngine(engine)]
+    encoding = encoding or engine_class.encodings[0]
+    max_input_bytes = engine_class.max_input_bytes
+    pieces = split_for_tts(text, max_input_bytes) if max_input_bytes else [text]
+    if len(pieces) == 1:
+        return await asyncio.to_thread(
+            text_to_speech, text, t2s_client, language_code, gender, engine, encoding, tts_cache
         )
-        
-        # Create a session with the retry strategy
-        session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-
-        # Make the request with timeout
-        response = session.post(
-            chat_url,
-            json={
-                "model": llm_model,
-                "messages": message_history,
-            },
-            stream=True,
-            timeout=120  # 120 seconds timeout
+
+    audio = await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                text_to_speech,
+                piece,
+                t2s_client,
+                language_code,
+                gender,
+                engine,
+                encoding,
+                tts_cache,
+            )
+            for piece in pieces
         )
+    )
+    return join_audio(list(audio), encoding)
 
-        response.raise_for_status()  # Raise an error for bad status codes
 
-        llm_response = ""
-        chunk: bytes
-        for chunk in response.iter_lines():
-            if chunk:
-                chunk = chunk.decode("utf-8")
-                data: Dict[str, Any] = json.loads(chunk)
+def output_encoding(communication: LiveCommunication) -> str:
+    """Encoding of the session's reply audio, negotiated with the connected bot"""
+    return negotiate_output(
+        communication.bot_output_formats,
+        TTS_ENGINE_CLASSES[TTSEngine(communication.config.tts_engine)].encodings,
+        get_cfg().tts_output_encodings,
+    )
 
-                if data.get("message"):
-                    llm_response += data.get("message").get("content")
-                if data.get("done", False):
-                    break
 
-        return llm_response
+def input_format(communication: LiveCommunication) -> Optional[AudioFormat]:
+    """Format the connected bot should record in, None when it did not negotiate"""
+    return negotiate_input(
+        communication.bot_input_formats,
+        STT_ENGINE_CLASSES[STTEngine(communication.config.stt_engine)].encodings,
+        get_cfg().stt_input_encodings,
+    )
 
-    except requests.exceptions.ConnectionError as e:
-        logger.error(f"Failed to connect to LLM service at {chat_url}. Error: {str(e)}")
-        raise Exception(f"LLM service is not available. Please check if it's running at {chat_url}")
-    
-    except requests.exceptions.Timeout as e:
-        logger.error(f"Request to LLM service timed out. URL: {chat_url}")
-        raise Exception("LLM service request timed out. Please try again.")
-    
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error making request to LLM service: {str(e)}")
-        raise Exception("Error communicating with LLM service. Please try again.")
 
+def accepts_input(communication: LiveCommunication, encoding: str) -> bool:
+    """Whether the session's STT engine and the server take audio in `encoding`"""
+    return (
+        encoding in STT_ENGINE_CLASSES[STTEngine(communication.config.stt_engine)].encodings
+        and encoding in get_cfg().stt_input_encodings
+    )
 
-def process_user_audio_with_llm(
-    db: database.Database,
+
+async def process_user_audio_with_llm(
+    chat_writer: ChatWriter,
     communication: LiveCommunication,
-    base64_audio: str,
+    audio: Union[str, bytes],
     s2t_client: speech_v1.SpeechClient,
     t2s_client: texttospeech.TextToSpeechClient,
-    llm_url: str,
-    send_message: Callable,
+    llm_client: OllamaClient,
+    send_message: Callable[..., Awaitable],
+    audio_format: AudioFormat = LEGACY_INPUT_FORMAT,
+    tts_cache: Optional[TTSCache] = None,
 ):
-    """Process user audio directly with LLM - no filler logic"""
-    audio_bytes = base64.b64decode(base64_audio)
-    transcript = transcribe_audio(audio_bytes, s2t_client)
-    
+    """
+    Process user audio directly with LLM - no filler logic. `audio` is raw
+    bytes from a binary frame or base64 from a JSON message, recorded in
+    `audio_format`.
+    """
+    audio_bytes = base64.b64decode(audio) if isinstance(audio, str) else audio
+    transcript = await asyncio.to_thread(
+        transcribe_audio,
+        audio_bytes,
+        s2t_client,
+        communication.config.stt_language_code,
+        communication.config.stt_engine,
+        audio_format,
+    )
+    return await process_user_transcript_with_llm(
+        chat_writer, communication, transcript, t2s_client, llm_client, send_message, tts_cache
+    )
+
+
+async def process_user_transcript_with_llm(
+    chat_writer: ChatWriter,
+    communication: LiveCommunication,
+    transcript: Optional[str],
+    t2s_client: texttospeech.TextToSpeechClient,
+    llm_client: OllamaClient,
+    send_message: Callable[..., Awaitable],
+    tts_cache: Optional[TTSCache] = None,
+):
+    """Process an already recognized utterance with LLM"""
     if transcript is None or transcript.strip() == "":
         # Return a prompt asking the user to say something
         prompt = "I'm listening. What would you like to know?"
-        audio = text_to_speech(
+        encoding = output_encoding(communication)
+        audio = await asyncio.to_thread(
+            text_to_speech,
             prompt,
             t2s_client,
             communication.config.voice_language_code,
             communication.config.voice_gender,
+            communication.config.tts_engine,
+            encoding,
+            tts_cache,
         )
-        return {"audio": audio, "text": prompt, "user_query": "", "fixed_prompt": ""}
+        return {
+            "audio": audio,
+            "text": prompt,
+            "user_query": "",
+            "fixed_prompt": "",
+            "encoding": encoding,
+        }
 
     # Process with LLM directly
-    return _process_with_llm(
-        db, communication, transcript, t2s_client, llm_url
+    return await _process_with_llm(
+        chat_writer, communication, transcript, t2s_client, llm_client, send_message, tts_cache
     )
 
 
-def process_user_text_with_llm(
-    db: database.Database,
+async def process_user_text_with_llm(
+    chat_writer: ChatWriter,
     communication: LiveCommunication,
     text: str,
     t2s_client: texttospeech.TextToSpeechClient,
-    llm_url: str,
-    send_message: Callable,
+    llm_client: OllamaClient,
+    send_message: Callable[..., Awaitable],
+    tts_cache: Optional[TTSCache] = None,
 ):
     """Process user text directly with LLM - no filler logic"""
     if not text or text.strip() == "":
         return None
         
     # Process with LLM directly
-    return _process_with_llm(
-        db, communication, text, t2s_client, llm_url
+    return await _process_with_llm(
+        chat_writer, communication, text, t2s_client, llm_client, send_message, tts_cache
     )
 
 
-def _process_with_llm(
-    db: database.Database,
+async def _process_with_llm(
+    chat_writer: ChatWriter,
     communication: LiveCommunication,
     user_input: str,
     t2s_client: texttospeech.TextToSpeechClient,
-    llm_url: str,
+    llm_client: OllamaClient,
+    send_message: Optional[Callable[..., Awaitable]] = None,
+    tts_cache: Optional[TTSCache] = None,
 ):
     """Common LLM processing logic"""
+    turn_id = str(ObjectId())
+    turn_start = time.perf_counter()
+    turn_labels = {
+        "model": communication.config.llm_model,
+        "voice": metrics.voice_label(
+            communication.config.voice_language_code, communication.config.voice_gender
+        ),
+    }
     user_message = ChatMessage(
         communication_id=communication.config.id,
         role=MessageType.USER,
@@ -324,32 +341,74 @@ def _process_with_llm(
     )
     
     try:
-        message_payload = [
-            {
-                "role": m.role.value,
-                "content": m.message,
-            }
-            for m in communication.chat_history
-        ]
-        message_payload.append(
-            {
-                "role": user_message.role.value,
-                "content": get_prompt(user_input, communication.custom_prompt_suffix or ""),
-            }
-        )
+        window = get_history_window(communication.config.llm_model)
+        history = communication.chat_history[communication.summary_upto :]
+        if get_cfg().llm_prompt_layout == "stable_prefix":
+            system_prompt = get_system_prompt(communication.custom_prompt_suffix or "")
+            pinned = [{"role": "system", "content": system_prompt}] if system_prompt else []
+            message_payload, evicted = window.build(
+                pinned + summary_message(communication),
+                history,
+                {"role": user_message.role.value, "content": user_input},
+                keep_from=max(0, communication.window_start - communication.summary_upto),
+            )
+            communication.window_start = communication.summary_upto + evicted
+        else:
+            message_payload, evicted = window.build(
+                summary_message(communication),
+                history,
+                {
+                    "role": user_message.role.value,
+                    "content": get_prompt(user_input, communication.custom_prompt_suffix or ""),
+                },
+            )
+        if evicted and get_cfg().llm_history_summary_enabled:
+            schedule_summary(
+                communication, llm_client, evicted, communication.config.llm_model
+            )
         
-        print(f"➡️ Sending to LLM: '{user_input}' with suffix: '{communication.custom_prompt_suffix}'")
-        chat_url = f"{llm_url}/api/chat"
-        llm_response = process_request(
-            message_payload,
-            chat_url,
-            communication.config.llm_model,
-            communication.custom_prompt_suffix or "",
+        logger.debug(
+            f"Sending to LLM: '{user_input}' with suffix: '{communication.custom_prompt_suffix}'"
         )
+        config = communication.config
+        chunked_audio = config.chunked_audio and send_message is not None
+        encoding = output_encoding(communication)
+        if (config.stream_response or chunked_audio) and send_message is not None:
+
+            async def synthesize_sentence(sentence: str) -> bytes:
+                return await asyncio.to_thread(
+                    text_to_speech,
+                    sentence,
+                    t2s_client,
+                    config.voice_language_code,
+                    config.voice_gender,
+                    config.tts_engine,
+                    encoding,
+                    tts_cache,
+                )
+
+            llm_response, audio_chunks = await stream_response(
+                llm_client,
+                message_payload,
+                config.llm_model,
+                turn_id,
+                send_message,
+                stream_text=config.stream_response,
+                synthesize=synthesize_sentence if chunked_audio else None,
+                audio_encoding=encoding,
+                session=str(config.id),
+                cache=config.response_cache_enabled,
+            )
+        else:
+            llm_response = await process_request(
+                llm_client,
+                message_payload,
+                config.llm_model,
+                session=str(config.id),
+                cache=config.response_cache_enabled,
+            )
         
-        print(f"User query: {user_input}")
-        print(f"Fixed prompt: {communication.custom_prompt_suffix}")
-        print(f"LLM response: {llm_response}")
+        logger.debug(f"LLM response to '{user_input}': {llm_response}")
         
         bot_message = ChatMessage(
             communication_id=communication.config.id,
@@ -360,26 +419,87 @@ def _process_with_llm(
         
         new_messages = [user_message, bot_message]
         communication.chat_history.extend(new_messages)
-        add_many_messages(db, new_messages)
+        await chat_writer.submit(new_messages)
         
+        if chunked_audio:
+            # audio was already delivered sentence by sentence
+            await send_message(
+                SendBotMessage.AUDIO_END,
+                {
+                    "turn_id": turn_id,
+                    "chunks": audio_chunks,
+                    "content": llm_response,
+                    "user_query": user_input,
+                    "fixed_prompt": communication.custom_prompt_suffix or "",
+                },
+            )
+            metrics.TURN_SECONDS.observe(time.perf_counter() - turn_start, **turn_labels)
+            metrics.TURNS.inc(**turn_labels)
+            return {
+                "audio": None,
+                "text": llm_response,
+                "user_query": user_input,
+                "fixed_prompt": communication.custom_prompt_suffix or "",
+                "turn_id": turn_id,
+                "chunked": True,
+            }
+
         # Generate TTS for the response
-        if len(llm_response.encode("utf-8")) > 4900:
-            logger.warning("🔇 TTS input exceeded 4900 bytes, truncating for safety.")
-        tts_input = llm_response.encode("utf-8")[:4900].decode("utf-8", errors="ignore")
-        audio = text_to_speech(
-            tts_input,
+        audio = await synthesize_long_text(
+            llm_response,
             t2s_client,
             communication.config.voice_language_code,
             communication.config.voice_gender,
+            communication.config.tts_engine,
+            encoding,
+            tts_cache,
         )
+        metrics.TURN_SECONDS.observe(time.perf_counter() - turn_start, **turn_labels)
+        metrics.TURNS.inc(**turn_labels)
         
         return {
             "audio": audio,
             "text": llm_response,
             "user_query": user_input,
-            "fixed_prompt": communication.custom_prompt_suffix or ""
+            "fixed_prompt": communication.custom_prompt_suffix or "",
+            "turn_id": turn_id,
+            "encoding": encoding,
         }
-        
+
+    except LLMBusyError as e:
+        logger.warning(f"LLM busy, turn shed: {e}")
+        return await _busy_reply(communication, t2s_client, user_input, turn_id, tts_cache)
+
     except Exception as e:
         logger.exception(e)
-        return None
\ No newline at end of file
+        return None
+
+
+async def _busy_reply(
+    communication: LiveCommunication,
+    t2s_client: texttospeech.TextToSpeechClient,
+    user_input: str,
+    turn_id: str,
+    tts_cache: Optional[TTSCache] = None,
+) -> Dict[str, Any]:
+    """Spoken apology for a shed turn, usually served from the prewarmed TTS cache"""
+    phrase = get_cfg().llm_busy_phrase
+    encoding = output_encoding(communication)
+    audio = await synthesize_long_text(
+        phrase,
+        t2s_client,
+        communication.config.voice_language_code,
+        communication.config.voice_gender,
+        communication.config.tts_engine,
+        encoding,
+        tts_cache,
+    )
+    return {
+        "audio": audio,
+        "text": phrase,
+        "user_query": user_input,
+        "fixed_prompt": communication.custom_prompt_suffix or "",
+        "turn_id": turn_id,
+        "encoding": encoding,
+        "busy": True,
+    }
\ No newline at end of file
@@ -1,6 +1,22 @@
 def get_prompt(user_input: str, initial_prompt_suffix: str) -> str:
     return f"{initial_prompt_suffix}\nUser: {user_input}\nAssistant:"
 
+
+def get_system_prompt(prompt_suffix: str) -> str:
+    # stable prefix layout: the fixed instructions are sent once, ahead of the history
+    return prompt_suffix.strip()
+
+
+def get_summary_prompt(previous_summary: str, transcript: str) -> str:
+    return (
+        "Summarize the conversation below between a user and an assistant in a few "
+        "sentences. Keep names, facts and open questions, leave out small talk.\n"
+        f"Earlier summary: {previous_summary or 'none'}\n"
+        f"Conversation:\n{transcript}\n"
+        "Summary:"
+    )
+
+
 processing_query_fillers = [
     "Hmm, let me see...",
     "Let me think about this for a bit.",
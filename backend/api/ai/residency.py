@@ -0,0 +1,139 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Set
+
+import httpx
+from loguru import logger
+from starlette.requests import HTTPConnection
+
+from ..config import Config
+from .ollama import OllamaClient
+
+
+class ModelResidency:
+    """
+    Keeps the models live sessions use loaded in Ollama.
+
+    Models are preloaded when a communication is created, restored or
+    switches model, so the first turn does not pay the cold load. At most
+    `max_resident` models are kept: making room unloads the least recently
+    loaded model no live session uses, and a model in use is never unloaded,
+    so concurrent sessions on different models do not evict each other.
+    A background task follows Ollama's own unloads and reloads models that
+    are still in use.
+    """
+
+    def __init__(
+        self,
+        llm_client: OllamaClient,
+        in_use: Callable[[], Set[str]],
+        max_resident: int = 2,
+        refresh_interval: float = 30,
+    ):
+        self.llm_client = llm_client
+        self.in_use = in_use
+        self.max_resident = max_resident
+        self.refresh_interval = refresh_interval
+        # resident model -> time it was loaded
+        self.resident: Dict[str, float] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(
+        cls,
+        llm_client: OllamaClient,
+        in_use: Callable[[], Set[str]],
+        cfg: Config,
+    ) -> "ModelResidency":
+        return cls(
+            llm_client,
+            in_use,
+            max_resident=cfg.llm_max_resident_models,
+            refresh_interval=cfg.llm_residency_refresh_interval,
+        )
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        tasks = [task for task in [self._task, *self._loading.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        # let them unwind before the shared HTTP client is closed
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loading.clear()
+        self._task = None
+
+    def preload(self, model: str) -> Optional[asyncio.Task]:
+        """Start loading `model` in the background unless it is already resident"""
+        model = getattr(model, "value", model)
+        if model in self.resident:
+            return None
+        if model not in self._loading:
+            task = asyncio.create_task(self._load(model))
+            self._loading[model] = task
+            task.add_done_callback(lambda _: self._loading.pop(model, None))
+        return self._loading[model]
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "resident": list(self.resident),
+            "loading": list(self._loading),
+            "in_use": sorted(self.in_use()),
+            "max_resident": self.max_resident,
+        }
+
+    async def _load(self, model: str):
+        async with self._lock:
+            await self._make_room(model)
+            start = time.perf_counter()
+            try:
+                await self.llm_client.load_model(model)
+            except httpx.HTTPError as e:
+                logger.warning(f"Failed to preload {model}: {e}")
+                return
+            self.resident[model] = time.monotonic()
+            logger.info(f"Preloaded {model} in {time.perf_counter() - start:.1f}s")
+
+    async def _make_room(self, model: str):
+        excess = len(self.resident) + 1 - self.max_resident
+        if excess <= 0:
+            return
+        in_use = self.in_use()
+        idle = [m for m in sorted(self.resident, key=self.resident.get) if m not in in_use and m != model]
+        if len(idle) < excess:
+            logger.warning(
+                f"Loading {model} exceeds {self.max_resident} resident models, "
+                f"all of {sorted(in_use)} are in use"
+            )
+        for victim in idle[:excess]:
+            try:
+                await self.llm_client.unload_model(victim)
+                self.resident.pop(victim, None)
+                logger.info(f"Unloaded idle model {victim}")
+            except httpx.HTTPError as e:
+                logger.warning(f"Failed to unload {victim}: {e}")
+
+    async def refresh(self):
+        """Sync with the models Ollama holds and reload evicted ones still in use"""
+        try:
+            running = await self.llm_client.running_models()
+        except httpx.HTTPError as e:
+            logger.debug(f"Could not list running models: {e}")
+            return
+        now = time.monotonic()
+        self.resident = {model: self.resident.get(model, now) for model in running}
+        for model in self.in_use() - set(running):
+            self.preload(model)
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+
+def get_model_residency(connection: HTTPConnection) -> ModelResidency:
+    return connection.app.state.model_residency
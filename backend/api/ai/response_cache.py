@@ -0,0 +1,97 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.requests import HTTPConnection
+
+from ..config import Config
+
+
+class ResponseCache:
+    """
+    Cache of complete LLM replies for sessions that opt in.
+
+    Entries are keyed on a canonical hash of the model, the generation
+    options and the full message payload, so a reply is only reused for an
+    identical request. Replies are stored as their content deltas and
+    replayed through the normal streaming path. Entries expire after `ttl`
+    seconds and the least recently used are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        options: Optional[Dict[str, Any]],
+        messages: List[Dict[str, Any]],
+    ) -> str:
+        raw = json.dumps(
+            {
+                "model": getattr(model, "value", model),
+                "options": options or {},
+                "messages": messages,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=lambda value: getattr(value, "value", str(value)),
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, deltas: List[str]):
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, list(deltas))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_response_cache(cfg: Config) -> Optional[ResponseCache]:
+    """The app's reply cache, None when `llm_response_cache_enabled` is off"""
+    if not cfg.llm_response_cache_enabled:
+        return None
+    return ResponseCache(
+        max_entries=cfg.llm_response_cache_max_entries,
+        ttl=cfg.llm_response_cache_ttl,
+    )
+
+
+def get_response_cache(connection: HTTPConnection) -> Optional[ResponseCache]:
+    return connection.app.state.clients.response_cache
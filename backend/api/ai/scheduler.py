@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from ..config import Config
+from ..utils import metrics
+
+
+class Priority(IntEnum):
+    interactive = 0  # a participant is waiting for the reply
+    background = 1  # summaries and other work nobody waits on
+
+
+class LLMBusyError(Exception):
+    """The scheduler shed a request instead of letting it wait"""
+
+
+class _Waiter:
+    __slots__ = ("model", "future", "enqueued")
+
+    def __init__(self, model: str):
+        self.model = model
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.perf_counter()
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM server.
+
+    At most `max_concurrency` requests run at once, and at most the model's
+    limit from `model_concurrency` (or `default_model_concurrency`, 0 for no
+    per-model limit) per model. Waiting requests are served by priority,
+    and within a priority round-robin across sessions, so one chatty session
+    cannot starve the others. A request is shed with `LLMBusyError` when
+    `max_queue` requests already wait, or after waiting `queue_timeout`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        default_model_concurrency: int = 0,
+        max_queue: int = 32,
+        queue_timeout: float = 30,
+    ):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency or {}
+        self.default_model_concurrency = default_model_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.running_by_model: Dict[str, int] = {}
+        # priority -> session -> waiters, sessions rotate after each grant
+        self._queues: Dict[Priority, "OrderedDict[str, Deque[_Waiter]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self.queued = 0
+
+    @classmethod
+    def from_config(cls, cfg: Config) -> "LLMScheduler":
+        return cls(
+            max_concurrency=cfg.llm_max_concurrency,
+            model_concurrency=cfg.llm_model_concurrency,
+            default_model_concurrency=cfg.llm_default_model_concurrency,
+            max_queue=cfg.llm_queue_max,
+            queue_timeout=cfg.llm_queue_timeout,
+        )
+
+    def _model_limit(self, model: str) -> int:
+        return self.model_concurrency.get(model, self.default_model_concurrency)
+
+    def _has_capacity(self, model: str) -> bool:
+        if self.running >= self.max_concurrency:
+            return False
+        limit = self._model_limit(model)
+        return not limit or self.running_by_model.get(model, 0) < limit
+
+    def _grant(self, model: str):
+        self.running += 1
+        self.running_by_model[model] = self.running_by_model.get(model, 0) + 1
+
+    def _release(self, model: str):
+        self.running -= 1
+        self.running_by_model[model] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        for priority in Priority:
+            sessions = self._queues[priority]
+            for session in list(sessions):
+                if self.running >= self.max_concurrency:
+                    return
+                waiters = sessions[session]
+                # skip sessions whose next request targets a saturated model
+                if not self._has_capacity(waiters[0].model):
+                    continue
+                waiter = waiters.popleft()
+                self.queued -= 1
+                if waiters:
+                    sessions.move_to_end(session)
+                else:
+                    del sessions[session]
+                self._grant(waiter.model)
+                waiter.future.set_result(None)
+
+    def _remove(self, waiter: _Waiter, session: str, priority: Priority):
+        waiters = self._queues[priority].get(session)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self._queues[priority][session]
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        session: str = "",
+        priority: Priority = Priority.interactive,
+    ) -> AsyncIterator[None]:
+        """Hold one LLM request slot for `model` while the block runs"""
+        model = getattr(model, "value", model)
+        priority = Priority(priority)
+        labels = {"model": model, "priority": priority.name}
+        if self.queued == 0 and self._has_capacity(model):
+            self._grant(model)
+            metrics.LLM_QUEUE_SECONDS.observe(0, **labels)
+        else:
+            if self.queued >= self.max_queue:
+                metrics.LLM_SHED.inc(reason="queue_full", **labels)
+                raise LLMBusyError("LLM queue is full")
+            waiter = _Waiter(model)
+            self._queues[priority].setdefault(session, deque()).append(waiter)
+            self.queued += 1
+            # the waiters ahead may all target saturated models
+            self._dispatch()
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._remove(waiter, session, priority)
+                if not waiter.future.done():
+                    metrics.LLM_SHED.inc(reason="timeout", **labels)
+                    raise LLMBusyError("Timed out waiting for the LLM")
+            except asyncio.CancelledError:
+                self._remove(waiter, session, priority)
+                # granted just before the cancellation, hand the slot on
+                if waiter.future.done():
+                    self._release(model)
+                raise
+            metrics.LLM_QUEUE_SECONDS.observe(time.perf_counter() - waiter.enqueued, **labels)
+
+        try:
+            yield
+        finally:
+            self._release(model)
@@ -0,0 +1,88 @@
+import re
+from typing import List, Optional
+
+# Google TTS rejects inputs above 5000 bytes, keep some headroom
+MAX_TTS_BYTES = 4900
+
+# end of a sentence: terminal punctuation (optionally closed by a quote or
+# bracket) followed by whitespace, or a line break
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+|\n+")
+
+
+class SentenceChunker:
+    """
+    Collects streamed LLM deltas and hands out complete sentences as soon as
+    they are available, so they can be synthesized while generation continues.
+
+    Sentences shorter than `min_chars` are merged with the following one to
+    avoid a TTS round trip for fragments like "Sure." or list numbering.
+    """
+
+    def __init__(self, min_chars: int = 24, max_bytes: int = MAX_TTS_BYTES):
+        self.min_chars = min_chars
+        self.max_bytes = max_bytes
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self._buffer += delta
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start : match.start()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.extend(split_for_tts(candidate, self.max_bytes))
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[List[str]]:
+        tail = self._buffer.strip()
+        self._buffer = ""
+        if not tail:
+            return None
+        return split_for_tts(tail, self.max_bytes)
+
+
+def split_for_tts(text: str, max_bytes: int = MAX_TTS_BYTES) -> List[str]:
+    """
+    Split `text` into pieces that each fit in a single TTS request, breaking
+    on sentence boundaries first and on whitespace if a sentence is too long.
+    """
+    if len(text.encode("utf-8")) <= max_bytes:
+        return [text]
+
+    pieces: List[str] = []
+    current = ""
+    for part in _split_keeping_size(text, max_bytes):
+        joined = f"{current} {part}" if current else part
+        if len(joined.encode("utf-8")) <= max_bytes:
+            current = joined
+            continue
+        if current:
+            pieces.append(current)
+        current = part
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _split_keeping_size(text: str, max_bytes: int) -> List[str]:
+    parts = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence.encode("utf-8")) <= max_bytes:
+            parts.append(sentence)
+            continue
+        word_part = ""
+        for word in sentence.split():
+            joined = f"{word_part} {word}" if word_part else word
+            if len(joined.encode("utf-8")) > max_bytes and word_part:
+                parts.append(word_part)
+                joined = word
+            word_part = joined
+        if word_part:
+            parts.append(word_part)
+    return parts
@@ -0,0 +1,74 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional
+
+from loguru import logger
+
+from ..utils.types import TurnPolicy
+
+Turn = Callable[[], Awaitable[None]]
+
+
+class TurnManager:
+    """
+    Runs the turns of one session as background tasks, so the session's
+    receive loop keeps reading while a reply is generated.
+
+    What happens to an utterance that arrives while a turn is running is set
+    by the session's `TurnPolicy`: it is rejected, queued (up to `max_queue`)
+    or, with `latest`, the running turn is cancelled in its favour (barge-in).
+    Cancelling a turn closes its Ollama stream, which stops the generation,
+    and drops any sentences still waiting for TTS.
+    """
+
+    def __init__(self, max_queue: int = 3):
+        self.max_queue = max_queue
+        self.current: Optional[asyncio.Task] = None
+        self._queue: Deque[Turn] = deque()
+
+    @property
+    def busy(self) -> bool:
+        return self.current is not None and not self.current.done()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def submit(self, turn: Turn, policy: TurnPolicy) -> bool:
+        """Run, queue or reject `turn`; returns False when it was rejected"""
+        if self.busy:
+            match TurnPolicy(policy):
+                case TurnPolicy.reject:
+                    return False
+                case TurnPolicy.queue:
+                    if len(self._queue) >= self.max_queue:
+                        return False
+                    self._queue.append(turn)
+                    return True
+                case TurnPolicy.latest:
+                    self.cancel()
+
+        self._start(turn)
+        return True
+
+    def cancel(self) -> bool:
+        """Cancel the running turn and drop queued ones; returns True if a turn was running"""
+        self._queue.clear()
+        if not self.busy:
+            return False
+        self.current.cancel()
+        return True
+
+    def _start(self, turn: Turn):
+        self.current = asyncio.create_task(self._run(turn))
+
+    async def _run(self, turn: Turn):
+        try:
+            await turn()
+        except asyncio.CancelledError:
+            logger.debug("Turn cancelled")
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            if self._queue and self.current is asyncio.current_task():
+                self._start(self._queue.popleft())
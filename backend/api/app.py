@@ -1,27 +1,77 @@
+import asyncio
 from contextlib import asynccontextmanager
-from typing import Final
+from typing import Final, Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
+from .ai.residency import ModelResidency
+from .clients import Clients
 from .config import get_cfg
-from .mongodb import mongo_client
-from .routers import communication, socket, prompt
+from .crud.chat_writer import ChatWriter
+from .crud.indexes import check_query_plans, ensure_indexes
+from .routers import communication, metrics, socket, prompt
+from .sessions.registry import create_session_registry
+from .utils.speech_engines import check_speech_engines
+from .utils.metrics import (
+    CHAT_WRITER_QUEUE_DEPTH,
+    EXECUTOR_QUEUE_DEPTH,
+    QUEUED_LLM_REQUESTS,
+    RESIDENT_MODELS,
+    executor_queue_depth,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    cfg = get_cfg()
+    check_speech_engines(cfg)
+    clients: Clients = app.state.clients
+    await clients.start()
+    db = clients.db
+    await ensure_indexes(db)
+    if cfg.mongodb_check_query_plans:
+        failures = await check_query_plans(db)
+        if failures:
+            raise RuntimeError(f"Queries without index support: {failures}")
+        logger.info("All query plans use an index.")
+
+    app.state.model_residency = ModelResidency.from_config(
+        clients.llm,
+        lambda: {c.config.llm_model.value for c in socket.live_communications.values()},
+        cfg,
+    )
+    app.state.model_residency.start()
+    for model in cfg.llm_preload_models:
+        app.state.model_residency.preload(model)
+    app.state.chat_writer = ChatWriter.from_config(db, cfg)
+    app.state.chat_writer.start()
+    loop = asyncio.get_running_loop()
+    EXECUTOR_QUEUE_DEPTH.set_function(lambda: executor_queue_depth(loop))
+    CHAT_WRITER_QUEUE_DEPTH.set_function(lambda: app.state.chat_writer.pending)
+    RESIDENT_MODELS.set_function(lambda: len(app.state.model_residency.resident))
+    QUEUED_LLM_REQUESTS.set_function(lambda: clients.llm.scheduler.queued)
+    app.state.session_registry = create_session_registry(cfg)
+    await app.state.session_registry.start(*socket.session_handlers(app))
+    app.state.session_store = socket.live_communications
+    app.state.session_store.start(app.state.session_registry.release)
     yield
 
-    if mongo_client is not None:
-        mongo_client.close()
-        logger.info("Connection to MongoDB closed.")
+    await app.state.session_store.close()
+    await app.state.session_registry.close()
+
+    await app.state.model_residency.close()
+    await app.state.chat_writer.close()
+
+    await clients.close()
 
 
-def create_app() -> FastAPI:
+def create_app(clients: Optional[Clients] = None) -> FastAPI:
     app_config = get_cfg()
     app = FastAPI(debug=app_config.debug, lifespan=lifespan)
+    # connected in the lifespan
+    app.state.clients = clients or Clients(app_config)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=app_config.origins,
@@ -32,6 +82,7 @@ def create_app() -> FastAPI:
     app.include_router(communication.router)
     app.include_router(socket.router)
     app.include_router(prompt.router)
+    app.include_router(metrics.router)
     return app
 
 
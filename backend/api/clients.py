@@ -0,0 +1,167 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import grpc
+from google.cloud import speech_v1, texttospeech
+from loguru import logger
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from starlette.requests import HTTPConnection
+
+from .ai.ollama import OllamaClient
+from .ai.response_cache import ResponseCache, create_response_cache
+from .config import Config
+from .mongodb import create_mongo_client
+from .utils.tts_cache import TTSCache, create_tts_cache
+
+
+def _channel_factory(transport_class, options: List[Tuple[str, Any]]) -> Callable[..., grpc.Channel]:
+    """`create_channel` of a Google transport with extra gRPC channel options"""
+
+    def create_channel(host: str, **kwargs) -> grpc.Channel:
+        kwargs["options"] = [*kwargs.get("options", []), *options]
+        return transport_class.create_channel(host, **kwargs)
+
+    return create_channel
+
+
+def create_google_client(client_class, cfg: Config):
+    """
+    A Google API client on its own gRPC channel, kept alive with pings so
+    idle periods between robot sessions do not drop the connection.
+    """
+    transport_class = client_class.get_transport_class("grpc")
+    options = [
+        ("grpc.keepalive_time_ms", cfg.google_grpc_keepalive_time_ms),
+        ("grpc.keepalive_timeout_ms", cfg.google_grpc_keepalive_timeout_ms),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+    transport = transport_class(channel=_channel_factory(transport_class, options))
+    return client_class(transport=transport)
+
+
+def _grpc_channel(client) -> Optional[grpc.Channel]:
+    return getattr(getattr(client, "transport", None), "grpc_channel", None)
+
+
+async def _channel_ready(client, timeout: float):
+    channel = _grpc_channel(client)
+    if channel is None:
+        return
+    future = grpc.channel_ready_future(channel)
+    try:
+        await asyncio.to_thread(future.result, timeout)
+    finally:
+        future.cancel()
+
+
+class Clients:
+    """
+    The clients of the backing services, shared by every request and
+    session of the app.
+
+    Each client is built once when the app starts, connected right away so
+    the first robot does not pay for channel setup and TLS handshakes, and
+    closed when the app stops. Clients passed in are used as they are, which
+    is how the bench injects its fakes. A Google client that cannot be built,
+    e.g. without credentials, is left out with a warning so sessions using
+    local speech engines still work.
+
+    The TTS and LLM reply caches are shared the same way: built once at
+    startup, when enabled in Config, and passed to the code using them.
+    """
+
+    def __init__(
+        self,
+        cfg: Config,
+        mongo_client: Optional[AsyncMongoClient] = None,
+        s2t_client: Optional[speech_v1.SpeechClient] = None,
+        t2s_client: Optional[texttospeech.TextToSpeechClient] = None,
+        llm_client: Optional[OllamaClient] = None,
+    ):
+        self.cfg = cfg
+        self.mongo = mongo_client
+        self.s2t = s2t_client
+        self.t2s = t2s_client
+        self.llm = llm_client
+        self.tts_cache: Optional[TTSCache] = None
+        self.response_cache: Optional[ResponseCache] = None
+
+    @property
+    def db(self) -> AsyncDatabase:
+        return self.mongo.get_database(self.cfg.db_name)
+
+    async def start(self):
+        if self.mongo is None:
+            self.mongo = create_mongo_client(self.cfg)
+        self.response_cache = create_response_cache(self.cfg)
+        # scans the disk tier, if there is one
+        self.tts_cache = await asyncio.to_thread(create_tts_cache, self.cfg)
+        if self.llm is None:
+            self.llm = OllamaClient.from_config(self.cfg, self.response_cache)
+        # resolving Google credentials blocks, possibly on a metadata server
+        self.s2t, self.t2s = await asyncio.gather(
+            self._build_google(self.s2t, speech_v1.SpeechClient),
+            self._build_google(self.t2s, texttospeech.TextToSpeechClient),
+        )
+
+        health = await self.health(self.cfg.client_warmup_timeout)
+        for name, status in health.items():
+            if status["ok"]:
+                logger.info(f"Connected {name} client in {status['seconds']}s")
+            else:
+                logger.warning(f"Could not connect {name} client: {status['error']}")
+
+    async def _build_google(self, client, client_class):
+        if client is not None:
+            return client
+        try:
+            return await asyncio.to_thread(create_google_client, client_class, self.cfg)
+        except Exception as e:
+            logger.warning(f"{client_class.__name__} unavailable: {e}")
+            return None
+
+    async def health(self, timeout: float = 2) -> Dict[str, Dict[str, Any]]:
+        """
+        Check the clients concurrently; each reports ok, seconds and any
+        error. Google clients that could not be built are not checked.
+        """
+        checks: Dict[str, Callable[[], Awaitable[Any]]] = {
+            "mongo": lambda: self.db.command("ping"),
+            "llm": self.llm.running_models,
+        }
+        if self.s2t is not None:
+            checks["speech_to_text"] = lambda: _channel_ready(self.s2t, timeout)
+        if self.t2s is not None:
+            checks["text_to_speech"] = lambda: _channel_ready(self.t2s, timeout)
+        results = await asyncio.gather(*(self._check(check, timeout) for check in checks.values()))
+        return dict(zip(checks, results))
+
+    async def _check(self, check: Callable[[], Awaitable[Any]], timeout: float) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout)
+            error = None
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        seconds = round(time.perf_counter() - start, 3)
+        if error is None:
+            return {"ok": True, "seconds": seconds}
+        return {"ok": False, "seconds": seconds, "error": error}
+
+    async def close(self):
+        if self.llm is not None:
+            await self.llm.aclose()
+        for client in (self.s2t, self.t2s):
+            channel = _grpc_channel(client)
+            if channel is not None:
+                channel.close()
+        if self.mongo is not None:
+            await self.mongo.close()
+        logger.info("Clients closed.")
+
+
+def get_clients(connection: HTTPConnection) -> Clients:
+    return connection.app.state.clients
@@ -1,5 +1,5 @@
 from functools import cache
-from typing import List
+from typing import Dict, List, Optional
 import os
 
 from pydantic_settings import BaseSettings
@@ -12,6 +12,48 @@ class Config(BaseSettings):
     ]
     mongodb_url: str = "mongodb://localhost:27017/"
     db_name: str = "socialrobot"
+    mongodb_max_pool_size: int = 50
+    mongodb_min_pool_size: int = 0
+    mongodb_max_idle_time_ms: int = 300_000
+    mongodb_wait_queue_timeout_ms: int = 10_000
+    mongodb_server_selection_timeout_ms: int = 10_000
+    # refuse to start if a crud query would scan a whole collection
+    mongodb_check_query_plans: bool = False
+
+    # uvicorn workers, more than one needs the "broker" session backend
+    workers: int = 1
+    session_backend: str = "local"  # "local" or "broker"
+    session_broker_path: str = "/tmp/srw-session-broker.sock"
+
+    # live sessions nobody is connected to are dropped from memory after
+    # session_idle_ttl seconds, or sooner while all sessions exceed the budget
+    session_idle_ttl: float = 1800
+    session_memory_budget_mb: int = 256
+    session_sweep_interval: float = 30
+
+    # most communications one /create-communications request may register
+    communication_batch_max: int = 500
+
+    # utterances waiting behind a running turn with the "queue" turn policy
+    turn_queue_max: int = 3
+
+    # chat history: messages loaded when a session is restored (0 = all),
+    # largest page served on request, messages per control panel chunk
+    history_restore_limit: int = 200
+    history_page_max: int = 200
+    history_chunk_size: int = 50
+
+    # shared clients: seconds to wait for each to connect at startup, and
+    # gRPC keepalive of the Google speech channels
+    client_warmup_timeout: float = 10
+    google_grpc_keepalive_time_ms: int = 30_000
+    google_grpc_keepalive_timeout_ms: int = 10_000
+
+    # write-behind chat message persistence
+    chat_writer_queue_size: int = 10_000
+    chat_writer_batch_size: int = 256
+    chat_writer_flush_interval: float = 0.25
+    chat_writer_max_retries: int = 5
     
     # Use environment variable with fallback for local development
     llm_url: str = os.getenv(
@@ -20,6 +62,75 @@ class Config(BaseSettings):
     )
     ollama_port: int = int(os.getenv("OLLAMA_PORT", "11434"))
 
+    # shared LLM HTTP client (seconds / connection counts)
+    llm_timeout: float = 120
+    llm_connect_timeout: float = 10
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 60
+    llm_max_retries: int = 3
+    llm_retry_backoff: float = 0.5
+
+    # model residency, keep_alive is an Ollama duration ("30m", "-1" forever)
+    llm_keep_alive: str = "30m"
+    llm_max_resident_models: int = 2
+    llm_residency_refresh_interval: float = 30
+    llm_preload_models: List[str] = []
+
+    # LLM admission control, requests over the limits wait in a fair queue
+    llm_max_concurrency: int = 4
+    llm_model_concurrency: Dict[str, int] = {}
+    llm_default_model_concurrency: int = 0  # 0 = only the global limit
+    llm_queue_max: int = 32
+    llm_queue_timeout: float = 30
+
+    # cache of complete replies, used by sessions with response_cache_enabled
+    llm_response_cache_enabled: bool = True
+    llm_response_cache_max_entries: int = 1024
+    llm_response_cache_ttl: float = 3600
+
+    # spoken instead of a reply when a turn is shed
+    llm_busy_phrase: str = "Sorry, I'm a little busy right now. Could you ask me again in a moment?"
+
+    # LLM history window, budgets are per model value and fall back to the default
+    llm_history_budget_unit: str = "tokens"  # "tokens" or "chars"
+    llm_history_chars_per_token: float = 4.0
+    llm_history_default_budget: int = 1500
+    llm_history_budgets: Dict[str, int] = {}
+    llm_history_summary_enabled: bool = False
+    # "per_turn" wraps every user message with the prompt suffix; "stable_prefix"
+    # sends it once as a system message and only slides the window on overflow
+    llm_prompt_layout: str = "per_turn"
+    llm_history_low_water: float = 0.6
+
+    # speech engines communications may choose; whisper and piper run on the
+    # box and need the local-speech extra, startup fails when it is missing
+    stt_engines: List[str] = ["google"]
+    tts_engines: List[str] = ["google"]
+
+    # on-box speech engines, chosen per communication
+    whisper_model: str = "base"  # faster-whisper model name or path
+    whisper_compute_type: str = "int8"
+    whisper_cpu_threads: int = 0  # 0 uses all cores
+    whisper_num_workers: int = 1
+    # piper voice models by "<language>/<gender>" or "<language>"
+    piper_voices: Dict[str, str] = {}
+
+    # audio formats by preference, used with bots that advertise theirs in HELLO
+    tts_output_encodings: List[str] = ["OGG_OPUS", "MP3", "LINEAR16"]
+    stt_input_encodings: List[str] = ["LINEAR16", "OGG_OPUS", "WEBM_OPUS", "FLAC", "MP3"]
+
+    # synthesized audio cache, spills to `tts_cache_dir` when set
+    tts_cache_enabled: bool = True
+    tts_cache_max_entries: int = 512
+    tts_cache_max_bytes: int = 64 * 1024 * 1024
+    tts_cache_dir: Optional[str] = None
+    tts_cache_disk_max_bytes: int = 1024 * 1024 * 1024
+    tts_prewarm_phrases: List[str] = [
+        "I'm listening. What would you like to know?",
+        "Sorry, I'm a little busy right now. Could you ask me again in a moment?",
+    ]
+
     # Add environment-specific configurations
     is_docker: bool = os.getenv("DOCKER_ENV", "false").lower() == "true"
 
@@ -32,5 +143,6 @@ class Config(BaseSettings):
             if "localhost" in self.mongodb_url:
                 self.mongodb_url = self.mongodb_url.replace("localhost", "mongodb")
 
+@cache
 def get_cfg() -> Config:
-    return cache(Config)()
+    return Config()
@@ -1,31 +1,33 @@
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 
+from bson import ObjectId, Timestamp
 from loguru import logger
-from pymongo import database, ASCENDING
+from pymongo import ASCENDING, DESCENDING
+from pymongo.asynchronous.database import AsyncDatabase
 
 
 from ..models.chat import ChatMessage
 from ..mongodb import Collections
 
 
-def add_one_message(db: database.Database, message: ChatMessage):
+async def add_one_message(db: AsyncDatabase, message: ChatMessage):
     try:
         coll = db.get_collection(Collections.chat_messages)
-        coll.insert_one(message.to_dict())
+        await coll.insert_one(message.to_dict())
     except Exception as e:
         logger.exception(e)
 
 
-def add_many_messages(db: database.Database, messages: List[ChatMessage]):
+async def add_many_messages(db: AsyncDatabase, messages: List[ChatMessage]):
     try:
         coll = db.get_collection(Collections.chat_messages)
-        coll.insert_many([message.to_dict() for message in messages])
+        await coll.insert_many([message.to_dict() for message in messages])
     except Exception as e:
         logger.exception(e)
 
 
-def get_chat_history(
-    db: database.Database,
+async def get_chat_history(
+    db: AsyncDatabase,
     communication_id: str,
     sort_order: int = ASCENDING,
 ) -> Union[List[ChatMessage], None]:
@@ -35,9 +37,75 @@ def get_chat_history(
             "timestamp", sort_order
         )
 
-        chat_messages = [ChatMessage.from_dict(message) for message in chat_history]
-        return chat_messages
+        return ChatMessage.from_dicts([message async for message in chat_history])
 
     except Exception as e:
         logger.exception(e)
         return None
+
+
+# the fields of a ChatMessage, other keys a document may carry are not read
+HISTORY_PROJECTION = {
+    "communicationId": 1,
+    "role": 1,
+    "message": 1,
+    "llmModel": 1,
+    "timestamp": 1,
+}
+
+
+def _encode_cursor(document) -> str:
+    timestamp: Timestamp = document["timestamp"]
+    return f"{timestamp.time}.{timestamp.inc}.{document['_id']}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[Timestamp, ObjectId]:
+    seconds, inc, message_id = cursor.split(".")
+    return Timestamp(int(seconds), int(inc)), ObjectId(message_id)
+
+
+async def get_chat_history_page(
+    db: AsyncDatabase,
+    communication_id: str,
+    limit: int,
+    before: Optional[str] = None,
+    cleared_at: Optional[str] = None,
+) -> Tuple[List[ChatMessage], Optional[str]]:
+    """
+    The `limit` most recent messages older than the `before` cursor (all
+    messages when it is None), oldest first, and the cursor of the next older
+    page, None once the start of the conversation is reached. Pages are
+    keyed on (timestamp, _id), so they stay stable while new messages are
+    written. A `limit` of 0 reads the whole history. Messages from before
+    `cleared_at`, the communication's `history_cleared_at`, are left out.
+
+    Raises ValueError for a malformed cursor.
+    """
+    query = {"communicationId": communication_id}
+    if cleared_at:
+        query["_id"] = {"$gt": ObjectId(cleared_at)}
+    if before:
+        timestamp, message_id = _decode_cursor(before)
+        query["$or"] = [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": message_id}},
+        ]
+
+    try:
+        coll = db.get_collection(Collections.chat_messages)
+        cursor = coll.find(query, HISTORY_PROJECTION).sort(
+            [("timestamp", DESCENDING), ("_id", DESCENDING)]
+        )
+        if limit:
+            # one extra document tells whether an older page exists
+            cursor = cursor.limit(limit + 1)
+        documents = [document async for document in cursor]
+    except Exception as e:
+        logger.exception(e)
+        return [], None
+
+    has_more = bool(limit) and len(documents) > limit
+    documents = documents[:limit] if limit else documents
+    documents.reverse()
+    next_cursor = _encode_cursor(documents[0]) if has_more else None
+    return ChatMessage.from_dicts(documents), next_cursor
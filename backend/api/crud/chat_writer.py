@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import List, Optional
+
+from loguru import logger
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+from starlette.requests import HTTPConnection
+
+from ..config import Config
+from ..models.chat import ChatMessage
+from ..mongodb import DUPLICATE_KEY_ERROR, Collections
+from ..utils import metrics
+
+
+class ChatWriter:
+    """
+    Write-behind persistence of chat messages.
+
+    Messages from all live sessions are queued and written by a single
+    background task in unordered bulk inserts, flushed when `batch_size`
+    messages are waiting or `flush_interval` seconds after the first one
+    arrived. The queue is bounded: producers only wait when the database
+    falls far behind. `close` drains everything that is still queued.
+    """
+
+    def __init__(
+        self,
+        db: AsyncDatabase,
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.25,
+        max_retries: int = 5,
+        retry_backoff: float = 0.2,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    @classmethod
+    def from_config(cls, db: AsyncDatabase, cfg: Config) -> "ChatWriter":
+        return cls(
+            db,
+            max_queue=cfg.chat_writer_queue_size,
+            batch_size=cfg.chat_writer_batch_size,
+            flush_interval=cfg.chat_writer_flush_interval,
+            max_retries=cfg.chat_writer_max_retries,
+        )
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, messages: List[ChatMessage]):
+        for message in messages:
+            await self._queue.put(message)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def close(self):
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        logger.info(f"Chat writer drained, {self.written} messages written.")
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if message is None:
+                    closing = True
+                    break
+                batch.append(message)
+
+            # the writer outlives any one batch, or producers block on a full queue
+            try:
+                await self._write(batch)
+            except Exception:
+                logger.exception(f"Failed to write {len(batch)} chat messages")
+                self.failed += len(batch)
+
+    async def _write(self, batch: List[ChatMessage]):
+        documents = [message.to_dict() for message in batch]
+        coll = self.db.get_collection(Collections.chat_messages)
+        rejected = 0
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.MONGO_WRITE_SECONDS.time(collection=Collections.chat_messages):
+                    await coll.insert_many(documents, ordered=False)
+                break
+            except BulkWriteError as e:
+                # documents that made it in on an earlier attempt fail as duplicates
+                errors = [
+                    error
+                    for error in e.details.get("writeErrors", [])
+                    if error.get("code") != DUPLICATE_KEY_ERROR
+                ]
+                if errors:
+                    logger.error(f"Failed to write {len(errors)} chat messages: {errors}")
+                    rejected = len(errors)
+                    self.failed += rejected
+                break
+            except ConnectionFailure as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Dropping {len(batch)} chat messages after retries: {e}")
+                    self.failed += len(batch)
+                    return
+                await asyncio.sleep(self.retry_backoff * (2**attempt))
+            except PyMongoError:
+                logger.exception(f"Failed to write {len(batch)} chat messages")
+                self.failed += len(batch)
+                return
+
+        self.written += len(batch) - rejected
+        self.batches += 1
+
+
+def get_chat_writer(connection: HTTPConnection) -> ChatWriter:
+    return connection.app.state.chat_writer
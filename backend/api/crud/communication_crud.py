@@ -1,36 +1,111 @@
-from typing import Union
+from typing import Dict, List, Union
 
+from bson import ObjectId
 from loguru import logger
-from pymongo import database
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 
 from ..models.communication import CommunicationConfig
-from ..mongodb import Collections
-from ..utils import generate_id
+from ..mongodb import DUPLICATE_KEY_ERROR, Collections
+from ..utils import generate_id, metrics
 
+# public id allocation outcomes since startup, see public_id_stats
+_allocations: Dict[str, int] = {"created": 0, "collision": 0, "exhausted": 0}
 
-def create_communication(db: database.Database) -> Union[CommunicationConfig, None]:
-    public_id = _get_public_id(db)
-    config = CommunicationConfig(public_id=public_id)
-    try:
-        coll = db.get_collection(Collections.communications)
-        result = coll.insert_one(config.to_dict())
-        if result is None:
-            return None
 
-        inserted_document = coll.find_one({"_id": result.inserted_id})
-        return CommunicationConfig.from_dict(inserted_document)
-    except Exception as e:
-        logger.exception(e)
+def _record_allocation(result: str, count: int = 1):
+    if count:
+        _allocations[result] += count
+        metrics.PUBLIC_ID_ALLOCATIONS.inc(count, result=result)
+
+
+def public_id_stats() -> Dict[str, Union[int, float]]:
+    attempts = _allocations["created"] + _allocations["collision"]
+    return {
+        **_allocations,
+        "collision_rate": _allocations["collision"] / attempts if attempts else 0.0,
+    }
 
 
-def get_communication_by_public_id(
-    db: database.Database, public_id: str
+async def create_communication(
+    db: AsyncDatabase, max_retries: int = 10
+) -> Union[CommunicationConfig, None]:
+    """
+    Insert a communication under a fresh public id. The unique publicId
+    index rejects ids that are taken, in which case another one is drawn,
+    so no lookup precedes the insert and the inserted config is returned
+    as is.
+    """
+    coll = db.get_collection(Collections.communications)
+    for _ in range(max_retries):
+        document = CommunicationConfig(public_id=generate_id()).to_dict()
+        try:
+            await coll.insert_one(document)
+        except DuplicateKeyError:
+            _record_allocation("collision")
+            continue
+        except Exception as e:
+            logger.exception(e)
+            return None
+        _record_allocation("created")
+        # what a read would return, timestamps included
+        return CommunicationConfig.from_dict(document)
+
+    _record_allocation("exhausted")
+    logger.error(f"No free public id after {max_retries} attempts")
+    return None
+
+
+async def create_communications(
+    db: AsyncDatabase, count: int, max_retries: int = 10
+) -> List[CommunicationConfig]:
+    """
+    Insert `count` communications with one unordered bulk insert per round;
+    only the ones whose public id collided are retried with new ids.
+    """
+    coll = db.get_collection(Collections.communications)
+    created: List[CommunicationConfig] = []
+    pending = [CommunicationConfig(public_id=generate_id()).to_dict() for _ in range(count)]
+    for _ in range(max_retries):
+        if not pending:
+            break
+        collided, failed = set(), set()
+        try:
+            await coll.insert_many(pending, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    collided.add(error["index"])
+                else:
+                    failed.add(error["index"])
+            if failed:
+                logger.error(f"Failed to create {len(failed)} communications: {e.details}")
+        except Exception as e:
+            logger.exception(e)
+            return created
+
+        inserted = [
+            document for i, document in enumerate(pending) if i not in collided and i not in failed
+        ]
+        created.extend(CommunicationConfig.from_dicts(inserted))
+        _record_allocation("created", len(inserted))
+        _record_allocation("collision", len(collided))
+        pending = [CommunicationConfig(public_id=generate_id()).to_dict() for _ in collided]
+
+    if pending:
+        _record_allocation("exhausted", len(pending))
+        logger.error(f"No free public id for {len(pending)} communications after {max_retries} attempts")
+    return created
+
+
+async def get_communication_by_public_id(
+    db: AsyncDatabase, public_id: str
 ) -> Union[CommunicationConfig, None]:
 
     try:
         coll = db.get_collection(Collections.communications)
-        result = coll.find_one({"publicId": public_id})
+        result = await coll.find_one({"publicId": public_id})
         if result is None:
             return None
 
@@ -39,28 +114,30 @@ def get_communication_by_public_id(
         logger.exception(e)
 
 
-def update_communication_by_public_id(
-    db: database.Database, config: CommunicationConfig
+async def update_communication_by_public_id(
+    db: AsyncDatabase, config: CommunicationConfig
 ) -> None:
     try:
         coll = db.get_collection(Collections.communications)
-        coll.update_one({"publicId": config.public_id}, {"$set": config.to_dict()})
+        await coll.update_one({"publicId": config.public_id}, {"$set": config.to_dict()})
     except Exception as e:
         logger.exception(e)
 
 
-def _get_public_id(db: database.Database, max_retries: int = 10) -> Union[str, None]:
-    public_id = None
-    trial_count: int = 0
-
-    communications = db.get_collection(Collections.communications)
-
-    while trial_count < max_retries:
-        trial_count += 1
-        id = generate_id()
-        existing_comm = communications.find_one({"publicId": id})
-        if existing_comm is None:
-            public_id = id
-            break
-
-    return public_id
+async def clear_communication_history(db: AsyncDatabase, public_id: str) -> Union[str, None]:
+    """
+    Mark the stored history as cleared, so restoring the session no longer
+    loads it; the messages themselves are kept. Returns the new
+    `history_cleared_at`, None when the communication does not exist.
+    """
+    cleared_at = str(ObjectId())
+    try:
+        coll = db.get_collection(Collections.communications)
+        result = await coll.update_one(
+            {"publicId": public_id}, {"$set": {"historyClearedAt": cleared_at}}
+        )
+        if result.matched_count == 0:
+            return None
+        return cleared_at
+    except Exception as e:
+        logger.exception(e)
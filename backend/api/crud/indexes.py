@@ -0,0 +1,123 @@
+import asyncio
+import sys
+from typing import Any, Dict, List, Tuple
+
+from loguru import logger
+from bson import ObjectId, Timestamp
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import ServerSelectionTimeoutError
+
+from ..mongodb import Collections
+
+INDEXES: Dict[Collections, List[IndexModel]] = {
+    Collections.chat_messages: [
+        # also serves history pages, sorted on (timestamp, _id) descending
+        IndexModel(
+            [("communicationId", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+            name="communicationId_timestamp_id",
+        ),
+    ],
+    Collections.communications: [
+        IndexModel([("publicId", ASCENDING)], name="publicId_unique", unique=True),
+    ],
+    Collections.prompts: [
+        IndexModel(
+            [("communicationId", ASCENDING), ("createdAt", ASCENDING)],
+            name="communicationId_createdAt",
+        ),
+    ],
+    Collections.activities: [
+        IndexModel([("userId", ASCENDING), ("time", ASCENDING)], name="userId_time"),
+    ],
+}
+
+# (collection, filter, sort) of every query issued from crud/
+QUERY_SHAPES: List[Tuple[Collections, Dict[str, Any], Dict[str, int]]] = [
+    (Collections.chat_messages, {"communicationId": ""}, {"timestamp": ASCENDING}),
+    (Collections.chat_messages, {"communicationId": ""}, {"timestamp": DESCENDING, "_id": DESCENDING}),
+    # a history page after a clear, older than the cursor
+    (
+        Collections.chat_messages,
+        {
+            "communicationId": "",
+            "_id": {"$gt": ObjectId("0" * 24)},
+            "$or": [
+                {"timestamp": {"$lt": Timestamp(0, 1)}},
+                {"timestamp": Timestamp(0, 1), "_id": {"$lt": ObjectId("f" * 24)}},
+            ],
+        },
+        {"timestamp": DESCENDING, "_id": DESCENDING},
+    ),
+    (Collections.communications, {"publicId": ""}, {}),
+    (Collections.prompts, {"communicationId": ""}, {"createdAt": ASCENDING}),
+    (Collections.activities, {"userId": 0}, {"time": ASCENDING}),
+]
+
+
+async def ensure_indexes(db: AsyncDatabase):
+    """
+    Create the declared indexes, existing ones are left untouched. Raises
+    RuntimeError when a unique index cannot be built, e.g. over duplicates,
+    since public id allocation relies on it.
+    """
+    for collection, indexes in INDEXES.items():
+        try:
+            names = await db.get_collection(collection).create_indexes(indexes)
+            logger.debug(f"Indexes on {collection.value}: {names}")
+        except ServerSelectionTimeoutError:
+            logger.exception("MongoDB not reachable, skipping index creation")
+            return
+        except Exception as e:
+            unique = [index.document["name"] for index in indexes if index.document.get("unique")]
+            if unique:
+                raise RuntimeError(
+                    f"Failed to create unique indexes {unique} on {collection.value}: {e}"
+                ) from e
+            logger.exception(f"Failed to create indexes on {collection.value}")
+
+
+async def check_query_plans(db: AsyncDatabase) -> List[str]:
+    """
+    Explain every crud query shape and return a description of each one
+    whose winning plan scans the whole collection.
+    """
+    failures = []
+    for collection, query_filter, sort in QUERY_SHAPES:
+        command: Dict[str, Any] = {"find": collection.value, "filter": query_filter}
+        if sort:
+            command["sort"] = sort
+        explained = await db.command("explain", command, verbosity="queryPlanner")
+        winning_plan = explained.get("queryPlanner", {}).get("winningPlan", {})
+        if _has_stage(winning_plan, "COLLSCAN"):
+            failures.append(f"{collection.value} {query_filter} sort={sort}")
+    return failures
+
+
+def _has_stage(plan: Any, stage: str) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_has_stage(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_stage(value, stage) for value in plan)
+    return False
+
+
+async def _main() -> int:
+    from ..config import get_cfg
+    from ..mongodb import create_mongo_client
+
+    cfg = get_cfg()
+    client = create_mongo_client(cfg)
+    db = client.get_database(cfg.db_name)
+    await ensure_indexes(db)
+    failures = await check_query_plans(db)
+    await client.close()
+    for failure in failures:
+        logger.error(f"Collection scan: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
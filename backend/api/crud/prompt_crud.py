@@ -1,45 +1,46 @@
 from typing import List, Union
 from bson import ObjectId, errors as bson_errors
 from loguru import logger
-from pymongo import database, ASCENDING
+from pymongo import ASCENDING
+from pymongo.asynchronous.database import AsyncDatabase
 
 from ..models.prompt import PromptModel
 from ..mongodb import Collections
 
 
-def create_prompt(
-    db: database.Database,
+async def create_prompt(
+    db: AsyncDatabase,
     prompt: PromptModel,
 ) -> Union[PromptModel, None]:
     try:
         coll = db.get_collection(Collections.prompts)
-        result = coll.insert_one(prompt.to_dict())
+        result = await coll.insert_one(prompt.to_dict())
         if result is None:
             return None
 
-        inserted_document = coll.find_one({"_id": result.inserted_id})
+        inserted_document = await coll.find_one({"_id": result.inserted_id})
         return PromptModel.from_dict(inserted_document)
     except Exception as e:
         logger.exception("Failed to create prompt")
         return None
 
 
-def get_prompts_by_communication_id(
-    db: database.Database,
+async def get_prompts_by_communication_id(
+    db: AsyncDatabase,
     communication_id: str,
     sort_order: int = ASCENDING,
 ) -> Union[List[PromptModel], None]:
     try:
         coll = db.get_collection(Collections.prompts)
-        prompts = coll.find({"communication_id": communication_id}).sort("created_at", sort_order)
-        return [PromptModel.from_dict(prompt) for prompt in prompts]
+        prompts = coll.find({"communicationId": communication_id}).sort("createdAt", sort_order)
+        return PromptModel.from_dicts([prompt async for prompt in prompts])
     except Exception as e:
         logger.exception(f"Failed to get prompts for communication {communication_id}")
         return None
 
 
-def get_prompt_by_id(
-    db: database.Database,
+async def get_prompt_by_id(
+    db: AsyncDatabase,
     prompt_id: str,
 ) -> Union[PromptModel, None]:
     try:
@@ -50,7 +51,7 @@ def get_prompt_by_id(
             return None
 
         coll = db.get_collection(Collections.prompts)
-        result = coll.find_one({"_id": object_id})
+        result = await coll.find_one({"_id": object_id})
         if result is None:
             return None
         return PromptModel.from_dict(result)
@@ -59,8 +60,8 @@ def get_prompt_by_id(
         return None
 
 
-def update_prompt(
-    db: database.Database,
+async def update_prompt(
+    db: AsyncDatabase,
     prompt_id: str,
     update_data: dict,
 ) -> Union[PromptModel, None]:
@@ -72,7 +73,7 @@ def update_prompt(
             return None
 
         coll = db.get_collection(Collections.prompts)
-        result = coll.find_one_and_update(
+        result = await coll.find_one_and_update(
             {"_id": object_id},
             {"$set": update_data},
             return_document=True
@@ -85,8 +86,8 @@ def update_prompt(
         return None
 
 
-def delete_prompt(
-    db: database.Database,
+async def delete_prompt(
+    db: AsyncDatabase,
     prompt_id: str,
 ) -> bool:
     try:
@@ -97,7 +98,7 @@ def delete_prompt(
             return False
 
         coll = db.get_collection(Collections.prompts)
-        result = coll.delete_one({"_id": object_id})
+        result = await coll.delete_one({"_id": object_id})
         return result.deleted_count > 0
     except Exception as e:
         logger.exception(f"Failed to delete prompt {prompt_id}")
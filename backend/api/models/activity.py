@@ -1,11 +1,11 @@
 import datetime as dt
-from bson import ObjectId, Timestamp
-from typing import Any, Dict, Literal, Union
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Literal, Union
 
 import pydantic as pyd
 
-from ..utils import to_camel_case, to_snake_case
 from ..utils.types import Activity, DayOfWeek
+from .codec import DocumentCodec
 
 
 class ActivityModel(pyd.BaseModel):
@@ -28,22 +28,16 @@ class ActivityModel(pyd.BaseModel):
         return time.timestamp()
 
     def to_dict(self):
-        json_data = self.model_dump()
-        if isinstance(json_data["time"], float):
-            json_data["time"] = Timestamp(int(json_data["time"]), 1)
-        data = {to_camel_case(k): v for k, v in json_data.items()}
-        if "id" in data:
-            data["_id"] = ObjectId(data.pop("id"))
-
-        return data
+        return _codec.to_document(self)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        if "_id" in data:
-            data["id"] = str(data.pop("_id"))
-        json_data = {to_snake_case(k): v for k, v in data.items()}
+        return _codec.from_document(data)
+
+    @classmethod
+    def from_dicts(cls, documents: Iterable[Dict[str, Any]]) -> List["ActivityModel"]:
+        """Validate a whole query result in one pass"""
+        return _codec.from_documents(documents)
 
-        if isinstance(json_data["time"], Timestamp):
-            json_data["time"] = json_data["time"].as_datetime()
 
-        return cls(**json_data)
+_codec = DocumentCodec(ActivityModel)
@@ -1,11 +1,11 @@
 import datetime as dt
-from bson import ObjectId, Timestamp
-from typing import Any, Dict, Union
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Union
 
 import pydantic as pyd
 
-from ..utils import to_camel_case, to_snake_case
 from ..utils.types import LLMModel, MessageType
+from .codec import DocumentCodec
 
 
 class ChatMessage(pyd.BaseModel):
@@ -28,22 +28,16 @@ class ChatMessage(pyd.BaseModel):
         return timestamp.timestamp()
 
     def to_dict(self):
-        json_data = self.model_dump()
-        if isinstance(json_data["timestamp"], float):
-            json_data["timestamp"] = Timestamp(int(json_data["timestamp"]), 1)
-        data = {to_camel_case(k): v for k, v in json_data.items()}
-        if "id" in data:
-            data["_id"] = ObjectId(data.pop("id"))
-
-        return data
+        return _codec.to_document(self)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        if "_id" in data:
-            data["id"] = str(data.pop("_id"))
-        json_data = {to_snake_case(k): v for k, v in data.items()}
+        return _codec.from_document(data)
+
+    @classmethod
+    def from_dicts(cls, documents: Iterable[Dict[str, Any]]) -> List["ChatMessage"]:
+        """Validate a whole query result in one pass"""
+        return _codec.from_documents(documents)
 
-        if isinstance(json_data["timestamp"], Timestamp):
-            json_data["timestamp"] = json_data["timestamp"].as_datetime()
 
-        return cls(**json_data)
+_codec = DocumentCodec(ChatMessage)
@@ -0,0 +1,66 @@
+import datetime as dt
+from typing import Any, Dict, Generic, Iterable, List, Type, TypeVar
+
+import pydantic as pyd
+from bson import ObjectId, Timestamp
+
+from ..utils import to_camel_case
+
+M = TypeVar("M", bound=pyd.BaseModel)
+
+
+class DocumentCodec(Generic[M]):
+    """
+    Converts a flat model to and from its MongoDB document.
+
+    Field names are mapped to camelCase keys (and `id` to `_id`) through maps
+    built once per model, instead of converting every key of every document.
+    Datetime fields are stored as Mongo Timestamps with second precision.
+    Documents are read back by camelCase or snake_case keys, and lists of
+    documents are validated in a single pydantic call.
+    """
+
+    def __init__(self, model: Type[M]):
+        self.model = model
+        self._to_document = {
+            name: "_id" if name == "id" else to_camel_case(name)
+            for name in model.model_fields
+        }
+        self._from_document = {name: name for name in model.model_fields}
+        self._from_document.update({key: name for name, key in self._to_document.items()})
+        self._datetime_fields = frozenset(
+            name
+            for name, field in model.model_fields.items()
+            if field.annotation is dt.datetime
+        )
+        self._list_adapter = pyd.TypeAdapter(List[model])
+
+    def to_document(self, instance: M) -> Dict[str, Any]:
+        document = {}
+        for name, key in self._to_document.items():
+            value = getattr(instance, name)
+            if name in self._datetime_fields:
+                value = Timestamp(int(value.timestamp()), 1)
+            elif key == "_id":
+                value = ObjectId(value)
+            document[key] = value
+        return document
+
+    def _fields(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        fields = {}
+        for key, value in document.items():
+            name = self._from_document.get(key)
+            if name is None:
+                continue
+            if name == "id":
+                value = str(value)
+            elif isinstance(value, Timestamp):
+                value = value.as_datetime()
+            fields[name] = value
+        return fields
+
+    def from_document(self, document: Dict[str, Any]) -> M:
+        return self.model.model_validate(self._fields(document))
+
+    def from_documents(self, documents: Iterable[Dict[str, Any]]) -> List[M]:
+        return self._list_adapter.validate_python([self._fields(document) for document in documents])
@@ -1,14 +1,27 @@
+import asyncio
 import datetime as dt
-from bson import ObjectId, Timestamp
-from typing import Any, Dict, List
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Union
 from typing import Optional
 import pydantic as pyd
 from fastapi import WebSocket
 
+from ..ai.turns import TurnManager
+from ..config import get_cfg
 from ..models.chat import ChatMessage
 from .activity import ActivityModel
-from ..utils import to_camel_case, to_snake_case
-from ..utils.types import LLMModel, SkinType, VoiceGender, VoiceLanguageCode
+from .codec import DocumentCodec
+from ..utils.audio import BufferedTranscriber, StreamingTranscriber
+from ..utils.codecs import AudioFormat
+from ..utils.types import (
+    LLMModel,
+    SkinType,
+    STTEngine,
+    TTSEngine,
+    TurnPolicy,
+    VoiceGender,
+    VoiceLanguageCode,
+)
 
 
 class CommunicationConfig(pyd.BaseModel):
@@ -21,8 +34,17 @@ class CommunicationConfig(pyd.BaseModel):
     llm_model: LLMModel = LLMModel.llama3_2_latest
     voice_language_code: VoiceLanguageCode = VoiceLanguageCode.en_US
     voice_gender: VoiceGender = VoiceGender.MALE
+    stt_language_code: VoiceLanguageCode = VoiceLanguageCode.en_IN
+    stt_engine: STTEngine = STTEngine.google
+    tts_engine: TTSEngine = TTSEngine.google
     custom_prompt_suffix: Optional[str] = None
     subtitles_enabled: bool = True
+    stream_response: bool = False
+    chunked_audio: bool = False
+    turn_policy: TurnPolicy = TurnPolicy.reject
+    response_cache_enabled: bool = False
+    # ObjectId minted when the history was last cleared, older messages are not loaded
+    history_cleared_at: Optional[str] = None
     created_at: dt.datetime = pyd.Field(
         default_factory=lambda: dt.datetime.now(dt.timezone.utc)
     )
@@ -37,52 +59,23 @@ class CommunicationConfig(pyd.BaseModel):
         return created_at.timestamp()
 
     def to_dict(self):
-        json_data = self.model_dump()
-
-        # Handle Mongo Timestamp
-        if isinstance(json_data["created_at"], float):
-            json_data["created_at"] = Timestamp(int(json_data["created_at"]), 1)
-
-        # Convert keys to camelCase
-        data = {to_camel_case(k): v for k, v in json_data.items()}
-
-        # Handle _id for MongoDB
-        if "id" in data:
-            data["_id"] = ObjectId(data.pop("id"))
-
-        # ✅ Ensure customPromptSuffix is camelCased
-        data["customPromptSuffix"] = self.custom_prompt_suffix
-        
-        # ✅ Ensure subtitlesEnabled is camelCased
-        data["subtitlesEnabled"] = self.subtitles_enabled
-
-        return data
+        return _config_codec.to_document(self)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        if "_id" in data:
-            data["id"] = str(data.pop("_id"))
-
-        # Convert camelCase to snake_case
-        json_data = {to_snake_case(k): v for k, v in data.items()}
+        return _config_codec.from_document(data)
 
-        # Convert Mongo Timestamps
-        if isinstance(json_data.get("created_at"), Timestamp):
-            json_data["created_at"] = json_data["created_at"].as_datetime()
-
-        # ✅ Fix: Always map camelCase version if snake_case is missing
-        if "custom_prompt_suffix" not in json_data:
-            if "customPromptSuffix" in data:
-                json_data["custom_prompt_suffix"] = data["customPromptSuffix"]
+    @classmethod
+    def from_dicts(cls, documents: Iterable[Dict[str, Any]]) -> List["CommunicationConfig"]:
+        return _config_codec.from_documents(documents)
 
-        # ✅ Fix: Always map camelCase version if snake_case is missing
-        if "subtitles_enabled" not in json_data:
-            if "subtitlesEnabled" in data:
-                json_data["subtitles_enabled"] = data["subtitlesEnabled"]
 
-        return cls(**json_data)
+_config_codec = DocumentCodec(CommunicationConfig)
 
 
+# rough in-memory cost of a session and of each history message on top of its text
+SESSION_OVERHEAD_BYTES = 4096
+MESSAGE_OVERHEAD_BYTES = 700
 
 
 # dict of live communications (and chat history) with bot client and a controlpanel client
@@ -90,18 +83,60 @@ class LiveCommunication:
     def __init__(
         self,
         config: CommunicationConfig,
-        history: List[ChatMessage] = [],
+        history: Optional[List[ChatMessage]] = None,
     ):
         self.bot_client = None
+        self.bot_binary_audio = False
+        self.bot_output_formats = None
+        self.bot_input_formats = None
         self.controlpanel_client = None
         self.config = config
-        self.processing_request = False
-        self.chat_history = history
+        self.turns = TurnManager(get_cfg().turn_queue_max)
+        # a fresh list per session, a shared default would leak turns across sessions
+        self.chat_history = history if history is not None else []
+        self.history_cursor = None
+        self.audio_stream = None
+        self.history_summary = None
+        self.summary_upto = 0
+        self.summary_task = None
+        self.window_start = 0
+        # history already counted by estimated_bytes
+        self._sized_history: Optional[List[ChatMessage]] = None
+        self._sized_count = 0
+        self._history_bytes = 0
+
+    def estimated_bytes(self) -> int:
+        """
+        Approximate memory held by the session, dominated by its history.
+        History is only appended to or replaced, so only new messages are
+        measured.
+        """
+        history = self.chat_history
+        if history is not self._sized_history or len(history) < self._sized_count:
+            self._sized_history, self._sized_count, self._history_bytes = history, 0, 0
+        for message in history[self._sized_count :]:
+            self._history_bytes += MESSAGE_OVERHEAD_BYTES + len(message.message)
+        self._sized_count = len(history)
+        return SESSION_OVERHEAD_BYTES + self._history_bytes + len(self.history_summary or "")
 
     bot_client: WebSocket
+    # negotiated by the connected bot with HELLO, see utils.frames
+    bot_binary_audio: bool
+    # audio formats the connected bot advertised with HELLO, None if it did not
+    bot_output_formats: Optional[List[str]]
+    bot_input_formats: Optional[List[AudioFormat]]
     controlpanel_client: WebSocket
     config: CommunicationConfig
-    processing_request: bool
+    turns: TurnManager
+    audio_stream: Optional[Union[StreamingTranscriber, BufferedTranscriber]]
     chat_history: List[ChatMessage]
+    # page cursor of the stored messages older than chat_history, None if it holds them all
+    history_cursor: Optional[str]
+    # rolling summary of history evicted from the LLM window
+    history_summary: Optional[str]
+    summary_upto: int
+    # absolute chat_history index the stable prompt window starts at
+    window_start: int
+    summary_task: Optional[asyncio.Task]
     activity_data: List[ActivityModel]
     custom_prompt_suffix: Optional[str] = None
@@ -1,10 +1,10 @@
 import datetime as dt
-from bson import ObjectId, Timestamp
-from typing import Any, Dict, Optional
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Optional
 import pydantic as pyd
 
-from ..utils import to_camel_case, to_snake_case
 from ..utils.types import LLMModel
+from .codec import DocumentCodec
 
 class PromptModel(pyd.BaseModel):
     id: str = pyd.Field(default_factory=lambda: str(ObjectId()))
@@ -27,31 +27,16 @@ class PromptModel(pyd.BaseModel):
         return created_at.timestamp()
 
     def to_dict(self):
-        json_data = self.model_dump()
-
-        # Handle Mongo Timestamp
-        if isinstance(json_data["created_at"], float):
-            json_data["created_at"] = Timestamp(int(json_data["created_at"]), 1)
-
-        # Convert keys to camelCase
-        data = {to_camel_case(k): v for k, v in json_data.items()}
-
-        # Handle _id for MongoDB
-        if "id" in data:
-            data["_id"] = ObjectId(data.pop("id"))
-
-        return data
+        return _codec.to_document(self)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]):
-        if "_id" in data:
-            data["id"] = str(data.pop("_id"))
+        return _codec.from_document(data)
 
-        # Convert camelCase to snake_case
-        json_data = {to_snake_case(k): v for k, v in data.items()}
+    @classmethod
+    def from_dicts(cls, documents: Iterable[Dict[str, Any]]) -> List["PromptModel"]:
+        """Validate a whole query result in one pass"""
+        return _codec.from_documents(documents)
 
-        # Convert Mongo Timestamps
-        if isinstance(json_data.get("created_at"), Timestamp):
-            json_data["created_at"] = json_data["created_at"].as_datetime()
 
-        return cls(**json_data) 
\ No newline at end of file
+_codec = DocumentCodec(PromptModel)
@@ -1,25 +1,29 @@
 from enum import Enum
 
-from loguru import logger
-from pymongo import MongoClient, database
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from starlette.requests import HTTPConnection
 
-from .config import get_cfg
-from .utils import Depends
+from .config import Config
 
-mongo_client: MongoClient = None
+# code of a write error caused by a unique index, in bulk write error details
+DUPLICATE_KEY_ERROR = 11000
 
 
-def get_db() -> database.Database:
-    global mongo_client
-    cfg = get_cfg()  # 👈 manually call it
+def create_mongo_client(cfg: Config) -> AsyncMongoClient:
+    # connects lazily, Clients.start pings it once the app starts
+    return AsyncMongoClient(
+        cfg.mongodb_url,
+        maxPoolSize=cfg.mongodb_max_pool_size,
+        minPoolSize=cfg.mongodb_min_pool_size,
+        maxIdleTimeMS=cfg.mongodb_max_idle_time_ms,
+        waitQueueTimeoutMS=cfg.mongodb_wait_queue_timeout_ms,
+        serverSelectionTimeoutMS=cfg.mongodb_server_selection_timeout_ms,
+    )
 
-    if mongo_client is None:
-        try:
-            mongo_client = MongoClient(cfg.mongodb_url)
-            logger.info("Connection to MongoDB successful!")
-        except:
-            logger.exception("Connection to MongoDB failed!")
-    return mongo_client.get_database(cfg.db_name)
+
+def get_db(connection: HTTPConnection) -> AsyncDatabase:
+    return connection.app.state.clients.db
 
 
 class Collections(str, Enum):
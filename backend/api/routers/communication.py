@@ -1,18 +1,42 @@
+import asyncio
 from http import HTTPStatus
-from typing import List
+from typing import Any, Dict, List, Optional
 from fastapi import Request
 import pydantic as pyd
 from fastapi import APIRouter, HTTPException
-from pymongo import database
+from pymongo.asynchronous.database import AsyncDatabase
 
 from .socket import live_communications, LiveCommunication
-from ..crud.communication_crud import create_communication
+from ..ai.residency import ModelResidency, get_model_residency
+from ..ai.response_cache import ResponseCache, get_response_cache
+from ..crud.chat_crud import get_chat_history_page
+from ..crud.communication_crud import (
+    clear_communication_history,
+    create_communication,
+    create_communications,
+    get_communication_by_public_id,
+    public_id_stats,
+)
+from ..config import get_cfg
 from ..mongodb import get_db, Collections
+from ..sessions.registry import SessionRegistry, get_session_registry
+from ..sessions.store import SessionStore, get_session_store
 from ..utils import Depends
-from ..utils.types import LLMModel, VoiceGender, VoiceLanguageCode
+from ..utils.audio import get_t2s_client, prewarm_tts
+from ..utils.tts_cache import TTSCache, get_tts_cache
+from ..utils.types import (
+    LLMModel,
+    STTEngine,
+    TTSEngine,
+    VoiceGender,
+    VoiceLanguageCode,
+)
 
 router = APIRouter(prefix="/api")
 
+# keep references to fire-and-forget tasks so they are not garbage collected
+_background_tasks = set()
+
 
 class RegisterResponse(pyd.BaseModel):
     communication_id: str
@@ -20,13 +44,18 @@ class RegisterResponse(pyd.BaseModel):
 
 @router.post("/create-communication", status_code=HTTPStatus.CREATED)
 async def post_create_communication(
-    db: database.Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
+    t2s_client=Depends(get_t2s_client),
+    cfg=Depends(get_cfg),
+    registry: SessionRegistry = Depends(get_session_registry),
+    model_residency: ModelResidency = Depends(get_model_residency),
+    tts_cache: Optional[TTSCache] = Depends(get_tts_cache),
 ) -> RegisterResponse:
     """
     Register a communication. This request must be made from control panel.
     """
 
-    config = create_communication(db)
+    config = await create_communication(db)
 
     if config is None or config.public_id is None:
         raise HTTPException(
@@ -34,18 +63,73 @@ async def post_create_communication(
             detail="Communication creation failed!",
         )
 
-    # ✅ Load saved suffix from DB (if exists)
-    doc = db.get_collection(Collections.communications).find_one({"publicId": config.public_id})
-    suffix = doc.get("customPromptSuffix", "") if doc else ""
-
-    # ✅ Store it in memory
+    # ✅ Store it in memory, owned by this worker
+    await registry.claim(config.public_id)
     live_comm = LiveCommunication(config=config)
-    live_comm.custom_prompt_suffix = suffix
+    live_comm.custom_prompt_suffix = config.custom_prompt_suffix or ""
     live_communications[config.public_id] = live_comm
+    model_residency.preload(config.llm_model)
+
+    # synthesize the session's scripted lines before the participant needs them
+    if tts_cache is not None and cfg.tts_prewarm_phrases:
+        task = asyncio.create_task(
+            prewarm_tts(
+                cfg.tts_prewarm_phrases,
+                t2s_client,
+                config.voice_language_code,
+                config.voice_gender,
+                config.tts_engine,
+                tts_cache,
+            )
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
     return RegisterResponse(communication_id=config.public_id)
 
 
+class BatchRegisterRequest(pyd.BaseModel):
+    count: int = pyd.Field(gt=0)
+
+
+class BatchRegisterResponse(pyd.BaseModel):
+    communication_ids: List[str]
+
+
+@router.post("/create-communications", status_code=HTTPStatus.CREATED)
+async def post_create_communications(
+    request: BatchRegisterRequest,
+    db: AsyncDatabase = Depends(get_db),
+    cfg=Depends(get_cfg),
+) -> BatchRegisterResponse:
+    """
+    Register the communications of a study cohort at once. They are only
+    stored; each one is loaded when its bot or control panel connects.
+    """
+    if request.count > cfg.communication_batch_max:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"At most {cfg.communication_batch_max} communications per request",
+        )
+
+    # ids that could not be allocated are left out, the others are stored
+    configs = await create_communications(db, request.count)
+    if not configs:
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail="Communication creation failed!",
+        )
+    return BatchRegisterResponse(communication_ids=[config.public_id for config in configs])
+
+
+@router.get("/public-id-stats", status_code=HTTPStatus.OK)
+async def get_public_id_stats() -> Dict[str, Any]:
+    """
+    Gets how many public ids were allocated and how often a drawn id was taken
+    """
+    return public_id_stats()
+
+
 from fastapi import Body
 
 
@@ -53,36 +137,86 @@ class GetConfigResponse(pyd.BaseModel):
     models: List[str]
     voices: List[str]
     genders: List[str]
+    stt_engines: List[str]
+    tts_engines: List[str]
 
 
 @router.get("/controlpanel-config", status_code=HTTPStatus.OK)
-async def get_controlpanel_config() -> GetConfigResponse:
+async def get_controlpanel_config(cfg=Depends(get_cfg)) -> GetConfigResponse:
     """
-    Gets list of available models, voices and voice genders
+    Gets list of available models, voices, voice genders and the speech
+    engines enabled in Config
     """
 
     return GetConfigResponse(
         models=sorted([type.value for type in LLMModel]),
         voices=sorted([type.value for type in VoiceLanguageCode]),
         genders=sorted([type.value for type in VoiceGender]),
+        stt_engines=[type.value for type in STTEngine if type.value in cfg.stt_engines],
+        tts_engines=[type.value for type in TTSEngine if type.value in cfg.tts_engines],
     )
+
+@router.get("/tts-cache-stats", status_code=HTTPStatus.OK)
+async def get_tts_cache_stats(
+    cache: Optional[TTSCache] = Depends(get_tts_cache),
+) -> Dict[str, Any]:
+    """
+    Gets hit/miss counters and size of the synthesized audio cache
+    """
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/llm-response-cache-stats", status_code=HTTPStatus.OK)
+async def get_llm_response_cache_stats(
+    cache: Optional[ResponseCache] = Depends(get_response_cache),
+) -> Dict[str, Any]:
+    """
+    Gets hit/miss counters and size of the LLM response cache
+    """
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/session-stats", status_code=HTTPStatus.OK)
+async def get_session_stats(
+    session_store: SessionStore = Depends(get_session_store),
+) -> Dict[str, Any]:
+    """
+    Gets the live sessions held by this worker, their estimated size and
+    eviction counters
+    """
+    return session_store.stats()
+
+
+@router.get("/llm-residency", status_code=HTTPStatus.OK)
+async def get_llm_residency(
+    model_residency: ModelResidency = Depends(get_model_residency),
+) -> Dict[str, Any]:
+    """
+    Gets the models loaded in Ollama and the ones live sessions use
+    """
+    return model_residency.status()
+
+
 # backend/api/routers/communication.py or socket.py
 @router.post("/set-prompt-suffix")
 async def set_prompt_suffix(
     request: Request,
-    db: database.Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
+    registry: SessionRegistry = Depends(get_session_registry),
 ):
     data = await request.json()
     comm_id = data.get("communication_id")
     suffix = data.get("suffix")
 
         # 1. Save to in-memory object
-    if comm_id in live_communications:
-        live_communications[comm_id].custom_prompt_suffix = suffix
-        live_communications[comm_id].config.custom_prompt_suffix = suffix  # 🔥 important!
+    await registry.dispatch(comm_id, "set_prompt_suffix", {"suffix": suffix})
 
     # 2. Persist in MongoDB
-    db.get_collection(Collections.communications).update_one(
+    await db.get_collection(Collections.communications).update_one(
         {"publicId": comm_id},
         {"$set": {"customPromptSuffix": suffix}},
     )
@@ -92,33 +226,58 @@ async def set_prompt_suffix(
     return {"message": "Prompt suffix updated successfully"}
 
 @router.post("/set-subtitles-enabled")
-async def set_subtitles_enabled(request: Request, db: database.Database = Depends(get_db)):
+async def set_subtitles_enabled(
+    request: Request,
+    db: AsyncDatabase = Depends(get_db),
+    registry: SessionRegistry = Depends(get_session_registry),
+):
     data = await request.json()
     comm_id = data.get("communication_id")
     enabled = data.get("enabled")
     if comm_id is None or enabled is None:
         raise HTTPException(status_code=400, detail="Missing communication_id or enabled")
-    result = db.get_collection(Collections.communications).update_one(
+    result = await db.get_collection(Collections.communications).update_one(
         {"publicId": comm_id},
         {"$set": {"subtitlesEnabled": enabled}},
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Communication ID not found")
-    # WebSocket push to bot if connected
-    comm = live_communications.get(comm_id)
-    if comm and comm.bot_client:
-        try:
-            await comm.bot_client.send_json({
-                "type": "SUBTITLES_TOGGLE",
-                "enabled": enabled
-            })
-        except Exception as e:
-            print(f"Failed to send SUBTITLES_TOGGLE to bot: {e}")
+    # WebSocket push to bot if connected, on whichever worker owns the session
+    await registry.dispatch(comm_id, "set_subtitles_enabled", {"enabled": enabled})
     return {"message": "Subtitles setting updated"}
 
+@router.get("/chat-history", status_code=HTTPStatus.OK)
+async def get_chat_history(
+    communication_id: str,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncDatabase = Depends(get_db),
+    cfg=Depends(get_cfg),
+) -> Dict[str, Any]:
+    """
+    Gets a page of stored chat messages, oldest first. Without `before` the
+    most recent messages are returned; pass the returned `next_cursor` as
+    `before` for the page preceding them.
+    """
+    config = await get_communication_by_public_id(db, communication_id)
+    if config is None:
+        raise HTTPException(status_code=404, detail="Communication not found")
+    limit = min(limit or cfg.history_page_max, cfg.history_page_max)
+    try:
+        messages, next_cursor = await get_chat_history_page(
+            db, config.id, limit, before, config.history_cleared_at
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
+    return {
+        "messages": [message.model_dump(mode="json") for message in messages],
+        "next_cursor": next_cursor,
+    }
+
+
 @router.get("/get-communication-config")
-async def get_communication_config(communication_id: str, db: database.Database = Depends(get_db)):
-    doc = db.get_collection(Collections.communications).find_one({"publicId": communication_id})
+async def get_communication_config(communication_id: str, db: AsyncDatabase = Depends(get_db)):
+    doc = await db.get_collection(Collections.communications).find_one({"publicId": communication_id})
     if not doc:
         raise HTTPException(status_code=404, detail="Communication not found")
     return {
@@ -127,14 +286,19 @@ async def get_communication_config(communication_id: str, db: database.Database
     }
 
 @router.post("/clear-history")
-async def clear_history(request: Request, db: database.Database = Depends(get_db)):
+async def clear_history(
+    request: Request,
+    db: AsyncDatabase = Depends(get_db),
+    registry: SessionRegistry = Depends(get_session_registry),
+):
     data = await request.json()
     comm_id = data.get("communication_id")
     if not comm_id:
         raise HTTPException(status_code=400, detail="Missing communication_id")
+    # Persist the clear, an evicted session is restored from the database
+    cleared_at = await clear_communication_history(db, comm_id)
+    if cleared_at is None:
+        raise HTTPException(status_code=404, detail="Communication ID not found")
     # Clear in-memory chat history
-    if comm_id in live_communications:
-        live_communications[comm_id].chat_history = []
-    # Clear in database (if you store chat history in DB, add code here)
-    # db.get_collection(Collections.chats).delete_many({"communication_id": comm_id})
+    await registry.dispatch(comm_id, "clear_history", {"cleared_at": cleared_at})
     return {"message": "Chat history cleared"}
\ No newline at end of file
@@ -0,0 +1,35 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from ..clients import Clients, get_clients
+from ..utils import Depends
+from ..utils.metrics import registry
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Per-stage latency histograms and load gauges of this worker in the
+    Prometheus text exposition format
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/health")
+async def get_health(clients: Clients = Depends(get_clients)) -> JSONResponse:
+    """
+    Reachability of MongoDB, Ollama and the Google speech services; 503 when
+    any of them is down
+    """
+    checks = await clients.health()
+    healthy = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        {"status": "ok" if healthy else "degraded", "clients": checks},
+        status_code=HTTPStatus.OK if healthy else HTTPStatus.SERVICE_UNAVAILABLE,
+    )
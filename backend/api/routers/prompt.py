@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Request, HTTPException
 from http import HTTPStatus
-from pymongo.database import Database
+from pymongo.asynchronous.database import AsyncDatabase
 from loguru import logger
 
 from ..ai.prompts import get_prompt
@@ -16,7 +16,7 @@ router = APIRouter(tags=["Prompt"])
 @router.post("/generate")
 async def generate_prompt(
     request: Request,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
 ):
     try:
         data = await request.json()
@@ -33,7 +33,7 @@ async def generate_prompt(
             )
 
         # Get communication config from communications collection
-        doc = db.get_collection(Collections.communications).find_one({"publicId": communication_id})
+        doc = await db.get_collection(Collections.communications).find_one({"publicId": communication_id})
         logger.info(f"Found communication config: {doc}")
         
         if not doc:
@@ -78,7 +78,7 @@ async def generate_prompt(
             llm_model=llm_model,
         )
         
-        saved_prompt = create_prompt(db, prompt)
+        saved_prompt = await create_prompt(db, prompt)
         if not saved_prompt:
             logger.error("Failed to save prompt to database")
             raise HTTPException(
@@ -102,7 +102,7 @@ async def generate_prompt(
 @router.post("/set-prompt-suffix")
 async def set_prompt_suffix(
     request: Request,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
 ):
     data = await request.json()
     comm_id = data.get("communication_id")
@@ -114,7 +114,7 @@ async def set_prompt_suffix(
             detail="Missing communication_id or suffix"
         )
 
-    result = db.get_collection(Collections.communications).update_one(
+    result = await db.get_collection(Collections.communications).update_one(
         {"publicId": comm_id},
         {"$set": {"customPromptSuffix": suffix}},
     )
@@ -1,29 +1,53 @@
 import asyncio
-from typing import Any, Dict, Union
+import base64
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
 
 import pydantic as pyd
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from fastapi import APIRouter, FastAPI, WebSocket, WebSocketDisconnect, Query
 from google.cloud import speech_v1, texttospeech
 from loguru import logger
-from pymongo import database
-
-from ..ai.pipeline import process_user_audio, process_user_text, process_user_audio_with_llm, process_user_text_with_llm
+from pymongo.asynchronous.database import AsyncDatabase
+
+from ..ai.ollama import OllamaClient, get_llm_client
+from ..ai.residency import ModelResidency, get_model_residency
+from ..ai.pipeline import (
+    accepts_input,
+    input_format,
+    output_encoding,
+    process_user_audio_with_llm,
+    process_user_text_with_llm,
+    process_user_transcript_with_llm,
+)
 from ..config import get_cfg
-from ..crud.chat_crud import get_chat_history
+from ..crud.chat_crud import get_chat_history_page
+from ..crud.chat_writer import ChatWriter, get_chat_writer
 from ..crud.communication_crud import (
     get_communication_by_public_id,
     update_communication_by_public_id,
 )
 from ..models.communication import CommunicationConfig, LiveCommunication
-from ..mongodb import get_db, Collections
-from ..utils import Depends
-from ..utils.audio import get_s2t_client, get_t2s_client
+from ..mongodb import get_db
+from ..sessions.registry import (
+    AttachHandler,
+    RelayedWebSocket,
+    SessionRegistry,
+    UpdateHandler,
+    get_session_registry,
+)
+from ..sessions.store import SessionStore
+from ..utils import Depends, metrics
+from ..utils.audio import get_s2t_client, get_t2s_client, open_transcriber
+from ..utils.codecs import LEGACY_INPUT_FORMAT, AudioFormat, parse_formats
+from ..utils.frames import Frame, FrameType, decode_frame, encode_frame
+from ..utils.tts_cache import TTSCache, get_tts_cache
 from ..utils.types import (
     ReceiveBotMessage,
     ReceiveControlPanelMessage,
     SendBotMessage,
     SendControlPanelMessage,
     SendGenericMessage,
+    TurnPolicy,
 )
 
 router = APIRouter(prefix="/api")
@@ -32,24 +56,65 @@ class WebSocketResponse(pyd.BaseModel):
     type: str
     data: Dict[str, Any]
 
-# ongoing communications
-live_communications: Dict[str, LiveCommunication] = {}
+# ongoing communications, cold ones are evicted and restored from MongoDB
+live_communications = SessionStore.from_config(get_cfg())
+metrics.LIVE_SESSIONS.set_function(lambda: len(live_communications))
+metrics.LIVE_SESSION_BYTES.set_function(lambda: live_communications.resident_bytes)
 
 @router.websocket("/ws/communication/{communication_id}")
 async def communicate(
     websocket: WebSocket,
     communication_id: str,
     client_identifier: str = Query(None),
-    db: database.Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     s2t_client=Depends(get_s2t_client),
     t2s_client=Depends(get_t2s_client),
-    cfg=Depends(get_cfg),
+    llm_client: OllamaClient = Depends(get_llm_client),
+    tts_cache: Optional[TTSCache] = Depends(get_tts_cache),
+    chat_writer: ChatWriter = Depends(get_chat_writer),
+    registry: SessionRegistry = Depends(get_session_registry),
+    model_residency: ModelResidency = Depends(get_model_residency),
 ) -> WebSocketResponse:
     await websocket.accept()
 
+    owner = await registry.claim(communication_id)
+    if not registry.is_local(owner):
+        # another worker holds this session, forward the client to it
+        return await registry.proxy(websocket, communication_id, owner, client_identifier)
+
+    await _run_session(
+        websocket,
+        communication_id,
+        client_identifier,
+        registry,
+        db,
+        s2t_client,
+        t2s_client,
+        llm_client,
+        tts_cache,
+        chat_writer,
+        model_residency,
+    )
+
+
+async def _run_session(
+    websocket: Union[WebSocket, RelayedWebSocket],
+    communication_id: str,
+    client_identifier: str,
+    registry: SessionRegistry,
+    db: AsyncDatabase,
+    s2t_client: speech_v1.SpeechClient,
+    t2s_client: texttospeech.TextToSpeechClient,
+    llm_client: OllamaClient,
+    tts_cache: Optional[TTSCache],
+    chat_writer: ChatWriter,
+    model_residency: ModelResidency,
+):
+    """Serve one client connection of a session owned by this worker"""
     if communication_id not in live_communications:
-        db_comm = get_communication_by_public_id(db, communication_id)
+        db_comm = await get_communication_by_public_id(db, communication_id)
         if db_comm is None:
+            await registry.release(communication_id)
             return await _close_websocket(
                 websocket,
                 SendGenericMessage.INVALID_COMMUNICATION_ID,
@@ -57,16 +122,18 @@ async def communicate(
             )
         print("Restored suffix from DB:", db_comm.custom_prompt_suffix)
 
-        history = get_chat_history(db, db_comm.id)
-
-        # fetch suffix manually if not present on db_comm
-        suffix = db.get_collection(Collections.communications).find_one({"publicId": communication_id})
-        prompt_suffix = suffix.get("customPromptSuffix", "") if suffix else ""
+        # only the recent turns, older ones are paged in on request
+        history, history_cursor = await get_chat_history_page(
+            db, db_comm.id, get_cfg().history_restore_limit, cleared_at=db_comm.history_cleared_at
+        )
 
         live_comm = LiveCommunication(config=db_comm, history=history)
+        live_comm.history_cursor = history_cursor
         live_comm.custom_prompt_suffix = db_comm.custom_prompt_suffix
-        live_communications[communication_id] = live_comm
-        print("Restoring suffix from DB:", db_comm.custom_prompt_suffix)
+        # the other client of the session may have restored it while we awaited
+        if live_communications.setdefault(communication_id, live_comm) is live_comm:
+            model_residency.preload(db_comm.llm_model)
+            print("Restoring suffix from DB:", db_comm.custom_prompt_suffix)
 
     communication: LiveCommunication = live_communications.get(communication_id)
 
@@ -93,6 +160,10 @@ async def communicate(
                     "New bot connection detected.",
                 )
             communication.bot_client = websocket
+            # binary audio and formats are negotiated again by every bot connection
+            communication.bot_binary_audio = False
+            communication.bot_output_formats = None
+            communication.bot_input_formats = None
             if communication.controlpanel_client:
                 await _send_message(
                     communication.controlpanel_client,
@@ -116,22 +187,47 @@ async def communicate(
 
     try:
         while True:
-            data = await websocket.receive_json()
+            message = await websocket.receive()
+            live_communications.touch(communication_id)
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                if client_identifier != "bot":
+                    continue
+                if communication.bot_binary_audio:
+                    await _handle_bot_frame(
+                        chat_writer,
+                        communication,
+                        websocket,
+                        message["bytes"],
+                        s2t_client,
+                        t2s_client,
+                        llm_client,
+                        tts_cache,
+                    )
+                elif communication.audio_stream:
+                    # raw audio frames of an utterance streamed by the bot
+                    communication.audio_stream.feed(message["bytes"])
+                continue
+
+            data = json.loads(message["text"])
             if client_identifier == "bot":
                 await _handle_bot_messages(
-                    db,
+                    chat_writer,
                     communication,
                     websocket,
                     communication.controlpanel_client,
                     data,
                     s2t_client,
                     t2s_client,
-                    cfg.llm_url,
+                    llm_client,
+                    tts_cache,
                 )
                 continue
 
             await _handle_controlpanel_messages(
                 db,
+                model_residency,
                 communication,
                 websocket,
                 communication.bot_client,
@@ -139,34 +235,95 @@ async def communicate(
             )
 
     except WebSocketDisconnect:
-        if client_identifier == "bot":
-            communication.bot_client = None
-        elif client_identifier == "controlpanel":
-            communication.controlpanel_client = None
-
-        if (
-            communication.controlpanel_client is None
-            and communication.bot_client is None
-        ):
-            live_communications.pop(communication_id, None)
-            logger.info("Popping out live communication.")
-
         logger.debug("Client disconnected")
-
     except Exception as e:
         logger.exception(e)
+    finally:
+        _detach_client(communication, websocket, client_identifier)
+        # stays resident while cold, until the session store evicts it
+        live_communications.touch(communication_id)
     logger.info(f"Loaded communication {communication_id} with suffix: {communication.custom_prompt_suffix}")
 
 
+def _detach_client(
+    communication: LiveCommunication,
+    websocket: Union[WebSocket, RelayedWebSocket],
+    client_identifier: str,
+):
+    """Forget a closed connection, unless a newer client already replaced it"""
+    if client_identifier == "bot" and communication.bot_client is websocket:
+        communication.bot_client = None
+        # nobody is left to hear the reply
+        communication.turns.cancel()
+        if communication.audio_stream is not None:
+            communication.audio_stream.cancel()
+            communication.audio_stream = None
+    elif client_identifier == "controlpanel" and communication.controlpanel_client is websocket:
+        communication.controlpanel_client = None
+
+
+def session_handlers(app: FastAPI) -> Tuple[AttachHandler, UpdateHandler]:
+    """
+    Callbacks the session registry uses to serve clients relayed from other
+    workers and to apply session updates on the owning worker.
+    """
+
+    async def attach(websocket: RelayedWebSocket, communication_id: str, client_identifier: str):
+        clients = app.state.clients
+        await _run_session(
+            websocket,
+            communication_id,
+            client_identifier,
+            app.state.session_registry,
+            clients.db,
+            clients.s2t,
+            clients.t2s,
+            clients.llm,
+            clients.tts_cache,
+            app.state.chat_writer,
+            app.state.model_residency,
+        )
+
+    async def update(communication_id: str, action: str, data: Dict[str, Any]):
+        communication = live_communications.get(communication_id)
+        if communication is None:
+            return
+
+        match action:
+            case "set_prompt_suffix":
+                communication.custom_prompt_suffix = data["suffix"]
+                communication.config.custom_prompt_suffix = data["suffix"]  # 🔥 important!
+            case "set_subtitles_enabled":
+                communication.config.subtitles_enabled = data["enabled"]
+                if communication.bot_client:
+                    try:
+                        await communication.bot_client.send_json({
+                            "type": "SUBTITLES_TOGGLE",
+                            "enabled": data["enabled"],
+                        })
+                    except Exception as e:
+                        print(f"Failed to send SUBTITLES_TOGGLE to bot: {e}")
+            case "clear_history":
+                communication.config.history_cleared_at = data.get("cleared_at")
+                communication.chat_history = []
+                communication.history_cursor = None
+                communication.history_summary = None
+                communication.summary_upto = 0
+                communication.window_start = 0
+
+    return attach, update
+
+
 async def _handle_bot_messages(
-    db: database.Database,
+    chat_writer: ChatWriter,
     communication: LiveCommunication,
     bot_client: WebSocket,
     controlpanel: WebSocket,
     blob: Dict[str, Any],
     s2t_client: speech_v1.SpeechClient,
     t2s_client: texttospeech.TextToSpeechClient,
-    llm_url: str,
+    llm_client: OllamaClient,
+    tts_cache: Optional[TTSCache],
 ):
     try:
         message_type = ReceiveBotMessage[blob["type"]]
@@ -182,60 +339,112 @@ async def _handle_bot_messages(
     send_to_cp, send_to_cp_type = None, None
 
     match message_type:
+        case ReceiveBotMessage.HELLO:
+            try:
+                output_formats = data.get("output_formats")
+                input_formats = data.get("input_formats")
+                communication.bot_output_formats = (
+                    [f.encoding for f in parse_formats(output_formats)] if output_formats else None
+                )
+                communication.bot_input_formats = parse_formats(input_formats) if input_formats else None
+                communication.bot_binary_audio = bool(data.get("binary_audio", False))
+                send_to_bot_type = SendBotMessage.HELLO
+                send_to_bot = _hello(communication)
+            except (KeyError, TypeError, ValueError) as e:
+                send_to_bot_type = SendGenericMessage.ERROR
+                send_to_bot = {"message": f"Invalid audio formats: {e}"}
+
         case ReceiveBotMessage.SEND_AUDIO:
-            if not communication.processing_request:
-                communication.processing_request = True
-                result = await asyncio.get_running_loop().run_in_executor(
-                    None,
-                    process_user_audio_with_llm,
-                    db,
+            if "encoding" in data:
+                audio_format = AudioFormat(
+                    str(data["encoding"]).upper(), data.get("sample_rate_hertz", 16000)
+                )
+            else:
+                audio_format = input_format(communication) or LEGACY_INPUT_FORMAT
+            if not accepts_input(communication, audio_format.encoding):
+                error = f"Unsupported audio encoding: {data.get('encoding')}"
+            else:
+                error = _start_audio_turn(
+                    chat_writer,
                     communication,
                     data["audio"],
+                    audio_format,
                     s2t_client,
                     t2s_client,
-                    llm_url,
-                    _send_message,
+                    llm_client,
+                    tts_cache,
                 )
-                communication.processing_request = False
-                
-                if result:  # Only send if we got a valid LLM response
-                    send_to_bot_type = SendBotMessage.AUDIO_RESPONSE
-                    send_to_bot = {
-                        "response": result["audio"],
-                        "content": result["text"],
-                        "user_query": result.get("user_query"),
-                        "fixed_prompt": result.get("fixed_prompt"),
-                    }
-            else:
+            if error:
                 send_to_bot_type = SendGenericMessage.ERROR
-                send_to_bot = {"message": "Request already in progress!"}
+                send_to_bot = {"message": error}
 
         case ReceiveBotMessage.SEND_TEXT:
-            if not communication.processing_request:
-                communication.processing_request = True
-                result = await asyncio.get_running_loop().run_in_executor(
-                    None,
-                    process_user_text_with_llm,
-                    db,
+            error = _start_turn(
+                communication,
+                lambda: process_user_text_with_llm(
+                    chat_writer,
                     communication,
                     data["text"],
                     t2s_client,
-                    llm_url,
-                    _send_message,
-                )
-                communication.processing_request = False
-                
-                if result:  # Only send if we got a valid LLM response
-                    send_to_bot_type = SendBotMessage.AUDIO_RESPONSE
-                    send_to_bot = {
-                        "response": result["audio"],
-                        "content": result["text"],
-                        "user_query": result.get("user_query"),
-                        "fixed_prompt": result.get("fixed_prompt"),
-                    }
+                    llm_client,
+                    _session_sender(communication),
+                    tts_cache=tts_cache,
+                ),
+            )
+            if error:
+                send_to_bot_type = SendGenericMessage.ERROR
+                send_to_bot = {"message": error}
+
+        case ReceiveBotMessage.START_AUDIO_STREAM:
+            if communication.audio_stream is not None:
+                communication.audio_stream.cancel()
+            if communication.config.turn_policy == TurnPolicy.latest:
+                # the participant talks over the robot, stop working on the old turn
+                await _cancel_turns(communication, "barge_in")
+            communication.audio_stream = None
+            stream_format = input_format(communication) or AudioFormat("WEBM_OPUS", 48000)
+            encoding = str(data.get("encoding", stream_format.encoding)).upper()
+            if not accepts_input(communication, encoding):
+                send_to_bot_type = SendGenericMessage.ERROR
+                send_to_bot = {"message": f"Unsupported audio encoding: {data.get('encoding')}"}
             else:
+                communication.audio_stream = open_transcriber(
+                    s2t_client,
+                    communication.config.stt_engine,
+                    communication.config.stt_language_code,
+                    encoding=encoding,
+                    sample_rate_hertz=data.get("sample_rate_hertz", stream_format.sample_rate_hertz),
+                    on_transcript=_transcript_forwarder(communication),
+                )
+
+        case ReceiveBotMessage.END_AUDIO_STREAM:
+            audio_stream = communication.audio_stream
+            communication.audio_stream = None
+            if audio_stream is None:
                 send_to_bot_type = SendGenericMessage.ERROR
-                send_to_bot = {"message": "Request already in progress!"}
+                send_to_bot = {"message": "No audio stream in progress!"}
+            else:
+
+                async def process_stream():
+                    transcript = await audio_stream.finish()
+                    return await process_user_transcript_with_llm(
+                        chat_writer,
+                        communication,
+                        transcript,
+                        t2s_client,
+                        llm_client,
+                        _session_sender(communication),
+                        tts_cache=tts_cache,
+                    )
+
+                error = _start_turn(communication, process_stream)
+                if error:
+                    audio_stream.cancel()
+                    send_to_bot_type = SendGenericMessage.ERROR
+                    send_to_bot = {"message": error}
+
+        case ReceiveBotMessage.INTERRUPT:
+            await _cancel_turns(communication, "interrupt")
 
     if send_to_bot and send_to_bot_type:
         await _send_message(bot_client, send_to_bot_type, send_to_bot)
@@ -244,8 +453,51 @@ async def _handle_bot_messages(
 
 
 
+async def _handle_bot_frame(
+    chat_writer: ChatWriter,
+    communication: LiveCommunication,
+    bot_client: WebSocket,
+    data: bytes,
+    s2t_client: speech_v1.SpeechClient,
+    t2s_client: texttospeech.TextToSpeechClient,
+    llm_client: OllamaClient,
+    tts_cache: Optional[TTSCache],
+):
+    try:
+        frame: Frame = decode_frame(data)
+    except ValueError as e:
+        return await _send_message(
+            bot_client,
+            SendGenericMessage.ERROR,
+            {"message": f"Invalid audio frame: {e}"},
+        )
+
+    error = None
+    match frame.type:
+        case FrameType.AUDIO:
+            error = _start_audio_turn(
+                chat_writer,
+                communication,
+                frame.payload,
+                input_format(communication) or LEGACY_INPUT_FORMAT,
+                s2t_client,
+                t2s_client,
+                llm_client,
+                tts_cache,
+            )
+        case FrameType.AUDIO_STREAM:
+            if communication.audio_stream:
+                communication.audio_stream.feed(frame.payload)
+        case _:
+            error = f"Unexpected audio frame type: {frame.type.name}"
+
+    if error:
+        await _send_message(bot_client, SendGenericMessage.ERROR, {"message": error})
+
+
 async def _handle_controlpanel_messages(
-    db: database.Database,
+    db: AsyncDatabase,
+    model_residency: ModelResidency,
     communication: LiveCommunication,
     controlpanel: WebSocket,
     bot_client: WebSocket,
@@ -263,6 +515,7 @@ async def _handle_controlpanel_messages(
 
     send_to_bot, send_to_bot_type = None, None
     send_to_cp, send_to_cp_type = None, None
+    renegotiate = False
 
     match message_type:
         case ReceiveControlPanelMessage.UPDATE_CONFIG:
@@ -271,31 +524,266 @@ async def _handle_controlpanel_messages(
                 key: data["config"].get(key, current_config[key])
                 for key in current_config
             }
-            communication.config = CommunicationConfig.model_validate(filtered_config)
-            update_communication_by_public_id(db, communication.config)
+            new_config = CommunicationConfig.model_validate(filtered_config)
+            cfg = get_cfg()
+            if (
+                new_config.stt_engine.value not in cfg.stt_engines
+                or new_config.tts_engine.value not in cfg.tts_engines
+            ):
+                # the engines Config does not enable were never checked at startup
+                return await _send_message(
+                    controlpanel,
+                    SendGenericMessage.ERROR,
+                    {"message": "Speech engine not enabled in Config"},
+                )
+            communication.config = new_config
+            if communication.config.llm_model != current_config["llm_model"]:
+                # load the new model now, not on the participant's next utterance
+                model_residency.preload(communication.config.llm_model)
+            negotiated = (
+                communication.bot_output_formats is not None
+                or communication.bot_input_formats is not None
+            )
+            # the new engines may not handle the formats agreed on before
+            renegotiate = negotiated and (
+                communication.config.stt_engine != current_config["stt_engine"]
+                or communication.config.tts_engine != current_config["tts_engine"]
+            )
+            await update_communication_by_public_id(db, communication.config)
             send_msg = {"config": communication.config.model_dump()}
             send_to_bot_type = SendGenericMessage.SYSTEM_CONFIG
             send_to_bot = send_msg
             send_to_cp_type = SendGenericMessage.SYSTEM_CONFIG
             send_to_cp = send_msg
 
+        case ReceiveControlPanelMessage.INTERRUPT:
+            await _cancel_turns(communication, "interrupt")
+
+        case ReceiveControlPanelMessage.GET_HISTORY:
+            try:
+                await _stream_history(db, communication, controlpanel, data.get("before"), data.get("limit"))
+            except ValueError:
+                send_to_cp_type = SendGenericMessage.ERROR
+                send_to_cp = {"message": "Invalid history cursor"}
+
         case ReceiveControlPanelMessage.PING:
             send_to_cp_type = SendControlPanelMessage.PING_STATE
             send_to_cp = {"is_bot_connected": communication.bot_client is not None}
 
     if bot_client and send_to_bot and send_to_bot_type:
         await _send_message(bot_client, send_to_bot_type, send_to_bot)
+    if bot_client and renegotiate:
+        await _send_message(bot_client, SendBotMessage.HELLO, _hello(communication))
     if send_to_cp and send_to_cp_type:
         await _send_message(controlpanel, send_to_cp_type, send_to_cp)
 
 
+async def _stream_history(
+    db: AsyncDatabase,
+    communication: LiveCommunication,
+    controlpanel: WebSocket,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Send the history held in memory, or the page of stored messages older
+    than `before`, to the control panel in HISTORY_CHUNK messages. The last
+    chunk carries the cursor of the next older page.
+    """
+    cfg = get_cfg()
+    if before:
+        limit = min(limit or cfg.history_page_max, cfg.history_page_max)
+        messages, next_cursor = await get_chat_history_page(
+            db, communication.config.id, limit, before, communication.config.history_cleared_at
+        )
+    else:
+        messages, next_cursor = list(communication.chat_history), communication.history_cursor
+
+    size = cfg.history_chunk_size
+    for start in range(0, max(len(messages), 1), size):
+        done = start + size >= len(messages)
+        await _send_message(
+            controlpanel,
+            SendControlPanelMessage.HISTORY_CHUNK,
+            {
+                "messages": [message.model_dump(mode="json") for message in messages[start : start + size]],
+                "done": done,
+                "next_cursor": next_cursor if done else None,
+            },
+        )
+
+
+def _start_audio_turn(
+    chat_writer: ChatWriter,
+    communication: LiveCommunication,
+    audio: Union[str, bytes],
+    audio_format: AudioFormat,
+    s2t_client: speech_v1.SpeechClient,
+    t2s_client: texttospeech.TextToSpeechClient,
+    llm_client: OllamaClient,
+    tts_cache: Optional[TTSCache],
+) -> Optional[str]:
+    return _start_turn(
+        communication,
+        lambda: process_user_audio_with_llm(
+            chat_writer,
+            communication,
+            audio,
+            s2t_client,
+            t2s_client,
+            llm_client,
+            _session_sender(communication),
+            audio_format,
+            tts_cache=tts_cache,
+        ),
+    )
+
+
+def _hello(communication: LiveCommunication) -> Dict[str, Any]:
+    """What was negotiated with the bot, sent in reply to its HELLO"""
+    audio_format = input_format(communication)
+    return {
+        "binary_audio": communication.bot_binary_audio,
+        "output_encoding": output_encoding(communication),
+        "input_format": audio_format.to_dict() if audio_format else None,
+    }
+
+
+def _start_turn(
+    communication: LiveCommunication,
+    process: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+) -> Optional[str]:
+    """
+    Hand a turn to the session's turn manager and return an error message
+    when its policy does not accept it. The reply is sent by the turn itself.
+    """
+
+    async def turn():
+        result = await process()
+        # Only send if we got a valid LLM response
+        if result and not result.get("chunked") and communication.bot_client:
+            await _send_bot_message(
+                communication,
+                SendBotMessage.AUDIO_RESPONSE,
+                _audio_response(result),
+            )
+
+    policy = communication.config.turn_policy
+    barge_in = policy == TurnPolicy.latest and communication.turns.busy
+    if not communication.turns.submit(turn, policy):
+        if policy == TurnPolicy.queue:
+            return "Turn queue is full!"
+        return "Request already in progress!"
+    if barge_in:
+        _spawn(_notify_cancelled(communication, "barge_in"))
+    return None
+
+
+async def _cancel_turns(communication: LiveCommunication, reason: str):
+    if communication.turns.cancel():
+        await _notify_cancelled(communication, reason)
+
+
+async def _notify_cancelled(communication: LiveCommunication, reason: str):
+    await _session_sender(communication)(SendBotMessage.TURN_CANCELLED, {"reason": reason})
+
+
+# keep references to fire-and-forget tasks so they are not garbage collected
+_background_tasks = set()
+
+
+def _spawn(coroutine):
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _audio_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "response": result["audio"],
+        "content": result["text"],
+        "user_query": result.get("user_query"),
+        "fixed_prompt": result.get("fixed_prompt"),
+        "turn_id": result.get("turn_id"),
+        "encoding": result.get("encoding"),
+        "busy": result.get("busy", False),
+    }
+
+
+def _transcript_forwarder(communication: LiveCommunication) -> Callable:
+    """Forward interim and final transcripts to the control panel"""
+
+    async def forward(text: str, is_final: bool):
+        if communication.controlpanel_client is not None:
+            await _send_message(
+                communication.controlpanel_client,
+                SendControlPanelMessage.TRANSCRIPT,
+                {"text": text, "is_final": is_final},
+            )
+
+    return forward
+
+
+def _session_sender(communication: LiveCommunication) -> Callable:
+    """
+    Build a callback the pipeline can use to push streamed messages to the
+    bot and the control panel of a live communication.
+    """
+
+    async def send(msg_type: SendBotMessage, data: Dict[str, Any]):
+        # control panel only mirrors the message types it declares
+        cp_msg_type = SendControlPanelMessage.__members__.get(msg_type.name)
+        if communication.bot_client is not None:
+            await _send_bot_message(communication, msg_type, data)
+        if communication.controlpanel_client is not None and cp_msg_type is not None:
+            await _send_message(communication.controlpanel_client, cp_msg_type, data)
+
+    return send
+
+
+# bot messages whose "response" field carries audio bytes
+AUDIO_FRAME_TYPES = {
+    SendBotMessage.AUDIO_RESPONSE: FrameType.AUDIO_RESPONSE,
+    SendBotMessage.AUDIO_CHUNK: FrameType.AUDIO_CHUNK,
+}
+
+
+async def _send_bot_message(
+    communication: LiveCommunication,
+    msg_type: SendBotMessage,
+    data: Dict[str, Any],
+):
+    """
+    Send to the bot, with any audio as a binary frame after the JSON message
+    when the bot negotiated it and base64 inside the JSON message otherwise.
+    """
+    bot_client = communication.bot_client
+    frame_type = AUDIO_FRAME_TYPES.get(msg_type)
+    audio = data.get("response") if frame_type else None
+    if not isinstance(audio, bytes):
+        return await _send_message(bot_client, msg_type, data)
+
+    if not communication.bot_binary_audio:
+        data = {**data, "response": base64.b64encode(audio).decode("utf-8")}
+        return await _send_message(bot_client, msg_type, data)
+
+    await _send_message(bot_client, msg_type, {**data, "response": None, "binary": True})
+    frame = encode_frame(frame_type, audio, data.get("seq", 0), data.get("turn_id"))
+    try:
+        with metrics.WS_SEND_SECONDS.time(type=frame_type.name):
+            await bot_client.send_bytes(frame)
+    except Exception:
+        await _close_websocket(bot_client, SendGenericMessage.CLOSE_CONNECTION, "Failed to send audio frame")
+
+
 async def _send_message(
     socket: WebSocket,
     msg_type: Union[SendGenericMessage, SendBotMessage, SendControlPanelMessage],
     data: Dict[str, Any],
 ):
     try:
-        await socket.send_json(WebSocketResponse(type=msg_type, data=data).model_dump())
+        with metrics.WS_SEND_SECONDS.time(type=msg_type):
+            await socket.send_json(WebSocketResponse(type=msg_type, data=data).model_dump())
     except Exception:
         await _close_websocket(socket, SendGenericMessage.CLOSE_CONNECTION, f"Failed to send: {data}")
 
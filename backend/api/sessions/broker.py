@@ -0,0 +1,294 @@
+import asyncio
+import itertools
+import json
+import os
+import struct
+import sys
+import uuid
+from typing import Any, Dict, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from loguru import logger
+
+from .registry import RelayedWebSocket, SessionRegistry
+
+# frame: header length, body length, JSON header, raw body
+_FRAME_PREFIX = struct.Struct("!II")
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes]:
+    header_size, body_size = _FRAME_PREFIX.unpack(
+        await reader.readexactly(_FRAME_PREFIX.size)
+    )
+    header = json.loads(await reader.readexactly(header_size))
+    body = await reader.readexactly(body_size) if body_size else b""
+    return header, body
+
+
+def _write_frame(writer: asyncio.StreamWriter, header: Dict[str, Any], body: bytes = b""):
+    encoded = json.dumps(header).encode("utf-8")
+    writer.write(_FRAME_PREFIX.pack(len(encoded), len(body)) + encoded + body)
+
+
+class SessionBroker:
+    """
+    Local message broker for multi-worker deployments.
+
+    Runs as its own process next to the uvicorn workers and listens on a Unix
+    socket. It keeps the session ownership table and routes relay frames
+    between workers. When a worker goes away its sessions are released and
+    every other worker is told, so proxied clients can reconnect.
+    """
+
+    def __init__(self):
+        self.workers: Dict[str, asyncio.StreamWriter] = {}
+        self.owners: Dict[str, str] = {}
+
+    async def serve(self, path: str):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self._handle, path=path)
+        logger.info(f"Session broker listening on {path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        worker_id = None
+        try:
+            header, _ = await _read_frame(reader)
+            worker_id = header["worker"]
+            self.workers[worker_id] = writer
+            logger.info(f"Worker {worker_id} connected to session broker")
+
+            while True:
+                header, body = await _read_frame(reader)
+                match header["op"]:
+                    case "claim":
+                        owner = self.owners.setdefault(header["session"], worker_id)
+                        _write_frame(writer, {"op": "reply", "req": header["req"], "owner": owner})
+                    case "release":
+                        if self.owners.get(header["session"]) == worker_id:
+                            del self.owners[header["session"]]
+                    case "send":
+                        target = self.workers.get(header["to"])
+                        if target is not None:
+                            header["op"] = "deliver"
+                            header["from"] = worker_id
+                            _write_frame(target, header, body)
+                            await target.drain()
+                    case "lookup":
+                        owner = self.owners.get(header["session"])
+                        _write_frame(writer, {"op": "reply", "req": header["req"], "owner": owner})
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if worker_id is not None:
+                self._drop_worker(worker_id)
+            writer.close()
+
+    def _drop_worker(self, worker_id: str):
+        self.workers.pop(worker_id, None)
+        for session_id in [s for s, owner in self.owners.items() if owner == worker_id]:
+            del self.owners[session_id]
+        for writer in self.workers.values():
+            _write_frame(writer, {"op": "worker_gone", "worker": worker_id})
+        logger.info(f"Worker {worker_id} left the session broker")
+
+
+def run_broker(path: str):
+    asyncio.run(SessionBroker().serve(path))
+
+
+class BrokerRegistry(SessionRegistry):
+    """
+    Session registry backed by a `SessionBroker`, so any worker can accept a
+    client for any session and forward it to the worker that owns it.
+    """
+
+    def __init__(self, path: str, connect_retries: int = 20, connect_backoff: float = 0.25):
+        super().__init__()
+        self.path = path
+        self.connect_retries = connect_retries
+        self.connect_backoff = connect_backoff
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._requests = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        # client sockets held here for sessions owned elsewhere, by connection id
+        self._proxies: Dict[str, Tuple[str, WebSocket, asyncio.Queue]] = {}
+        # stand-ins for clients held elsewhere for sessions owned here
+        self._remote: Dict[str, Tuple[str, RelayedWebSocket]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self, on_attach, on_update):
+        await super().start(on_attach, on_update)
+        for attempt in range(self.connect_retries):
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                # the broker process may still be starting
+                await asyncio.sleep(self.connect_backoff)
+        else:
+            raise RuntimeError(f"Session broker not reachable at {self.path}")
+
+        _write_frame(self._writer, {"op": "hello", "worker": self.worker_id})
+        await self._writer.drain()
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def claim(self, session_id: str) -> str:
+        return await self._request("claim", session=session_id)
+
+    async def release(self, session_id: str):
+        await self._send_op({"op": "release", "session": session_id})
+
+    async def dispatch(self, session_id: str, action: str, data: Dict[str, Any]):
+        owner = await self._request("lookup", session=session_id)
+        if owner is None or self.is_local(owner):
+            # sessions nobody holds in memory only need the database update
+            await self._on_update(session_id, action, data)
+            return
+        await self._relay(owner, {"kind": "update", "session": session_id, "action": action, "data": data})
+
+    async def proxy(self, websocket, session_id, owner, client_identifier):
+        conn = uuid.uuid4().hex
+        outbox: asyncio.Queue = asyncio.Queue()
+        self._proxies[conn] = (owner, websocket, outbox)
+        writer = asyncio.create_task(self._pump_to_client(websocket, outbox))
+        try:
+            await self._relay(
+                owner,
+                {
+                    "kind": "attach",
+                    "conn": conn,
+                    "session": session_id,
+                    "client_identifier": client_identifier,
+                },
+            )
+            while not writer.done():
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                header = {"kind": "receive", "conn": conn}
+                if message.get("bytes") is not None:
+                    await self._relay(owner, header, message["bytes"])
+                else:
+                    header["text"] = message.get("text")
+                    await self._relay(owner, header)
+        finally:
+            self._proxies.pop(conn, None)
+            writer.cancel()
+            await self._relay(owner, {"kind": "detach", "conn": conn})
+
+    async def _pump_to_client(self, websocket: WebSocket, outbox: asyncio.Queue):
+        while True:
+            header, body = await outbox.get()
+            if header["kind"] == "close":
+                await websocket.close(code=header.get("code", 1000))
+                return
+            # binary frames carry no text, they may be empty
+            if "text" in header:
+                await websocket.send_text(header["text"])
+            else:
+                await websocket.send_bytes(body)
+
+    async def _request(self, op: str, **fields) -> Any:
+        req = next(self._requests)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req] = future
+        await self._send_op({"op": op, "req": req, **fields})
+        return await future
+
+    async def _relay(self, to: str, header: Dict[str, Any], body: bytes = b""):
+        await self._send_op({"op": "send", "to": to, **header}, body)
+
+    async def _send_op(self, header: Dict[str, Any], body: bytes = b""):
+        _write_frame(self._writer, header, body)
+        await self._writer.drain()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                header, body = await _read_frame(self._reader)
+                match header["op"]:
+                    case "reply":
+                        future = self._pending.pop(header["req"], None)
+                        if future is not None and not future.done():
+                            future.set_result(header.get("owner"))
+                    case "deliver":
+                        self._deliver(header, body)
+                    case "worker_gone":
+                        self._worker_gone(header["worker"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.error("Lost connection to the session broker")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Session broker connection lost"))
+
+    def _deliver(self, header: Dict[str, Any], body: bytes):
+        conn = header.get("conn")
+        match header["kind"]:
+            # frames for client sockets held by this worker
+            case "send" | "close":
+                if conn in self._proxies:
+                    self._proxies[conn][2].put_nowait((header, body))
+
+            # frames for sessions owned by this worker
+            case "attach":
+                origin = header["from"]
+
+                async def send(relay_header: Dict[str, Any], relay_body: bytes):
+                    await self._relay(origin, {**relay_header, "conn": conn}, relay_body)
+
+                websocket = RelayedWebSocket(send)
+                self._remote[conn] = (origin, websocket)
+                self._spawn(self._run_remote(conn, websocket, header))
+            case "receive":
+                if conn in self._remote:
+                    message: Dict[str, Any] = {"type": "websocket.receive"}
+                    if "text" in header:
+                        message["text"] = header["text"]
+                    else:
+                        message["bytes"] = body
+                    self._remote[conn][1].feed(message)
+            case "detach":
+                if conn in self._remote:
+                    self._remote[conn][1].disconnect()
+            case "update":
+                self._spawn(
+                    self._on_update(header["session"], header["action"], header["data"])
+                )
+
+    async def _run_remote(self, conn: str, websocket: RelayedWebSocket, header: Dict[str, Any]):
+        try:
+            await self._on_attach(websocket, header["session"], header["client_identifier"])
+        finally:
+            self._remote.pop(conn, None)
+
+    def _worker_gone(self, worker_id: str):
+        for owner, _, outbox in list(self._proxies.values()):
+            if owner == worker_id:
+                outbox.put_nowait(({"kind": "close", "code": 1012}, b""))
+        for origin, websocket in list(self._remote.values()):
+            if origin == worker_id:
+                websocket.disconnect()
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+if __name__ == "__main__":
+    from ..config import get_cfg
+
+    run_broker(sys.argv[1] if len(sys.argv) > 1 else get_cfg().session_broker_path)
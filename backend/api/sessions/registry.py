@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import WebSocket
+from starlette.requests import HTTPConnection
+
+from ..config import Config
+
+# runs a client connection of an owned session, (websocket, session_id, client_identifier)
+AttachHandler = Callable[[Any, str, str], Awaitable[None]]
+# applies a session update on the owning worker, (session_id, action, data)
+UpdateHandler = Callable[[str, str, Dict[str, Any]], Awaitable[None]]
+
+
+class SessionRegistry(ABC):
+    """
+    Tracks which worker owns each live session and relays messages to it.
+
+    A session is owned by the worker that claimed it first; that worker holds
+    the `LiveCommunication` and runs the pipeline. Clients connecting to any
+    other worker are proxied to the owner, and session updates made through
+    the REST API are dispatched to it.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._on_attach: Optional[AttachHandler] = None
+        self._on_update: Optional[UpdateHandler] = None
+
+    async def start(self, on_attach: AttachHandler, on_update: UpdateHandler):
+        self._on_attach = on_attach
+        self._on_update = on_update
+
+    async def close(self):
+        pass
+
+    def is_local(self, owner: str) -> bool:
+        return owner == self.worker_id
+
+    @abstractmethod
+    async def claim(self, session_id: str) -> str:
+        """Claim `session_id` for this worker and return the actual owner"""
+
+    @abstractmethod
+    async def release(self, session_id: str):
+        """Give up this worker's ownership of `session_id`"""
+
+    @abstractmethod
+    async def proxy(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        owner: str,
+        client_identifier: str,
+    ):
+        """Pump a local client connection to the owning worker until it disconnects"""
+
+    @abstractmethod
+    async def dispatch(self, session_id: str, action: str, data: Dict[str, Any]):
+        """Apply an update to a session wherever it is owned"""
+
+
+class InProcessRegistry(SessionRegistry):
+    """Default registry for a single worker, every session is owned locally"""
+
+    async def claim(self, session_id: str) -> str:
+        return self.worker_id
+
+    async def release(self, session_id: str):
+        pass
+
+    async def proxy(self, websocket, session_id, owner, client_identifier):
+        raise RuntimeError("In-process registry cannot proxy sessions")
+
+    async def dispatch(self, session_id: str, action: str, data: Dict[str, Any]):
+        await self._on_update(session_id, action, data)
+
+
+class RelayedWebSocket:
+    """
+    Stand-in for a client socket that is connected to another worker.
+
+    Exposes the subset of the `WebSocket` interface used by the session code;
+    sends are relayed to the worker holding the real connection and received
+    messages are fed in by the registry.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any], bytes], Awaitable[None]],
+    ):
+        self._send = send
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def receive(self) -> Dict[str, Any]:
+        return await self._inbox.get()
+
+    async def send_json(self, data: Any):
+        await self.send_text(json.dumps(data, default=str))
+
+    async def send_text(self, text: str):
+        if self.closed:
+            raise RuntimeError("Relayed websocket is closed")
+        await self._send({"kind": "send", "text": text}, b"")
+
+    async def send_bytes(self, data: bytes):
+        if self.closed:
+            raise RuntimeError("Relayed websocket is closed")
+        await self._send({"kind": "send"}, data)
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        await self._send({"kind": "close", "code": code}, b"")
+
+    def feed(self, message: Dict[str, Any]):
+        self._inbox.put_nowait(message)
+
+    def disconnect(self, code: int = 1000):
+        self.closed = True
+        self._inbox.put_nowait({"type": "websocket.disconnect", "code": code})
+
+
+def get_session_registry(connection: HTTPConnection) -> SessionRegistry:
+    return connection.app.state.session_registry
+
+
+def create_session_registry(cfg: Config) -> SessionRegistry:
+    match cfg.session_backend:
+        case "local":
+            return InProcessRegistry()
+        case "broker":
+            from .broker import BrokerRegistry
+
+            return BrokerRegistry(cfg.session_broker_path)
+    raise ValueError(f"Unknown session backend: {cfg.session_backend}")
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+from starlette.requests import HTTPConnection
+
+from ..config import Config
+from ..models.communication import LiveCommunication
+from ..utils import metrics
+
+# called with the session id once a session is dropped from memory
+ReleaseHandler = Callable[[str], Awaitable[None]]
+
+
+class SessionStore:
+    """
+    The live communications held by this worker, least recently used first.
+
+    Sessions nobody is connected to are cold: their config and history are in
+    MongoDB and `_run_session` restores them when a client connects again. A
+    background sweep evicts cold sessions idle for longer than `idle_ttl`
+    and, while the estimated size of all sessions exceeds `memory_budget`,
+    the least recently used cold ones. Sessions with a connected client or a
+    running turn are never evicted.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 1800,
+        memory_budget: int = 256 * 1024 * 1024,
+        sweep_interval: float = 30,
+    ):
+        self.idle_ttl = idle_ttl
+        self.memory_budget = memory_budget
+        self.sweep_interval = sweep_interval
+        # session id -> session, least recently used first
+        self._sessions: "OrderedDict[str, LiveCommunication]" = OrderedDict()
+        self._last_active: Dict[str, float] = {}
+        self._on_release: Optional[ReleaseHandler] = None
+        self._task: Optional[asyncio.Task] = None
+        self.evicted = {"idle": 0, "memory": 0}
+
+    @classmethod
+    def from_config(cls, cfg: Config) -> "SessionStore":
+        return cls(
+            idle_ttl=cfg.session_idle_ttl,
+            memory_budget=cfg.session_memory_budget_mb * 1024 * 1024,
+            sweep_interval=cfg.session_sweep_interval,
+        )
+
+    def start(self, on_release: ReleaseHandler):
+        self._on_release = on_release
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sessions)
+
+    def __setitem__(self, session_id: str, session: LiveCommunication):
+        self._sessions[session_id] = session
+        self.touch(session_id)
+
+    def setdefault(self, session_id: str, session: LiveCommunication) -> LiveCommunication:
+        """Add `session` unless one is already held for `session_id`; returns the held one"""
+        if session_id not in self._sessions:
+            self._sessions[session_id] = session
+        self.touch(session_id)
+        return self._sessions[session_id]
+
+    def get(self, session_id: str) -> Optional[LiveCommunication]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self.touch(session_id)
+        return session
+
+    def pop(self, session_id: str, default=None) -> Optional[LiveCommunication]:
+        self._last_active.pop(session_id, None)
+        return self._sessions.pop(session_id, default)
+
+    def values(self):
+        return self._sessions.values()
+
+    def touch(self, session_id: str):
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+            self._last_active[session_id] = time.monotonic()
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(session.estimated_bytes() for session in self._sessions.values())
+
+    @staticmethod
+    def is_cold(session: LiveCommunication) -> bool:
+        return (
+            session.bot_client is None
+            and session.controlpanel_client is None
+            and not session.turns.busy
+        )
+
+    async def sweep(self) -> List[str]:
+        """Evict idle cold sessions, then cold ones over the memory budget; returns their ids"""
+        now = time.monotonic()
+        evicted = []
+        for session_id, session in list(self._sessions.items()):
+            if not self.is_cold(session):
+                continue
+            if now - self._last_active.get(session_id, now) >= self.idle_ttl:
+                await self._evict(session_id, "idle")
+                evicted.append(session_id)
+
+        total = self.resident_bytes
+        if total <= self.memory_budget:
+            return evicted
+        for session_id, session in list(self._sessions.items()):
+            if total <= self.memory_budget:
+                break
+            if not self.is_cold(session):
+                continue
+            total -= session.estimated_bytes()
+            await self._evict(session_id, "memory")
+            evicted.append(session_id)
+        if total > self.memory_budget:
+            logger.warning(
+                f"Live sessions hold ~{total // 1024 // 1024} MB, over the "
+                f"{self.memory_budget // 1024 // 1024} MB budget, and none of them is cold"
+            )
+        return evicted
+
+    async def _evict(self, session_id: str, reason: str):
+        session = self.pop(session_id)
+        if session is None:
+            return
+        if session.summary_task is not None:
+            session.summary_task.cancel()
+        self.evicted[reason] += 1
+        metrics.SESSIONS_EVICTED.inc(reason=reason)
+        logger.info(f"Evicted {reason} session {session_id}")
+        # a client may have reconnected and restored it while we were releasing
+        if self._on_release is not None and session_id not in self._sessions:
+            try:
+                await self._on_release(session_id)
+            except Exception as e:
+                logger.warning(f"Failed to release evicted session {session_id}: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        now = time.monotonic()
+        sessions = [
+            {
+                "id": session_id,
+                "bytes": session.estimated_bytes(),
+                "messages": len(session.chat_history),
+                "cold": self.is_cold(session),
+                "idle_seconds": round(now - self._last_active.get(session_id, now), 1),
+            }
+            for session_id, session in self._sessions.items()
+        ]
+        return {
+            "resident": len(sessions),
+            "cold": sum(session["cold"] for session in sessions),
+            "bytes": sum(session["bytes"] for session in sessions),
+            "memory_budget": self.memory_budget,
+            "idle_ttl": self.idle_ttl,
+            "evicted": dict(self.evicted),
+            "sessions": sessions,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.exception(e)
+
+
+def get_session_store(connection: HTTPConnection) -> SessionStore:
+    return connection.app.state.session_store
@@ -1,66 +1,227 @@
-import base64
+import asyncio
+import queue
+import time
+from typing import Awaitable, Callable, Iterator, List, Optional, Union
 
 from google.cloud import speech_v1, texttospeech
+from loguru import logger
+from starlette.requests import HTTPConnection
 
 from ..config import get_cfg
-from ..utils import Depends
+from ..utils import metrics
+from .codecs import LEGACY_INPUT_FORMAT, AudioFormat, negotiate_output
+from .speech_engines import TTS_ENGINE_CLASSES, get_stt_engine, get_tts_engine
+from .tts_cache import TTSCache
+from .types import STTEngine, TTSEngine
 
 
-def get_s2t_client(cfg=Depends(get_cfg)):
-    # if cfg.debug:
-    #     return speech.SpeechClient()
-    return speech_v1.SpeechClient()
+def get_s2t_client(connection: HTTPConnection) -> speech_v1.SpeechClient:
+    return connection.app.state.clients.s2t
 
 
-def get_t2s_client(cfg=Depends(get_cfg)):
-    # if cfg.debug:
-    #     return speech.SpeechClient()
-    return texttospeech.TextToSpeechClient()
+def get_t2s_client(connection: HTTPConnection) -> texttospeech.TextToSpeechClient:
+    return connection.app.state.clients.t2s
 
 
 def transcribe_audio(
     audio_bytes: bytes,
     client: speech_v1.SpeechClient,
+    language_code: str = "en-IN",
+    engine: STTEngine = STTEngine.google,
+    audio_format: AudioFormat = LEGACY_INPUT_FORMAT,
 ) -> str:
-    audio = speech_v1.RecognitionAudio(content=audio_bytes)
-    config = speech_v1.RecognitionConfig(
-        encoding=speech_v1.RecognitionConfig.AudioEncoding.MP3,  # Change based on audio type
-        sample_rate_hertz=16000,
-        language_code="en-IN",
-    )
-    request = speech_v1.RecognizeRequest(
-        config=config,
-        audio=audio,
+    stt_engine = get_stt_engine(engine, client)
+    with metrics.STT_SECONDS.time(voice=language_code, engine=engine):
+        return stt_engine.transcribe(
+            audio_bytes, language_code, audio_format.encoding, audio_format.sample_rate_hertz
+        )
+
+
+class StreamingTranscriber:
+    """
+    Streaming speech recognition session for a single utterance.
+
+    Audio frames are fed while the user is still speaking and forwarded to
+    `streaming_recognize` on a worker thread. Interim and final results are
+    reported through `on_transcript` on the event loop, and `finish` returns
+    the final transcript once the stream is closed.
+    """
+
+    def __init__(
+        self,
+        client: speech_v1.SpeechClient,
+        language_code: str,
+        encoding: str = "WEBM_OPUS",
+        sample_rate_hertz: int = 48000,
+        on_transcript: Optional[Callable[[str, bool], Awaitable]] = None,
+    ):
+        self._client = client
+        self._config = speech_v1.StreamingRecognitionConfig(
+            config=speech_v1.RecognitionConfig(
+                encoding=speech_v1.RecognitionConfig.AudioEncoding[encoding],
+                sample_rate_hertz=sample_rate_hertz,
+                language_code=language_code,
+            ),
+            interim_results=on_transcript is not None,
+        )
+        self._on_transcript = on_transcript
+        self._language_code = language_code
+        self._audio: queue.Queue = queue.Queue()
+        self._final_parts: List[str] = []
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(asyncio.to_thread(self._run))
+
+    def feed(self, chunk: bytes):
+        self._audio.put_nowait(chunk)
+
+    async def finish(self) -> str:
+        self._audio.put_nowait(None)
+        start = time.perf_counter()
+        try:
+            await self._task
+        except Exception as e:
+            logger.exception(e)
+        metrics.STT_SECONDS.observe(
+            time.perf_counter() - start, voice=self._language_code, engine=STTEngine.google
+        )
+        return " ".join(self._final_parts).strip()
+
+    def cancel(self):
+        self._audio.put_nowait(None)
+        # nobody awaits a cancelled stream, so report its failure here
+        self._task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).warning("Cancelled speech stream failed")
+
+    def _requests(self) -> Iterator[speech_v1.StreamingRecognizeRequest]:
+        while (chunk := self._audio.get()) is not None:
+            yield speech_v1.StreamingRecognizeRequest(audio_content=chunk)
+
+    def _run(self):
+        responses = self._client.streaming_recognize(
+            config=self._config, requests=self._requests()
+        )
+        for response in responses:
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                text = result.alternatives[0].transcript
+                if result.is_final:
+                    self._final_parts.append(text.strip())
+                if self._on_transcript is not None:
+                    asyncio.run_coroutine_threadsafe(
+                        self._on_transcript(text, result.is_final), self._loop
+                    )
+
+
+class BufferedTranscriber:
+    """
+    Utterance session for engines without streaming recognition. Frames are
+    collected while the user speaks and recognized in one pass on `finish`.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[bytes], str],
+        on_transcript: Optional[Callable[[str, bool], Awaitable]] = None,
+    ):
+        self._transcribe = transcribe
+        self._on_transcript = on_transcript
+        self._chunks: List[bytes] = []
+
+    def feed(self, chunk: bytes):
+        self._chunks.append(chunk)
+
+    async def finish(self) -> str:
+        audio, self._chunks = b"".join(self._chunks), []
+        try:
+            transcript = await asyncio.to_thread(self._transcribe, audio)
+        except Exception as e:
+            logger.exception(e)
+            return ""
+        if self._on_transcript is not None:
+            await self._on_transcript(transcript, True)
+        return transcript.strip()
+
+    def cancel(self):
+        self._chunks = []
+
+
+def open_transcriber(
+    client: speech_v1.SpeechClient,
+    engine: STTEngine,
+    language_code: str,
+    encoding: str = "WEBM_OPUS",
+    sample_rate_hertz: int = 48000,
+    on_transcript: Optional[Callable[[str, bool], Awaitable]] = None,
+) -> Union[StreamingTranscriber, BufferedTranscriber]:
+    """Start recognizing an utterance with the communication's STT engine"""
+    if STTEngine(engine) == STTEngine.google:
+        return StreamingTranscriber(
+            client,
+            language_code,
+            encoding=encoding,
+            sample_rate_hertz=sample_rate_hertz,
+            on_transcript=on_transcript,
+        )
+    audio_format = AudioFormat(encoding, sample_rate_hertz)
+    return BufferedTranscriber(
+        lambda audio: transcribe_audio(audio, client, language_code, engine, audio_format),
+        on_transcript=on_transcript,
     )
 
-    response = client.recognize(request=request)
-
-    transcript = ""
-    for result in response.results:
-        transcript += result.alternatives[0].transcript
-
-    return transcript
-
 
 def text_to_speech(
     text: str,
     client: texttospeech.TextToSpeechClient,
     language_code: str,
     gender: str,
+    engine: TTSEngine = TTSEngine.google,
+    encoding: Optional[str] = None,
+    cache: Optional[TTSCache] = None,
 ) -> bytes:
-    synthesis_input = texttospeech.SynthesisInput(text=text)
+    tts_engine = get_tts_engine(engine, client)
+    encoding = encoding or tts_engine.encoding
+    if cache is not None:
+        key = TTSCache.make_key(text, language_code, gender, encoding, engine)
+        audio = cache.get(key)
+        if audio is not None:
+            return audio
 
-    voice = texttospeech.VoiceSelectionParams(
-        language_code=language_code,
-        ssml_gender=texttospeech.SsmlVoiceGender[gender],
-    )
+    with metrics.TTS_SECONDS.time(voice=metrics.voice_label(language_code, gender), engine=engine):
+        audio = tts_engine.synthesize(text, language_code, gender, encoding)
 
-    audio_config = texttospeech.AudioConfig(
-        audio_encoding=texttospeech.AudioEncoding.MP3
-    )
+    if cache is not None:
+        cache.put(key, audio)
 
-    response = client.synthesize_speech(
-        input=synthesis_input, voice=voice, audio_config=audio_config
-    )
+    return audio
 
-    return base64.b64encode(response.audio_content).decode("utf-8")
+
+async def prewarm_tts(
+    phrases: List[str],
+    client: texttospeech.TextToSpeechClient,
+    language_code: str,
+    gender: str,
+    engine: TTSEngine = TTSEngine.google,
+    cache: Optional[TTSCache] = None,
+):
+    """
+    Synthesize scripted lines ahead of time into `cache` so their first use
+    is a hit, in the engine's default encoding and the one negotiated with
+    capable bots
+    """
+    supported = TTS_ENGINE_CLASSES[TTSEngine(engine)].encodings
+    encodings = dict.fromkeys(
+        [supported[0], negotiate_output(supported, supported, get_cfg().tts_output_encodings)]
+    )
+    for phrase in phrases:
+        for encoding in encodings:
+            try:
+                await asyncio.to_thread(
+                    text_to_speech, phrase, client, language_code, gender, engine, encoding, cache
+                )
+            except Exception as e:
+                logger.warning(f"Failed to pre-warm TTS for '{phrase}': {e}")
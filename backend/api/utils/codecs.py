@@ -0,0 +1,96 @@
+import io
+import wave
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+# encodings are named as in Google's AudioEncoding enums; LINEAR16 is raw
+# 16-bit PCM on input and a WAV file on output
+
+
+class AudioFormat(NamedTuple):
+    encoding: str
+    sample_rate_hertz: int = 16000
+
+    def to_dict(self):
+        return {"encoding": self.encoding, "sample_rate_hertz": self.sample_rate_hertz}
+
+
+# what SEND_AUDIO assumed before formats were negotiated
+LEGACY_INPUT_FORMAT = AudioFormat("MP3", 16000)
+
+
+def parse_formats(offered: Iterable[Union[str, dict]]) -> List[AudioFormat]:
+    """Read a bot's formats, given as encodings or {encoding, sample_rate_hertz} objects"""
+    formats = []
+    for item in offered:
+        if isinstance(item, str):
+            formats.append(AudioFormat(item.upper()))
+        else:
+            formats.append(
+                AudioFormat(str(item["encoding"]).upper(), int(item.get("sample_rate_hertz", 16000)))
+            )
+    return formats
+
+
+def negotiate_output(
+    offered: Optional[Sequence[str]],
+    supported: Sequence[str],
+    preference: Sequence[str],
+) -> str:
+    """
+    First encoding of `preference` that the bot plays and the TTS engine
+    produces. Bots that offered nothing, or nothing usable, get the engine's
+    default encoding, `supported[0]`.
+    """
+    if offered:
+        for encoding in preference:
+            if encoding in offered and encoding in supported:
+                return encoding
+    return supported[0]
+
+
+def negotiate_input(
+    offered: Optional[Sequence[AudioFormat]],
+    supported: Sequence[str],
+    preference: Sequence[str],
+) -> Optional[AudioFormat]:
+    """First format the bot records in, by server preference, that the STT engine accepts"""
+    if not offered:
+        return None
+    for encoding in preference:
+        for audio_format in offered:
+            if audio_format.encoding == encoding and encoding in supported:
+                return audio_format
+    return None
+
+
+def pcm_to_wav(pcm: bytes, sample_rate_hertz: int, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate_hertz)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def join_audio(pieces: List[bytes], encoding: str) -> bytes:
+    """
+    Concatenate separately synthesized pieces of one reply. MP3 frames and
+    chained Ogg streams can be joined as they are, WAV files are merged into
+    one file.
+    """
+    if len(pieces) == 1 or encoding != "LINEAR16":
+        return b"".join(pieces)
+
+    params: Any = None
+    frames = []
+    for piece in pieces:
+        with wave.open(io.BytesIO(piece), "rb") as wav_file:
+            params = params or wav_file.getparams()
+            frames.append(wav_file.readframes(wav_file.getnframes()))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setparams(params)
+        wav_file.writeframes(b"".join(frames))
+    return buffer.getvalue()
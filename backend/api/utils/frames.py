@@ -0,0 +1,67 @@
+"""
+Binary WebSocket frames carrying raw audio.
+
+A bot that sends `HELLO` with `binary_audio` exchanges audio as binary
+frames instead of base64 inside JSON. Every frame starts with a fixed
+18-byte header, all integers big-endian:
+
+    version   u8    FRAME_VERSION
+    type      u8    FrameType
+    seq       u32   chunk number within the turn, 0 for whole utterances
+    turn_id   12B   ObjectId of the turn, zeros when there is none
+
+followed by the audio bytes. The JSON message describing an outgoing audio
+frame (content, user query, ...) is sent just before it with the same
+`turn_id` and `seq`, and `"binary": true` in place of the base64 audio.
+"""
+
+import struct
+from enum import IntEnum
+from typing import NamedTuple, Optional
+
+from bson import ObjectId
+
+FRAME_VERSION = 1
+HEADER = struct.Struct("!BBI12s")
+_NO_TURN = bytes(12)
+
+
+class FrameType(IntEnum):
+    # bot -> server
+    AUDIO = 1  # a complete utterance, like SEND_AUDIO
+    AUDIO_STREAM = 2  # a piece of the utterance opened by START_AUDIO_STREAM
+    # server -> bot
+    AUDIO_RESPONSE = 3  # audio of a whole reply
+    AUDIO_CHUNK = 4  # audio of one sentence of a chunked reply
+
+
+class Frame(NamedTuple):
+    type: FrameType
+    seq: int
+    turn_id: Optional[str]
+    payload: bytes
+
+
+def encode_frame(
+    frame_type: FrameType,
+    payload: bytes,
+    seq: int = 0,
+    turn_id: Optional[str] = None,
+) -> bytes:
+    turn = ObjectId(turn_id).binary if turn_id else _NO_TURN
+    return HEADER.pack(FRAME_VERSION, frame_type, seq, turn) + payload
+
+
+def decode_frame(data: bytes) -> Frame:
+    """Parse a binary frame, raising ValueError when it is malformed"""
+    if len(data) < HEADER.size:
+        raise ValueError(f"Frame shorter than its {HEADER.size} byte header")
+    version, frame_type, seq, turn = HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version {version}")
+    return Frame(
+        type=FrameType(frame_type),
+        seq=seq,
+        turn_id=None if turn == _NO_TURN else str(ObjectId(turn)),
+        payload=data[HEADER.size :],
+    )
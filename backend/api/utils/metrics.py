@@ -0,0 +1,274 @@
+import asyncio
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds, from a cached TTS hit up to a long LLM generation
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200)
+
+
+def _label_value(value) -> str:
+    # enums (LLMModel, VoiceGender, ...) are labelled by their value
+    return str(getattr(value, "value", value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(_label_value(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of the metric in the exposition format"""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Gauge set directly or, with `set_function`, read when scraped"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def set_function(self, function: Callable[[], float]):
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # per label set: bucket counts (non-cumulative), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = self._format_labels(key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = self._format_labels(key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STT_SECONDS: Histogram = registry.register(
+    Histogram(
+        "srw_stt_duration_seconds",
+        "Speech recognition time, for streamed utterances from end of speech to final transcript.",
+        ["voice", "engine"],
+    )
+)
+LLM_TTFT_SECONDS: Histogram = registry.register(
+    Histogram("srw_llm_time_to_first_token_seconds", "Time until the first LLM content delta.", ["model"])
+)
+LLM_TOKENS_PER_SECOND: Histogram = registry.register(
+    Histogram(
+        "srw_llm_tokens_per_second",
+        "LLM generation rate as reported by Ollama.",
+        ["model"],
+        buckets=RATE_BUCKETS,
+    )
+)
+LLM_SECONDS: Histogram = registry.register(
+    Histogram("srw_llm_duration_seconds", "Total time of an LLM request.", ["model"])
+)
+TTS_SECONDS: Histogram = registry.register(
+    Histogram("srw_tts_duration_seconds", "Speech synthesis time, cache misses only.", ["voice", "engine"])
+)
+TURN_SECONDS: Histogram = registry.register(
+    Histogram("srw_turn_duration_seconds", "Time from user input to the complete reply.", ["model", "voice"])
+)
+MONGO_WRITE_SECONDS: Histogram = registry.register(
+    Histogram("srw_mongo_write_seconds", "Time of a batched MongoDB write.", ["collection"])
+)
+WS_SEND_SECONDS: Histogram = registry.register(
+    Histogram("srw_websocket_send_seconds", "Time to send one WebSocket message.", ["type"])
+)
+LLM_QUEUE_SECONDS: Histogram = registry.register(
+    Histogram("srw_llm_queue_seconds", "Time an LLM request waited for admission.", ["model", "priority"])
+)
+TURNS: Counter = registry.register(
+    Counter("srw_turns_total", "Completed conversation turns.", ["model", "voice"])
+)
+LLM_ERRORS: Counter = registry.register(
+    Counter("srw_llm_errors_total", "Failed LLM requests.", ["model"])
+)
+LLM_SHED: Counter = registry.register(
+    Counter("srw_llm_shed_total", "LLM requests rejected by admission control.", ["model", "priority", "reason"])
+)
+LLM_RESPONSE_CACHE: Counter = registry.register(
+    Counter("srw_llm_response_cache_lookups_total", "LLM response cache lookups.", ["model", "result"])
+)
+PUBLIC_ID_ALLOCATIONS: Counter = registry.register(
+    Counter("srw_public_id_allocations_total", "Public id insert attempts by outcome.", ["result"])
+)
+SESSIONS_EVICTED: Counter = registry.register(
+    Counter("srw_sessions_evicted_total", "Cold live communications dropped from memory.", ["reason"])
+)
+LIVE_SESSIONS: Gauge = registry.register(
+    Gauge("srw_live_sessions", "Live communications held by this worker.")
+)
+LIVE_SESSION_BYTES: Gauge = registry.register(
+    Gauge("srw_live_session_bytes", "Estimated memory held by the live communications of this worker.")
+)
+INFLIGHT_LLM_REQUESTS: Gauge = registry.register(
+    Gauge("srw_llm_inflight_requests", "LLM requests currently in progress.")
+)
+QUEUED_LLM_REQUESTS: Gauge = registry.register(
+    Gauge("srw_llm_queued_requests", "LLM requests waiting for admission.")
+)
+EXECUTOR_QUEUE_DEPTH: Gauge = registry.register(
+    Gauge("srw_executor_queue_depth", "Blocking calls waiting for a thread of the default executor.")
+)
+RESIDENT_MODELS: Gauge = registry.register(
+    Gauge("srw_llm_resident_models", "Models loaded in Ollama as last seen by this worker.")
+)
+CHAT_WRITER_QUEUE_DEPTH: Gauge = registry.register(
+    Gauge("srw_chat_writer_queue_depth", "Chat messages waiting to be written.")
+)
+
+
+def voice_label(language_code, gender) -> str:
+    return f"{_label_value(language_code)}/{_label_value(gender)}"
+
+
+def executor_queue_depth(loop: asyncio.AbstractEventLoop) -> int:
+    # asyncio.to_thread runs on the loop's default executor, created on first use
+    executor = getattr(loop, "_default_executor", None)
+    work_queue = getattr(executor, "_work_queue", None)
+    return work_queue.qsize() if work_queue is not None else 0
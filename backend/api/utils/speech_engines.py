@@ -0,0 +1,291 @@
+import importlib.util
+import io
+import threading
+import wave
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from google.cloud import speech_v1, texttospeech
+from loguru import logger
+
+from ..config import Config, get_cfg
+from .codecs import pcm_to_wav
+from .types import STTEngine, TTSEngine
+
+
+# module and package of the engines running on the box, see the local-speech extra
+LOCAL_ENGINE_PACKAGES = {
+    STTEngine.whisper: ("faster_whisper", "faster-whisper"),
+    TTSEngine.piper: ("piper", "piper-tts"),
+}
+
+
+def _require_package(engine: str, kind: str):
+    module, package = LOCAL_ENGINE_PACKAGES[engine]
+    if importlib.util.find_spec(module) is None:
+        raise RuntimeError(
+            f"The {getattr(engine, 'value', engine)} {kind} engine needs the {package} package: "
+            f"poetry install -E local-speech, or pip install {package}"
+        )
+
+
+def check_speech_engines(cfg: Config):
+    """Raise RuntimeError when an engine enabled in Config is unknown or not installed"""
+    for kind, engine_type, engines in (
+        ("STT", STTEngine, cfg.stt_engines),
+        ("TTS", TTSEngine, cfg.tts_engines),
+    ):
+        for engine in engines:
+            try:
+                engine = engine_type(engine)
+            except ValueError:
+                raise RuntimeError(f"Unknown {kind} engine in Config: {engine}")
+            if engine in LOCAL_ENGINE_PACKAGES:
+                _require_package(engine, kind)
+
+
+class SpeechToTextEngine(ABC):
+    """Recognizes a complete utterance; implementations block and run in a worker thread"""
+
+    # input encodings the engine accepts
+    encodings: Tuple[str, ...] = ("MP3",)
+
+    @abstractmethod
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language_code: str,
+        encoding: str = "MP3",
+        sample_rate_hertz: int = 16000,
+    ) -> str:
+        """Transcript of the utterance, empty when nothing was recognized"""
+
+
+class TextToSpeechEngine(ABC):
+    """Synthesizes text to encoded audio; implementations block and run in a worker thread"""
+
+    # encodings the engine produces, the first one is its default
+    encodings: Tuple[str, ...] = ("MP3",)
+    # largest input accepted by one request, longer text is split by the caller
+    max_input_bytes: Optional[int] = None
+
+    @property
+    def encoding(self) -> str:
+        return self.encodings[0]
+
+    @abstractmethod
+    def synthesize(
+        self,
+        text: str,
+        language_code: str,
+        gender: str,
+        encoding: Optional[str] = None,
+    ) -> bytes:
+        """Audio in `encoding`, or the engine's default encoding"""
+
+
+class GoogleSpeechToText(SpeechToTextEngine):
+    encodings = ("LINEAR16", "FLAC", "MP3", "OGG_OPUS", "WEBM_OPUS")
+
+    def __init__(self, client: speech_v1.SpeechClient):
+        self.client = client
+
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language_code: str,
+        encoding: str = "MP3",
+        sample_rate_hertz: int = 16000,
+    ) -> str:
+        audio = speech_v1.RecognitionAudio(content=audio_bytes)
+        config = speech_v1.RecognitionConfig(
+            encoding=speech_v1.RecognitionConfig.AudioEncoding[encoding],
+            sample_rate_hertz=sample_rate_hertz,
+            language_code=language_code,
+        )
+        request = speech_v1.RecognizeRequest(
+            config=config,
+            audio=audio,
+        )
+
+        response = self.client.recognize(request=request)
+
+        transcript = ""
+        for result in response.results:
+            transcript += result.alternatives[0].transcript
+
+        return transcript
+
+
+class GoogleTextToSpeech(TextToSpeechEngine):
+    encodings = ("MP3", "OGG_OPUS", "LINEAR16")
+    max_input_bytes = 4900
+
+    def __init__(self, client: texttospeech.TextToSpeechClient):
+        self.client = client
+
+    def synthesize(
+        self,
+        text: str,
+        language_code: str,
+        gender: str,
+        encoding: Optional[str] = None,
+    ) -> bytes:
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=language_code,
+            ssml_gender=texttospeech.SsmlVoiceGender[getattr(gender, "value", gender)],
+        )
+
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding[encoding or self.encoding]
+        )
+
+        response = self.client.synthesize_speech(
+            input=synthesis_input, voice=voice, audio_config=audio_config
+        )
+        return response.audio_content
+
+
+class WhisperSpeechToText(SpeechToTextEngine):
+    """
+    CPU speech recognition with faster-whisper. Any container PyAV can decode
+    is accepted, so the bot's MP3 and WebM/Opus recordings work unchanged.
+    Raw LINEAR16 is wrapped in a WAV header first.
+    """
+
+    encodings = ("LINEAR16", "FLAC", "MP3", "OGG_OPUS", "WEBM_OPUS")
+
+    def __init__(self, model: str, compute_type: str, cpu_threads: int, num_workers: int):
+        _require_package(STTEngine.whisper, "STT")
+        from faster_whisper import WhisperModel
+
+        logger.info(f"Loading whisper model {model} ({compute_type})")
+        self.model = WhisperModel(
+            model,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+        )
+
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        language_code: str,
+        encoding: str = "MP3",
+        sample_rate_hertz: int = 16000,
+    ) -> str:
+        if encoding == "LINEAR16":
+            audio_bytes = pcm_to_wav(audio_bytes, sample_rate_hertz)
+        # whisper takes the bare language, "en-IN" -> "en"
+        segments, _ = self.model.transcribe(
+            io.BytesIO(audio_bytes),
+            language=str(getattr(language_code, "value", language_code)).split("-")[0],
+            beam_size=1,
+            vad_filter=True,
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class PiperTextToSpeech(TextToSpeechEngine):
+    """
+    CPU neural speech synthesis with Piper, producing WAV. Voices are ONNX
+    models chosen per "<language>/<gender>" or "<language>" from
+    `piper_voices`.
+    """
+
+    encodings = ("LINEAR16",)
+
+    def __init__(self, voices: Dict[str, str]):
+        _require_package(TTSEngine.piper, "TTS")
+        from piper.voice import PiperVoice
+
+        self._load = PiperVoice.load
+        self.voice_paths = voices
+        self._voices = {}
+        self._lock = threading.Lock()
+
+    def _voice(self, language_code: str, gender: str):
+        language = str(getattr(language_code, "value", language_code))
+        gender = str(getattr(gender, "value", gender))
+        path = self.voice_paths.get(f"{language}/{gender}") or self.voice_paths.get(language)
+        if path is None:
+            raise RuntimeError(f"No piper voice configured for {language}/{gender}")
+        with self._lock:
+            if path not in self._voices:
+                logger.info(f"Loading piper voice {path}")
+                self._voices[path] = self._load(path)
+            return self._voices[path]
+
+    def synthesize(
+        self,
+        text: str,
+        language_code: str,
+        gender: str,
+        encoding: Optional[str] = None,
+    ) -> bytes:
+        voice = self._voice(language_code, gender)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            # piper-tts >= 1.3 renamed synthesize() to synthesize_wav()
+            synthesize = getattr(voice, "synthesize_wav", None) or voice.synthesize
+            synthesize(text, wav_file)
+        return buffer.getvalue()
+
+
+STT_ENGINE_CLASSES = {
+    STTEngine.google: GoogleSpeechToText,
+    STTEngine.whisper: WhisperSpeechToText,
+}
+
+TTS_ENGINE_CLASSES = {
+    TTSEngine.google: GoogleTextToSpeech,
+    TTSEngine.piper: PiperTextToSpeech,
+}
+
+# local engines load their models once per process
+_local_engines: Dict[str, object] = {}
+_local_engines_lock = threading.Lock()
+
+
+def _local_engine(name: str, factory):
+    with _local_engines_lock:
+        if name not in _local_engines:
+            _local_engines[name] = factory()
+        return _local_engines[name]
+
+
+def get_stt_engine(
+    engine: STTEngine,
+    client: speech_v1.SpeechClient,
+    cfg: Optional[Config] = None,
+) -> SpeechToTextEngine:
+    match STTEngine(engine):
+        case STTEngine.google:
+            return GoogleSpeechToText(client)
+        case STTEngine.whisper:
+            cfg = cfg or get_cfg()
+            return _local_engine(
+                STTEngine.whisper,
+                lambda: WhisperSpeechToText(
+                    cfg.whisper_model,
+                    cfg.whisper_compute_type,
+                    cfg.whisper_cpu_threads,
+                    cfg.whisper_num_workers,
+                ),
+            )
+
+
+def get_tts_engine(
+    engine: TTSEngine,
+    client: texttospeech.TextToSpeechClient,
+    cfg: Optional[Config] = None,
+) -> TextToSpeechEngine:
+    match TTSEngine(engine):
+        case TTSEngine.google:
+            return GoogleTextToSpeech(client)
+        case TTSEngine.piper:
+            cfg = cfg or get_cfg()
+            return _local_engine(TTSEngine.piper, lambda: PiperTextToSpeech(cfg.piper_voices))
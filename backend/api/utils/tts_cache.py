@@ -0,0 +1,231 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from starlette.requests import HTTPConnection
+
+from ..config import Config
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized audio.
+
+    Entries are keyed on the text and everything that changes the produced
+    audio (language, gender, encoding, engine). The in-memory tier is a bounded LRU;
+    when `disk_dir` is set, entries evicted from memory spill to disk and are
+    promoted back on the next hit. The disk tier is kept under
+    `disk_max_bytes` by deleting the least recently used files; it may be
+    shared by several workers. Safe to use from worker threads, disk I/O
+    happens outside the lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        # size of the disk tier as last scanned plus what this process wrote since
+        self._disk_size = 0
+        self._prune_lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_size = sum(size for _, _, size in self._disk_files())
+
+    @staticmethod
+    def make_key(
+        text: str,
+        language_code: str,
+        gender: str,
+        encoding: str,
+        engine: str = "google",
+    ) -> str:
+        # enum members and their plain values must map to the same entry
+        parts = [
+            getattr(part, "value", part)
+            for part in (language_code, gender, encoding, engine)
+        ]
+        raw = "\x1f".join([text, *map(str, parts)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            evicted = self._insert(key, audio)
+        self._spill(evicted)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            evicted = self._insert(key, audio)
+        self._spill(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_bytes": self._disk_size,
+                "disk_evictions": self.disk_evictions,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _insert(self, key: str, audio: bytes) -> List[Tuple[str, bytes]]:
+        """Add an entry under the lock; returns the evicted entries to spill once released"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = audio
+        self._size += len(audio)
+
+        evicted = []
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size > self.max_bytes
+        ):
+            evicted_key, evicted_audio = self._entries.popitem(last=False)
+            self._size -= len(evicted_audio)
+            self.evictions += 1
+            evicted.append((evicted_key, evicted_audio))
+        return evicted
+
+    def _spill(self, evicted: List[Tuple[str, bytes]]):
+        if not self.disk_dir or not evicted:
+            return
+        for key, audio in evicted:
+            self._write_disk(key, audio)
+        if self._disk_size > self.disk_max_bytes:
+            self._prune()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # the modification time orders files for pruning
+            os.utime(path)
+            return audio
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read TTS cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, audio: bytes):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # a name of its own, other workers may spill the same entry
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(path), prefix=f"{key}.", suffix=".tmp", delete=False
+            ) as f:
+                f.write(audio)
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning(f"Failed to spill TTS cache entry {key}: {e}")
+            return
+        with self._lock:
+            self._disk_size += len(audio)
+
+    def _disk_files(self) -> List[Tuple[float, str, int]]:
+        """(mtime, path, size) of every entry in the disk tier"""
+        files = []
+        for subdir in os.scandir(self.disk_dir):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def _prune(self):
+        """Delete the least recently used files until the disk tier fits its budget"""
+        if not self._prune_lock.acquire(blocking=False):
+            return  # another thread is already pruning
+        try:
+            files = sorted(self._disk_files())
+            total = sum(size for _, _, size in files)
+            for _, path, size in files:
+                if total <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self.disk_evictions += 1
+                except FileNotFoundError:
+                    pass  # pruned by another worker
+                except OSError as e:
+                    logger.warning(f"Failed to prune TTS cache file {path}: {e}")
+                    continue
+                total -= size
+            with self._lock:
+                self._disk_size = total
+        except OSError as e:
+            logger.warning(f"Failed to prune TTS cache: {e}")
+        finally:
+            self._prune_lock.release()
+
+
+def create_tts_cache(cfg: Config) -> Optional[TTSCache]:
+    """The app's synthesized audio cache, None when `tts_cache_enabled` is off"""
+    if not cfg.tts_cache_enabled:
+        return None
+    return TTSCache(
+        max_entries=cfg.tts_cache_max_entries,
+        max_bytes=cfg.tts_cache_max_bytes,
+        disk_dir=cfg.tts_cache_dir,
+        disk_max_bytes=cfg.tts_cache_disk_max_bytes,
+    )
+
+
+def get_tts_cache(connection: HTTPConnection) -> Optional[TTSCache]:
+    return connection.app.state.clients.tts_cache
@@ -13,22 +13,45 @@ class SendGenericMessage(Enum):
 class SendBotMessage(Enum):
     NEW_BOT_DETECTED = "NEW_BOT_DETECTED"
     AUDIO_RESPONSE = "AUDIO_RESPONSE"
+    TEXT_DELTA = "TEXT_DELTA"
+    TEXT_DONE = "TEXT_DONE"
+    AUDIO_CHUNK = "AUDIO_CHUNK"
+    AUDIO_END = "AUDIO_END"
+    TURN_CANCELLED = "TURN_CANCELLED"
+    HELLO = "HELLO"
 
 
 class ReceiveBotMessage(Enum):
     SEND_AUDIO = "SEND_AUDIO"
     SEND_TEXT = "SEND_TEXT"
+    START_AUDIO_STREAM = "START_AUDIO_STREAM"
+    END_AUDIO_STREAM = "END_AUDIO_STREAM"
+    INTERRUPT = "INTERRUPT"
+    HELLO = "HELLO"
 
 
 class SendControlPanelMessage(Enum):
     NEW_CONTROL_PANEL_DETECTED = "NEW_CONTROL_PANEL_DETECTED"
     IS_BOT_CONNECTED = "IS_BOT_CONNECTED"
     PING_STATE = "PING_STATE"
+    TEXT_DELTA = "TEXT_DELTA"
+    TEXT_DONE = "TEXT_DONE"
+    TRANSCRIPT = "TRANSCRIPT"
+    TURN_CANCELLED = "TURN_CANCELLED"
+    HISTORY_CHUNK = "HISTORY_CHUNK"
 
 
 class ReceiveControlPanelMessage(Enum):
     UPDATE_CONFIG = "UPDATE_CONFIG"
     PING = "PING"
+    INTERRUPT = "INTERRUPT"
+    GET_HISTORY = "GET_HISTORY"
+
+
+class TurnPolicy(str, Enum):
+    reject = "reject"  # answer "Request already in progress!"
+    queue = "queue"  # run after the current turn
+    latest = "latest"  # cancel the current turn (barge-in)
 
 
 class SkinType(str, Enum):
@@ -65,6 +88,16 @@ class VoiceGender(str, Enum):
     SSML_VOICE_GENDER_UNSPECIFIED = "SSML_VOICE_GENDER_UNSPECIFIED"
 
 
+class STTEngine(str, Enum):
+    google = "google"
+    whisper = "whisper"
+
+
+class TTSEngine(str, Enum):
+    google = "google"
+    piper = "piper"
+
+
 # USER DATA
 class Activity(str, Enum):
     RUNNING = "Running"
@@ -0,0 +1,301 @@
+"""
+Multi-robot load generator.
+
+Starts a stub Ollama server and the backend with fake Google clients (and by
+default an in-memory MongoDB) in separate processes, then drives simulated
+bot + control panel pairs through `/api/ws/communication/{id}`.
+
+    poetry run python -m bench --robots 20 --turns 10
+    poetry run python -m bench --robots 50 --duration 1800 --think-time 5  # soak
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import websockets
+
+from api.utils.frames import FrameType, encode_frame
+
+from .ollama_stub import run_stub
+from .server import run_server
+
+TURN_DONE = {"AUDIO_RESPONSE", "AUDIO_END"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Results:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.loop_lag: List[float] = []
+        self.rss: List[int] = []
+        self.elapsed = 0.0
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+async def _drain(ws):
+    async for _ in ws:
+        pass
+
+
+async def _robot(
+    index: int,
+    args: argparse.Namespace,
+    base_url: str,
+    http: httpx.AsyncClient,
+    results: Results,
+    deadline: Optional[float],
+):
+    try:
+        response = await http.post("/api/create-communication")
+        response.raise_for_status()
+        communication_id = response.json()["communication_id"]
+    except Exception:
+        results.error("create_communication")
+        return
+
+    ws_url = base_url.replace("http", "ws", 1) + f"/api/ws/communication/{communication_id}"
+    raw_audio = bytes(args.audio_bytes)
+    audio = base64.b64encode(raw_audio).decode("utf-8")
+
+    async with websockets.connect(f"{ws_url}?client_identifier=controlpanel", max_size=None) as controlpanel:
+        drain = asyncio.create_task(_drain(controlpanel))
+        async with websockets.connect(f"{ws_url}?client_identifier=bot", max_size=None) as bot:
+            if args.binary:
+                await bot.send(json.dumps({"type": "HELLO", "data": {"binary_audio": True}}))
+                while json.loads(await bot.recv())["type"] != "HELLO":
+                    pass
+            if args.stream:
+                await controlpanel.send(
+                    json.dumps({"type": "UPDATE_CONFIG", "data": {"config": {"chunked_audio": True}}})
+                )
+                # the bot is told about the new config before the first turn
+                while True:
+                    message = json.loads(await bot.recv())
+                    if message["type"] == "SYSTEM_CONFIG" and message["data"]["config"].get("chunked_audio"):
+                        break
+
+            turn = 0
+            while (time.monotonic() < deadline) if deadline else (turn < args.turns):
+                turn += 1
+                if args.mode == "audio" and args.binary:
+                    request = encode_frame(FrameType.AUDIO, raw_audio)
+                elif args.mode == "audio":
+                    request = json.dumps({"type": "SEND_AUDIO", "data": {"audio": audio}})
+                else:
+                    request = json.dumps(
+                        {"type": "SEND_TEXT", "data": {"text": f"Robot {index} question {turn}, what can robots do?"}}
+                    )
+
+                start = time.perf_counter()
+                await bot.send(request)
+                try:
+                    awaiting_frame = False
+                    while True:
+                        raw = await asyncio.wait_for(bot.recv(), args.turn_timeout)
+                        if isinstance(raw, bytes):
+                            # the audio of a reply follows its JSON message
+                            if awaiting_frame:
+                                results.latencies.append(time.perf_counter() - start)
+                                break
+                            continue
+                        message = json.loads(raw)
+                        if message["type"] == "AUDIO_RESPONSE" and message["data"].get("binary"):
+                            awaiting_frame = True
+                        elif message["type"] in TURN_DONE:
+                            results.latencies.append(time.perf_counter() - start)
+                            break
+                        if message["type"] == "ERROR":
+                            results.error(message["data"].get("message", "error"))
+                            break
+                except asyncio.TimeoutError:
+                    results.error("timeout")
+
+                await asyncio.sleep(args.think_time)
+        drain.cancel()
+
+
+async def _sample_server(http: httpx.AsyncClient, results: Results, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        stats = (await http.get("/bench/stats")).json()
+        results.loop_lag.extend(stats["loop_lag"])
+        results.rss.append(stats["rss_bytes"])
+
+
+async def _wait_ready(http: httpx.AsyncClient, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await http.get("/api/controlpanel-config")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Backend did not start")
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Results:
+    results = Results()
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as http:
+        await _wait_ready(http)
+        start_rss = (await http.post("/bench/start")).json()["rss_bytes"]
+        results.rss.append(start_rss)
+
+        sampler = asyncio.create_task(_sample_server(http, results, args.sample_interval))
+        deadline = time.monotonic() + args.duration if args.duration else None
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _robot(i, args, base_url, http, results, deadline)
+                for i in range(args.robots)
+            ),
+        )
+        results.elapsed = time.perf_counter() - started
+        sampler.cancel()
+
+        stats = (await http.get("/bench/stats")).json()
+        results.loop_lag.extend(stats["loop_lag"])
+        results.rss.append(stats["rss_bytes"])
+    return results
+
+
+def report(args: argparse.Namespace, results: Results) -> Dict[str, Any]:
+    latencies = results.latencies
+    return {
+        "robots": args.robots,
+        "mode": args.mode,
+        "stream": args.stream,
+        "binary": args.binary,
+        "turns": len(latencies),
+        "errors": results.errors,
+        "elapsed_s": round(results.elapsed, 2),
+        "throughput_turns_per_s": round(len(latencies) / results.elapsed, 3) if results.elapsed else 0,
+        "turn_latency_s": {
+            "mean": round(statistics.fmean(latencies), 4) if latencies else 0,
+            "p50": round(_percentile(latencies, 50), 4),
+            "p90": round(_percentile(latencies, 90), 4),
+            "p99": round(_percentile(latencies, 99), 4),
+            "max": round(max(latencies, default=0), 4),
+        },
+        "loop_lag_ms": {
+            "p50": round(_percentile(results.loop_lag, 50) * 1000, 2),
+            "p99": round(_percentile(results.loop_lag, 99) * 1000, 2),
+            "max": round(max(results.loop_lag, default=0) * 1000, 2),
+        },
+        "rss_mb": {
+            "start": round(results.rss[0] / 2**20, 1),
+            "end": round(results.rss[-1] / 2**20, 1),
+            "growth": round((results.rss[-1] - results.rss[0]) / 2**20, 1),
+        },
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--robots", type=int, default=10, help="simulated bot + control panel pairs")
+    parser.add_argument("--turns", type=int, default=5, help="turns per robot")
+    parser.add_argument("--duration", type=float, default=0, help="soak for this many seconds instead of --turns")
+    parser.add_argument("--think-time", type=float, default=0.5, help="pause between turns of a robot")
+    parser.add_argument("--mode", choices=["text", "audio"], default="text", help="SEND_TEXT or SEND_AUDIO turns")
+    parser.add_argument("--stream", action="store_true", help="enable sentence-chunked audio responses")
+    parser.add_argument("--binary", action="store_true", help="exchange audio as binary WebSocket frames")
+    parser.add_argument("--audio-bytes", type=int, default=32_000, help="size of each SEND_AUDIO payload")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="stub LLM tokens per second")
+    parser.add_argument("--first-token-latency", type=float, default=0.25)
+    parser.add_argument("--cold-load", type=float, default=0.0, help="stub LLM model load time")
+    parser.add_argument("--jitter", type=float, default=0.3, help="relative jitter of all fake latencies")
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--tts-latency", type=float, default=0.15)
+    parser.add_argument("--mongo", default="memory", help='"memory" or a MongoDB URL')
+    parser.add_argument("--mongo-latency", type=float, default=0.002, help="in-memory write latency")
+    parser.add_argument("--turn-timeout", type=float, default=60)
+    parser.add_argument("--sample-interval", type=float, default=5, help="server stats sampling period")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    host = "127.0.0.1"
+    llm_port, api_port = _free_port(), _free_port()
+
+    mongo = "memory"
+    if args.mongo != "memory":
+        os.environ["MONGODB_URL"] = args.mongo
+        mongo = "url"
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_stub,
+            args=(
+                host,
+                llm_port,
+                args.token_rate,
+                args.jitter,
+                args.first_token_latency,
+                args.cold_load,
+            ),
+            daemon=True,
+        ),
+        context.Process(
+            target=run_server,
+            args=(
+                host,
+                api_port,
+                f"http://{host}:{llm_port}",
+                args.stt_latency,
+                args.tts_latency,
+                args.jitter,
+                mongo,
+                args.mongo_latency,
+            ),
+            daemon=True,
+        ),
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        results = asyncio.run(run(args, f"http://{host}:{api_port}"))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join(5)
+
+    summary = report(args, results)
+    print(json.dumps(summary, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(summary, file, indent=2)
+    return 1 if results.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark of the model <-> MongoDB document conversion.
+
+Compares the per-key conversion the models used before (`model_dump` plus
+`to_camel_case`/`to_snake_case` on every key) with `DocumentCodec`, on a
+session history of `--messages` chat messages, and checks both produce the
+same documents and models.
+
+    poetry run python -m bench.codec --messages 5000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import ObjectId, Timestamp
+
+from api.models.chat import ChatMessage
+from api.models.communication import CommunicationConfig
+from api.utils import generate_id, to_camel_case, to_snake_case
+from api.utils.types import LLMModel, MessageType
+
+
+def legacy_to_dict(model) -> Dict[str, Any]:
+    json_data = model.model_dump()
+    for name in ("timestamp", "created_at"):
+        if isinstance(json_data.get(name), float):
+            json_data[name] = Timestamp(int(json_data[name]), 1)
+    data = {to_camel_case(k): v for k, v in json_data.items()}
+    if "id" in data:
+        data["_id"] = ObjectId(data.pop("id"))
+    return data
+
+
+def legacy_from_dict(cls, data: Dict[str, Any]):
+    data = dict(data)
+    if "_id" in data:
+        data["id"] = str(data.pop("_id"))
+    json_data = {to_snake_case(k): v for k, v in data.items()}
+    for name in ("timestamp", "created_at"):
+        if isinstance(json_data.get(name), Timestamp):
+            json_data[name] = json_data[name].as_datetime()
+    return cls(**json_data)
+
+
+def make_history(count: int) -> List[ChatMessage]:
+    communication_id = str(ObjectId())
+    return [
+        ChatMessage(
+            communication_id=communication_id,
+            role=MessageType.USER if i % 2 == 0 else MessageType.ASSISTANT,
+            message=f"Message {i} of a long conversation about social robots.",
+            llm_model=None if i % 2 == 0 else LLMModel.llama3_2_latest,
+        )
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    history = make_history(args.messages)
+    documents = [legacy_to_dict(message) for message in history]
+
+    # both paths must agree before their speed means anything
+    assert [message.to_dict() for message in history] == documents
+    assert ChatMessage.from_dicts(documents) == [
+        legacy_from_dict(ChatMessage, document) for document in documents
+    ]
+    config = CommunicationConfig(public_id=generate_id(), custom_prompt_suffix="Be brief.")
+    assert config.to_dict() == legacy_to_dict(config)
+    assert CommunicationConfig.from_dict(config.to_dict()) == legacy_from_dict(
+        CommunicationConfig, legacy_to_dict(config)
+    )
+
+    timings = {
+        "encode_legacy": best_of(args.repeat, lambda: [legacy_to_dict(m) for m in history]),
+        "encode_codec": best_of(args.repeat, lambda: [m.to_dict() for m in history]),
+        "decode_legacy": best_of(
+            args.repeat, lambda: [legacy_from_dict(ChatMessage, d) for d in documents]
+        ),
+        "decode_codec_each": best_of(
+            args.repeat, lambda: [ChatMessage.from_dict(d) for d in documents]
+        ),
+        "decode_codec_bulk": best_of(args.repeat, lambda: ChatMessage.from_dicts(documents)),
+    }
+    return {
+        "messages": args.messages,
+        "ms": {name: round(seconds * 1000, 2) for name, seconds in timings.items()},
+        "speedup": {
+            "encode": round(timings["encode_legacy"] / timings["encode_codec"], 2),
+            "decode": round(timings["decode_legacy"] / timings["decode_codec_bulk"], 2),
+        },
+        "us_per_message_decode": {
+            "legacy": round(timings["decode_legacy"] / args.messages * 1e6, 2),
+            "codec_bulk": round(timings["decode_codec_bulk"] / args.messages * 1e6, 2),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.codec", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=5000, help="chat messages in the history")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, the best is reported")
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,244 @@
+import asyncio
+import copy
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.results import DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+
+def _sleep(latency: float, jitter: float):
+    time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+
+
+class FakeSpeechClient:
+    """
+    Stand-in for `speech_v1.SpeechClient`. Blocks the calling thread for the
+    configured latency like the real client and recognizes every utterance
+    as `transcript`.
+    """
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.05, transcript: str = ""):
+        self.latency = latency
+        self.jitter = jitter
+        self.transcript = transcript or "Can you tell me something interesting about robots today?"
+
+    def _response(self, is_final: bool = True):
+        alternative = SimpleNamespace(transcript=self.transcript)
+        result = SimpleNamespace(alternatives=[alternative], is_final=is_final)
+        return SimpleNamespace(results=[result])
+
+    def recognize(self, request=None, **kwargs):
+        _sleep(self.latency, self.jitter)
+        return self._response()
+
+    def streaming_recognize(self, config=None, requests: Iterable = (), **kwargs):
+        for _ in requests:
+            pass
+        # audio was recognized while it streamed, only the tail is left
+        _sleep(self.latency / 3, self.jitter / 3)
+        yield self._response()
+
+
+class FakeTextToSpeechClient:
+    """
+    Stand-in for `texttospeech.TextToSpeechClient` returning `bytes_per_char`
+    bytes of silence per input character after the configured latency.
+    """
+
+    def __init__(self, latency: float = 0.15, jitter: float = 0.03, bytes_per_char: int = 400):
+        self.latency = latency
+        self.jitter = jitter
+        self.bytes_per_char = bytes_per_char
+
+    def synthesize_speech(self, input=None, voice=None, audio_config=None, **kwargs):
+        _sleep(self.latency, self.jitter)
+        return SimpleNamespace(audio_content=bytes(len(input.text) * self.bytes_per_char))
+
+
+_OPERATORS = {
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$ne": lambda a, b: a != b,
+}
+
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, value in query.items():
+        if key == "$or":
+            if not any(_matches(document, clause) for clause in value):
+                return False
+        elif isinstance(value, dict) and value and all(op in _OPERATORS for op in value):
+            if not all(_OPERATORS[op](document.get(key), operand) for op, operand in value.items()):
+                return False
+        elif document.get(key) != value:
+            return False
+    return True
+
+
+class _Cursor:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self._documents = documents
+
+    def sort(self, key, direction: int = 1) -> "_Cursor":
+        keys = key if isinstance(key, list) else [(key, direction)]
+        # stable sorts, least significant key first
+        for name, order in reversed(keys):
+            self._documents.sort(key=lambda doc: doc.get(name), reverse=order < 0)
+        return self
+
+    def skip(self, count: int) -> "_Cursor":
+        self._documents = self._documents[count:]
+        return self
+
+    def limit(self, count: int) -> "_Cursor":
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._documents:
+            yield document
+
+
+class InMemoryCollection:
+    """
+    The subset of `AsyncCollection` used by `api.crud`, kept in a dict.
+    Unique indexes are enforced so id allocation behaves like the real thing.
+    """
+
+    def __init__(self, write_latency: float = 0.0):
+        self.write_latency = write_latency
+        self._documents: Dict[Any, Dict[str, Any]] = {}
+        self._unique: List[Tuple[str, ...]] = []
+        self._lock = threading.Lock()
+
+    async def create_indexes(self, indexes) -> List[str]:
+        for index in indexes:
+            document = index.document
+            if document.get("unique"):
+                self._unique.append(tuple(document["key"].keys()))
+        return [index.document["name"] for index in indexes]
+
+    def _check_unique(self, document: Dict[str, Any]):
+        for keys in self._unique:
+            value = tuple(document.get(key) for key in keys)
+            for existing in self._documents.values():
+                if tuple(existing.get(key) for key in keys) == value:
+                    raise DuplicateKeyError(f"E11000 duplicate key {dict(zip(keys, value))}", 11000)
+
+    def _insert(self, document: Dict[str, Any]) -> Any:
+        document = copy.deepcopy(document)
+        document.setdefault("_id", ObjectId())
+        with self._lock:
+            if document["_id"] in self._documents:
+                raise DuplicateKeyError("E11000 duplicate key _id", 11000)
+            self._check_unique(document)
+            self._documents[document["_id"]] = document
+        return document["_id"]
+
+    async def _write_delay(self):
+        if self.write_latency:
+            await asyncio.sleep(self.write_latency)
+
+    async def insert_one(self, document: Dict[str, Any]) -> InsertOneResult:
+        await self._write_delay()
+        return InsertOneResult(self._insert(document), acknowledged=True)
+
+    async def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True) -> InsertManyResult:
+        await self._write_delay()
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted.append(self._insert(document))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return InsertManyResult(inserted, acknowledged=True)
+
+    def _find(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [copy.deepcopy(doc) for doc in self._documents.values() if _matches(doc, query)]
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        found = self._find(query or {})
+        return found[0] if found else None
+
+    def find(self, query: Optional[Dict[str, Any]] = None, *args, **kwargs) -> _Cursor:
+        return _Cursor(self._find(query or {}))
+
+    async def count_documents(self, query: Dict[str, Any], **kwargs) -> int:
+        return len(self._find(query))
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], **kwargs) -> UpdateResult:
+        await self._write_delay()
+        with self._lock:
+            for document in self._documents.values():
+                if _matches(document, query):
+                    document.update(copy.deepcopy(update.get("$set", {})))
+                    return UpdateResult({"n": 1, "nModified": 1}, acknowledged=True)
+        return UpdateResult({"n": 0, "nModified": 0}, acknowledged=True)
+
+    async def find_one_and_update(self, query: Dict[str, Any], update: Dict[str, Any], **kwargs):
+        result = await self.update_one(query, update)
+        return await self.find_one(query) if result.matched_count else None
+
+    async def delete_one(self, query: Dict[str, Any]) -> DeleteResult:
+        with self._lock:
+            for key, document in list(self._documents.items()):
+                if _matches(document, query):
+                    del self._documents[key]
+                    return DeleteResult({"n": 1}, acknowledged=True)
+        return DeleteResult({"n": 0}, acknowledged=True)
+
+    async def delete_many(self, query: Dict[str, Any]) -> DeleteResult:
+        with self._lock:
+            keys = [key for key, doc in self._documents.items() if _matches(doc, query)]
+            for key in keys:
+                del self._documents[key]
+        return DeleteResult({"n": len(keys)}, acknowledged=True)
+
+
+class InMemoryDatabase:
+    def __init__(self, write_latency: float = 0.0):
+        self.write_latency = write_latency
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def get_collection(self, name) -> InMemoryCollection:
+        name = getattr(name, "value", name)
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self.write_latency)
+        return self._collections[name]
+
+    async def command(self, *args, **kwargs) -> Dict[str, Any]:
+        # explain: report an index scan so startup plan checks pass
+        return {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+
+
+class InMemoryMongoClient:
+    """Stand-in for `AsyncMongoClient`, passed to `api.clients.Clients`"""
+
+    def __init__(self, write_latency: float = 0.0):
+        self._databases: Dict[str, InMemoryDatabase] = {}
+        self.write_latency = write_latency
+
+    def get_database(self, name: str) -> InMemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase(self.write_latency)
+        return self._databases[name]
+
+    async def close(self):
+        pass
+
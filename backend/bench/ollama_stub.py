@@ -0,0 +1,104 @@
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, Iterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+REPLY = (
+    "Robots have been part of human imagination for a very long time. "
+    "The word itself comes from a Czech play written in 1920. "
+    "Today they help in factories, hospitals and even in our homes. "
+    "Would you like to hear how social robots learn to talk with people?"
+)
+
+
+def iter_tokens(text: str) -> Iterator[str]:
+    """Split a canned reply into word-sized deltas, like a model emits them"""
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        yield word if i == 0 else " " + word
+
+
+def create_stub_app(
+    token_rate: float = 40.0,
+    jitter: float = 0.3,
+    first_token_latency: float = 0.25,
+    cold_load_latency: float = 0.0,
+    reply: str = REPLY,
+) -> FastAPI:
+    """
+    Stand-in for the Ollama `/api/chat` endpoint streaming `reply` at about
+    `token_rate` tokens per second, each gap varied by +-`jitter` of itself.
+    The first request for a model also waits `cold_load_latency`, unless it
+    was loaded through `/api/generate`.
+    """
+    app = FastAPI()
+    loaded: Dict[str, asyncio.Task] = {}
+
+    async def ensure_loaded(model: str):
+        if model not in loaded:
+            loaded[model] = asyncio.create_task(asyncio.sleep(cold_load_latency))
+        await loaded[model]
+
+    @app.post("/api/generate")
+    async def generate(request: Request) -> Dict[str, Any]:
+        payload: Dict[str, Any] = await request.json()
+        if payload.get("keep_alive") == 0:
+            loaded.pop(payload["model"], None)
+        else:
+            await ensure_loaded(payload["model"])
+        return {"model": payload["model"], "response": "", "done": True}
+
+    @app.get("/api/ps")
+    async def ps() -> Dict[str, Any]:
+        return {"models": [{"name": model, "model": model} for model, task in loaded.items() if task.done()]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request) -> StreamingResponse:
+        payload: Dict[str, Any] = await request.json()
+        model = payload.get("model", "")
+        gap = 1 / token_rate
+
+        async def stream():
+            start = time.perf_counter()
+            await ensure_loaded(model)
+            await asyncio.sleep(first_token_latency)
+            count = 0
+            for token in iter_tokens(reply):
+                await asyncio.sleep(gap * random.uniform(1 - jitter, 1 + jitter))
+                count += 1
+                yield json.dumps({"model": model, "message": {"role": "assistant", "content": token}, "done": False}) + "\n"
+            yield json.dumps(
+                {
+                    "model": model,
+                    "message": {"role": "assistant", "content": ""},
+                    "done": True,
+                    "eval_count": count,
+                    "eval_duration": int((time.perf_counter() - start) * 1e9),
+                }
+            ) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+
+def run_stub(
+    host: str,
+    port: int,
+    token_rate: float,
+    jitter: float,
+    first_token_latency: float,
+    cold_load_latency: float,
+):
+    uvicorn.run(
+        create_stub_app(token_rate, jitter, first_token_latency, cold_load_latency),
+        host=host,
+        port=port,
+        log_level="warning",
+        access_log=False,
+    )
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import resource
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import APIRouter, FastAPI
+
+from .fakes import FakeSpeechClient, FakeTextToSpeechClient, InMemoryMongoClient
+
+LAG_INTERVAL = 0.05
+
+router = APIRouter(prefix="/bench")
+
+
+class LoopLagProbe:
+    """Measures how late the event loop wakes a task that sleeps `interval`"""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def reset(self) -> List[float]:
+        samples, self.samples = self.samples, []
+        return samples
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+
+probe = LoopLagProbe()
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # peak instead of current RSS where /proc is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@router.post("/start")
+async def start_probe() -> Dict[str, Any]:
+    probe.start()
+    probe.reset()
+    return {"rss_bytes": rss_bytes()}
+
+
+@router.get("/stats")
+async def get_stats() -> Dict[str, Any]:
+    """Loop lag samples since the previous call and the current RSS"""
+    return {"rss_bytes": rss_bytes(), "loop_lag": probe.reset()}
+
+
+def create_bench_app(
+    stt_latency: float,
+    tts_latency: float,
+    jitter: float,
+    mongo: str,
+    mongo_latency: float,
+) -> FastAPI:
+    """The real app with Google clients replaced and, optionally, an in-memory MongoDB"""
+    from api.app import create_app
+    from api.clients import Clients
+    from api.config import get_cfg
+
+    clients = Clients(
+        get_cfg(),
+        # without a client the real one is connected at startup
+        mongo_client=InMemoryMongoClient(mongo_latency) if mongo == "memory" else None,
+        s2t_client=FakeSpeechClient(stt_latency, jitter * stt_latency),
+        t2s_client=FakeTextToSpeechClient(tts_latency, jitter * tts_latency),
+    )
+    app = create_app(clients)
+    app.include_router(router)
+    return app
+
+
+def run_server(
+    host: str,
+    port: int,
+    llm_url: str,
+    stt_latency: float,
+    tts_latency: float,
+    jitter: float,
+    mongo: str,
+    mongo_latency: float,
+):
+    # must be set before api.config is imported
+    os.environ["LLM_URL"] = llm_url
+    os.environ["LLM_SERVICE_URL"] = llm_url
+
+    from loguru import logger
+
+    logger.remove()
+    uvicorn.run(
+        create_bench_app(stt_latency, tts_latency, jitter, mongo, mongo_latency),
+        host=host,
+        port=port,
+        log_level="warning",
+        access_log=False,
+        ws_max_size=64 * 1024 * 1024,
+    )
@@ -0,0 +1,56 @@
+import asyncio
+
+from api.sessions.broker import BrokerRegistry
+from api.sessions.registry import RelayedWebSocket
+
+
+class _ClientSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(("text", text))
+
+    async def send_bytes(self, data):
+        self.sent.append(("bytes", data))
+
+    async def close(self, code=1000):
+        self.sent.append(("close", code))
+
+
+def test_pump_relays_empty_binary_frames():
+    async def main():
+        registry, websocket, outbox = BrokerRegistry("unused"), _ClientSocket(), asyncio.Queue()
+        for frame in [
+            ({"kind": "send"}, b""),
+            ({"kind": "send", "text": ""}, b""),
+            ({"kind": "send"}, b"audio"),
+            ({"kind": "close", "code": 1001}, b""),
+        ]:
+            outbox.put_nowait(frame)
+        await asyncio.wait_for(registry._pump_to_client(websocket, outbox), 1)
+        return websocket.sent
+
+    assert asyncio.run(main()) == [
+        ("bytes", b""),
+        ("text", ""),
+        ("bytes", b"audio"),
+        ("close", 1001),
+    ]
+
+
+def test_owner_receives_empty_binary_frames():
+    async def main():
+        async def send(header, body):
+            pass
+
+        registry, websocket = BrokerRegistry("unused"), RelayedWebSocket(send)
+        registry._remote["conn"] = ("origin", websocket)
+        registry._deliver({"kind": "receive", "conn": "conn"}, b"")
+        registry._deliver({"kind": "receive", "conn": "conn", "text": "{}"}, b"")
+        return [await websocket.receive(), await websocket.receive()]
+
+    assert asyncio.run(main()) == [
+        {"type": "websocket.receive", "bytes": b""},
+        {"type": "websocket.receive", "text": "{}"},
+    ]
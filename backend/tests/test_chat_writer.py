@@ -0,0 +1,50 @@
+import asyncio
+
+from bson.errors import InvalidDocument
+
+from api.crud.chat_writer import ChatWriter
+from api.models.chat import ChatMessage
+from api.utils.types import MessageType
+
+
+class _Collection:
+    def __init__(self):
+        self.documents = []
+        self.fail_next = 0
+
+    async def insert_many(self, documents, ordered=True):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise InvalidDocument("cannot encode object")
+        self.documents.extend(documents)
+
+
+class _Database:
+    def __init__(self):
+        self.collection = _Collection()
+
+    def get_collection(self, name):
+        return self.collection
+
+
+def _message(text):
+    return ChatMessage(communication_id="c", role=MessageType.USER, message=text)
+
+
+def test_writer_survives_non_pymongo_errors():
+    async def main():
+        db = _Database()
+        db.collection.fail_next = 1
+        writer = ChatWriter(db, max_queue=1, batch_size=1, flush_interval=0.01)
+        writer.start()
+
+        await writer.submit([_message("lost")])
+        # more messages than the queue holds, only a running writer drains them
+        await asyncio.wait_for(writer.submit([_message(str(i)) for i in range(3)]), 1)
+        await asyncio.wait_for(writer.close(), 1)
+        return writer, db.collection
+
+    writer, collection = asyncio.run(main())
+    assert writer.failed == 1
+    assert writer.written == 3
+    assert [document["message"] for document in collection.documents] == ["0", "1", "2"]
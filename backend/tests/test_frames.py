@@ -0,0 +1,47 @@
+import pytest
+from bson import ObjectId
+
+from api.utils.frames import FRAME_VERSION, HEADER, Frame, FrameType, decode_frame, encode_frame
+
+
+def test_round_trip_with_turn():
+    turn_id = str(ObjectId())
+    data = encode_frame(FrameType.AUDIO_CHUNK, b"audio", seq=7, turn_id=turn_id)
+    assert len(data) == HEADER.size + 5
+    assert decode_frame(data) == Frame(FrameType.AUDIO_CHUNK, 7, turn_id, b"audio")
+
+
+def test_round_trip_without_turn():
+    frame = decode_frame(encode_frame(FrameType.AUDIO, b"\x00\xff" * 100))
+    assert frame == Frame(FrameType.AUDIO, 0, None, b"\x00\xff" * 100)
+
+
+def test_header_only_frame_has_empty_payload():
+    frame = decode_frame(encode_frame(FrameType.AUDIO_STREAM, b"", seq=2**32 - 1))
+    assert frame.seq == 2**32 - 1
+    assert frame.payload == b""
+
+
+def test_header_is_18_bytes():
+    assert HEADER.size == 18
+
+
+def test_rejects_frame_shorter_than_header():
+    data = encode_frame(FrameType.AUDIO, b"")
+    for length in (0, 1, HEADER.size - 1):
+        with pytest.raises(ValueError):
+            decode_frame(data[:length])
+
+
+def test_rejects_unknown_version():
+    data = bytearray(encode_frame(FrameType.AUDIO, b"audio"))
+    data[0] = FRAME_VERSION + 1
+    with pytest.raises(ValueError):
+        decode_frame(bytes(data))
+
+
+def test_rejects_unknown_type():
+    data = bytearray(encode_frame(FrameType.AUDIO, b"audio"))
+    data[1] = 99
+    with pytest.raises(ValueError):
+        decode_frame(bytes(data))
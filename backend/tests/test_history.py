@@ -0,0 +1,72 @@
+import pytest
+
+from api.ai.history import HistoryWindow
+from api.models.chat import ChatMessage
+from api.utils.types import MessageType
+
+
+def _history(count, size=10):
+    roles = (MessageType.USER, MessageType.ASSISTANT)
+    return [
+        ChatMessage(communication_id="c", role=roles[i % 2], message=str(i % 10) * size)
+        for i in range(count)
+    ]
+
+
+def _new(text="hi"):
+    return {"role": "user", "content": text}
+
+
+def test_rejects_unknown_unit():
+    with pytest.raises(ValueError):
+        HistoryWindow(100, unit="words")
+
+
+def test_token_cost():
+    window = HistoryWindow(100, chars_per_token=4)
+    assert window.cost("a" * 8) == 3
+    assert HistoryWindow(100, unit="chars").cost("a" * 8) == 8
+
+
+def test_keeps_everything_within_budget():
+    window = HistoryWindow(1000, unit="chars")
+    history = _history(4)
+    payload, start = window.build([], history, _new())
+    assert start == 0
+    assert len(payload) == 5
+
+
+def test_evicts_oldest_and_keeps_pinned_and_new_message():
+    window = HistoryWindow(45, unit="chars")
+    pinned = [{"role": "system", "content": "s" * 5}]
+    history = _history(6)
+    payload, start = window.build(pinned, history, _new("n" * 10))
+    # 30 chars left for history: the last three, minus a leading assistant reply
+    assert start == 4
+    assert payload[0] is pinned[0]
+    assert payload[-1]["content"] == "n" * 10
+    assert [m["content"] for m in payload[1:-1]] == [m.message for m in history[4:]]
+
+
+def test_window_never_opens_with_assistant_reply():
+    window = HistoryWindow(25, unit="chars")
+    history = _history(4)
+    start = window.select(history, reserved=0)
+    assert history[start].role == MessageType.USER
+
+
+def test_keep_from_holds_window_until_overflow():
+    window = HistoryWindow(60, unit="chars", low_water=0.5)
+    history = _history(4)
+    _, start = window.build([], history, _new("n" * 10))
+    assert start == 0
+
+    # the window keeps its start while it fits, so the prompt prefix is stable
+    history = _history(5)
+    _, start = window.build([], history, _new("n" * 10), keep_from=0)
+    assert start == 0
+
+    # on overflow it drops to the low water mark rather than one message
+    history = _history(6)
+    _, start = window.build([], history, _new("n" * 10), keep_from=0)
+    assert start == 4
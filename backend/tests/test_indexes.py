@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from api.crud.indexes import INDEXES, QUERY_SHAPES, ensure_indexes
+from api.models.chat import ChatMessage
+from api.models.prompt import PromptModel
+from api.mongodb import Collections
+
+# a document of each collection as its model stores it
+DOCUMENTS = {
+    Collections.chat_messages: ChatMessage(communication_id="c", role="user", message="hi").to_dict(),
+    Collections.prompts: PromptModel(
+        communication_id="c",
+        user_input="hi",
+        generated_prompt="hi",
+        llm_model=next(iter(PromptModel.model_fields["llm_model"].annotation)),
+    ).to_dict(),
+}
+
+
+def _filter_keys(query_filter):
+    for key, value in query_filter.items():
+        if key == "$or":
+            for clause in value:
+                yield from _filter_keys(clause)
+        else:
+            yield key
+
+
+def test_indexes_cover_stored_fields():
+    for collection, document in DOCUMENTS.items():
+        for index in INDEXES[collection]:
+            assert set(index.document["key"]) <= set(document), index.document["name"]
+
+
+def test_query_shapes_use_stored_fields():
+    for collection, query_filter, sort in QUERY_SHAPES:
+        if collection in DOCUMENTS:
+            fields = set(_filter_keys(query_filter)) | set(sort)
+            assert fields <= set(DOCUMENTS[collection]), (collection, query_filter)
+
+
+def test_failed_unique_index_fails_startup():
+    class Collection:
+        def __init__(self, unique_fails):
+            self.unique_fails = unique_fails
+
+        async def create_indexes(self, indexes):
+            if self.unique_fails and any(index.document.get("unique") for index in indexes):
+                raise OperationFailure("E11000 duplicate key error", 11000)
+            return [index.document["name"] for index in indexes]
+
+    class Database:
+        def __init__(self, unique_fails):
+            self.unique_fails = unique_fails
+
+        def get_collection(self, name):
+            return Collection(self.unique_fails)
+
+    asyncio.run(ensure_indexes(Database(False)))
+    with pytest.raises(RuntimeError, match="publicId_unique"):
+        asyncio.run(ensure_indexes(Database(True)))
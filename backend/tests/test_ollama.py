@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import httpx
+
+from api.ai.ollama import OllamaClient
+from api.ai.pipeline import stream_response
+from api.ai.scheduler import LLMScheduler
+from api.utils import metrics
+
+
+def _client(scheduler):
+    async def endless_reply():
+        while True:
+            yield json.dumps({"message": {"content": "word "}}).encode() + b"\n"
+            await asyncio.sleep(0.01)
+
+    async def handler(request):
+        return httpx.Response(200, content=endless_reply())
+
+    client = OllamaClient("http://ollama", scheduler=scheduler)
+    client._client = httpx.AsyncClient(
+        base_url="http://ollama", transport=httpx.MockTransport(handler)
+    )
+    return client
+
+
+def _inflight():
+    return metrics.INFLIGHT_LLM_REQUESTS._values.get((), 0)
+
+
+def test_cancelled_turn_releases_llm_slot():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1)
+        client = _client(scheduler)
+        inflight = _inflight()
+        sending = asyncio.Event()
+
+        async def send_message(*args):
+            sending.set()
+            await asyncio.Event().wait()
+
+        task = asyncio.create_task(
+            stream_response(client, [], "model", "turn", send_message, session="a")
+        )
+        await asyncio.wait_for(sending.wait(), 1)
+        assert scheduler.running == 1
+        assert _inflight() == inflight + 1
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # released when the turn ends, not when the generators are collected
+        running, released = scheduler.running, _inflight() == inflight
+        await client.aclose()
+        return running, released
+
+    running, released = asyncio.run(main())
+    assert running == 0
+    assert released
+
+
+def test_cancelled_turn_hands_slot_to_queued_session():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1)
+        client = _client(scheduler)
+        sending = asyncio.Event()
+
+        async def send_message(*args):
+            sending.set()
+            await asyncio.Event().wait()
+
+        barged_in = asyncio.create_task(
+            stream_response(client, [], "model", "turn", send_message, session="a")
+        )
+        await asyncio.wait_for(sending.wait(), 1)
+        granted, done = asyncio.Event(), asyncio.Event()
+
+        async def queued_request():
+            async with scheduler.slot("model", "b"):
+                granted.set()
+                await done.wait()
+
+        waiting = asyncio.create_task(queued_request())
+        await asyncio.sleep(0)
+        assert scheduler.queued == 1
+
+        barged_in.cancel()
+        await asyncio.gather(barged_in, return_exceptions=True)
+        # the waiter was granted by the release, not by a later timeout
+        await asyncio.wait_for(granted.wait(), 0.1)
+        running = scheduler.running
+        done.set()
+        await waiting
+        await client.aclose()
+        return running
+
+    assert asyncio.run(main()) == 1
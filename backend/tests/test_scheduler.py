@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from api.ai.scheduler import LLMBusyError, LLMScheduler, Priority
+
+
+async def _hold(scheduler, model, release, session="", priority=Priority.interactive, log=None):
+    async with scheduler.slot(model, session, priority):
+        if log is not None:
+            log.append(session)
+        await release.wait()
+
+
+async def _request(scheduler, model, session, log, priority=Priority.interactive):
+    async with scheduler.slot(model, session, priority):
+        log.append(session)
+
+
+def test_round_robin_across_sessions():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "m", release))
+        await asyncio.sleep(0)
+
+        log = []
+        tasks = [asyncio.create_task(_request(scheduler, "m", "a", log)) for _ in range(3)]
+        tasks.append(asyncio.create_task(_request(scheduler, "m", "b", log)))
+        await asyncio.sleep(0)
+        assert scheduler.queued == 4
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return log
+
+    # the chatty session does not keep the other one waiting behind all its requests
+    assert asyncio.run(main()) == ["a", "b", "a", "a"]
+
+
+def test_interactive_before_background():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "m", release))
+        await asyncio.sleep(0)
+
+        log = []
+        background = asyncio.create_task(
+            _request(scheduler, "m", "summary", log, Priority.background)
+        )
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(_request(scheduler, "m", "turn", log))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(holder, background, interactive)
+        return log
+
+    assert asyncio.run(main()) == ["turn", "summary"]
+
+
+def test_model_limit_does_not_block_other_models():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=4, model_concurrency={"slow": 1})
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "slow", release))
+        await asyncio.sleep(0)
+
+        log = []
+        waiting = asyncio.create_task(_request(scheduler, "slow", "a", log))
+        other = asyncio.create_task(_request(scheduler, "fast", "b", log))
+        await asyncio.wait_for(other, 1)
+        assert log == ["b"] and not waiting.done()
+
+        release.set()
+        await asyncio.gather(holder, waiting)
+        return log
+
+    assert asyncio.run(main()) == ["b", "a"]
+
+
+def test_sheds_when_queue_is_full():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "m", release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_request(scheduler, "m", "a", []))
+        await asyncio.sleep(0)
+
+        with pytest.raises(LLMBusyError):
+            async with scheduler.slot("m", "b"):
+                pass
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler.running == 0 and scheduler.queued == 0
+
+
+def test_sheds_after_queue_timeout():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1, queue_timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "m", release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(LLMBusyError):
+            async with scheduler.slot("m", "a"):
+                pass
+        assert scheduler.queued == 0
+
+        release.set()
+        await holder
+        return scheduler
+
+    assert asyncio.run(main()).running == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        scheduler = LLMScheduler(max_concurrency=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(scheduler, "m", release))
+        await asyncio.sleep(0)
+
+        log = []
+        cancelled = asyncio.create_task(_request(scheduler, "m", "a", log))
+        served = asyncio.create_task(_request(scheduler, "m", "b", log))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert scheduler.queued == 1
+
+        release.set()
+        await asyncio.gather(holder, served)
+        return scheduler, log
+
+    scheduler, log = asyncio.run(main())
+    assert log == ["b"]
+    assert scheduler.running == 0 and scheduler.queued == 0
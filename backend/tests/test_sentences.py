@@ -0,0 +1,42 @@
+from api.ai.sentences import MAX_TTS_BYTES, SentenceChunker, split_for_tts
+
+
+def test_chunker_yields_sentences_as_they_complete():
+    chunker = SentenceChunker(min_chars=10)
+    assert chunker.feed("Robots are machines that") == []
+    assert chunker.feed(" sense and act. They can") == ["Robots are machines that sense and act."]
+    assert chunker.flush() == ["They can"]
+    assert chunker.flush() is None
+
+
+def test_chunker_merges_short_sentences():
+    chunker = SentenceChunker(min_chars=20)
+    assert chunker.feed("Sure. Here is a longer answer. ") == ["Sure. Here is a longer answer."]
+
+
+def test_short_text_is_not_split():
+    assert split_for_tts("Hello there.") == ["Hello there."]
+
+
+def test_split_stays_under_byte_limit():
+    sentence = "Robots can help people in many ways every single day. "
+    text = sentence * (2 * MAX_TTS_BYTES // len(sentence))
+    pieces = split_for_tts(text)
+    assert len(pieces) > 1
+    assert all(len(piece.encode("utf-8")) <= MAX_TTS_BYTES for piece in pieces)
+    assert " ".join(pieces) == text.strip()
+
+
+def test_split_counts_bytes_not_characters():
+    # three bytes per character in UTF-8
+    text = " ".join(["ありがとう"] * 10)
+    pieces = split_for_tts(text, max_bytes=40)
+    assert all(len(piece.encode("utf-8")) <= 40 for piece in pieces)
+    assert " ".join(pieces) == text
+
+
+def test_sentence_over_limit_is_split_on_words():
+    text = "word " * 50
+    pieces = split_for_tts(text.strip(), max_bytes=32)
+    assert all(len(piece.encode("utf-8")) <= 32 for piece in pieces)
+    assert " ".join(pieces).split() == text.split()
@@ -0,0 +1,21 @@
+import importlib.util
+
+import pytest
+
+from api.config import Config
+from api.utils.speech_engines import check_speech_engines
+
+
+def test_check_passes_for_cloud_engines():
+    check_speech_engines(Config(stt_engines=["google"], tts_engines=["google"]))
+
+
+def test_check_rejects_unknown_engine():
+    with pytest.raises(RuntimeError, match="Unknown TTS engine in Config: espeak"):
+        check_speech_engines(Config(tts_engines=["google", "espeak"]))
+
+
+def test_check_rejects_missing_local_package(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(RuntimeError, match="The whisper STT engine needs the faster-whisper package"):
+        check_speech_engines(Config(stt_engines=["google", "whisper"]))
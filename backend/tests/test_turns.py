@@ -0,0 +1,94 @@
+import asyncio
+
+from api.ai.turns import TurnManager
+from api.utils.types import TurnPolicy
+
+
+def _turn(log, name, release=None):
+    async def turn():
+        log.append(f"start {name}")
+        try:
+            if release is not None:
+                await release.wait()
+            log.append(f"end {name}")
+        except asyncio.CancelledError:
+            log.append(f"cancel {name}")
+            raise
+
+    return turn
+
+
+async def _idle(turns):
+    while turns.busy:
+        await asyncio.sleep(0)
+
+
+def test_runs_turn_when_idle():
+    async def main():
+        turns, log = TurnManager(), []
+        assert turns.submit(_turn(log, "a"), TurnPolicy.reject)
+        assert turns.busy
+        await _idle(turns)
+        return log
+
+    assert asyncio.run(main()) == ["start a", "end a"]
+
+
+def test_reject_while_busy():
+    async def main():
+        turns, log, release = TurnManager(), [], asyncio.Event()
+        assert turns.submit(_turn(log, "a", release), TurnPolicy.reject)
+        await asyncio.sleep(0)
+        assert not turns.submit(_turn(log, "b"), TurnPolicy.reject)
+        release.set()
+        await _idle(turns)
+        return log
+
+    assert asyncio.run(main()) == ["start a", "end a"]
+
+
+def test_queue_runs_in_order_up_to_max_queue():
+    async def main():
+        turns, log, release = TurnManager(max_queue=2), [], asyncio.Event()
+        assert turns.submit(_turn(log, "a", release), TurnPolicy.queue)
+        await asyncio.sleep(0)
+        assert turns.submit(_turn(log, "b"), TurnPolicy.queue)
+        assert turns.submit(_turn(log, "c"), TurnPolicy.queue)
+        assert not turns.submit(_turn(log, "d"), TurnPolicy.queue)
+        assert turns.queued == 2
+        release.set()
+        await _idle(turns)
+        return turns, log
+
+    turns, log = asyncio.run(main())
+    assert log == ["start a", "end a", "start b", "end b", "start c", "end c"]
+    assert turns.queued == 0
+
+
+def test_latest_cancels_running_turn():
+    async def main():
+        turns, log = TurnManager(), []
+        assert turns.submit(_turn(log, "a", asyncio.Event()), TurnPolicy.latest)
+        await asyncio.sleep(0)
+        assert turns.submit(_turn(log, "b"), TurnPolicy.latest)
+        await _idle(turns)
+        return log
+
+    assert asyncio.run(main()) == ["start a", "cancel a", "start b", "end b"]
+
+
+def test_cancel_drops_queued_turns():
+    async def main():
+        turns, log = TurnManager(), []
+        assert not turns.cancel()
+        turns.submit(_turn(log, "a", asyncio.Event()), TurnPolicy.queue)
+        await asyncio.sleep(0)
+        turns.submit(_turn(log, "b"), TurnPolicy.queue)
+        assert turns.cancel()
+        assert turns.queued == 0
+        await asyncio.gather(turns.current, return_exceptions=True)
+        return turns, log
+
+    turns, log = asyncio.run(main())
+    assert log == ["start a", "cancel a"]
+    assert not turns.busy